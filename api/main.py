@@ -1,35 +1,138 @@
 import time
+_IMPORT_START = time.perf_counter()
+
+import asyncio
+import hmac
+import json
 import threading
 import queue
 import uuid
 import os
 from datetime import datetime, timezone
+from collections import Counter
+from contextlib import asynccontextmanager
 from typing import Optional, List
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from src.db import (
     insert_incoming_ticket, 
     fetch_tickets_by_student, 
-    update_ticket_status
+    update_ticket_status,
+    claim_deferred_tickets,
+    read_stats,
+    fetch_events_after,
+)
+from src.inference_service import classify_ticket, cascade_stats, warm_up_models, PREDICTION_INDEX
+from src.config import (
+    ADMIN_TOKEN,
+    PROFILE_DEFAULT_INTERVAL,
+    PROFILE_MAX_SECONDS,
+    ADMISSION_QUEUE_LIMITS,
+    ADMISSION_STUDENT_RATE,
+    ADMISSION_STUDENT_BURST,
+    ADMISSION_OVERLOAD_MODE,
+    DEFER_BACKFILL_BATCH,
+    SCHEDULER_TARGETS,
+    SCHEDULER_PROMOTE_HIGH,
+    DEDUP_ENABLED,
+    DEDUP_THRESHOLD,
+    DEDUP_WINDOW_SECONDS,
+    DEDUP_MAX_ENTRIES,
+    WARMUP_ON_STARTUP,
+    DRIFT_ENABLED,
+    SPOOL_ENABLED,
+    TICKET_HISTORY_MAX_STALENESS_SECONDS,
+    HISTORY_CACHE_ENABLED,
+    EVENT_STREAM_ENABLED,
+    EVENT_REORDER_WINDOW,
+    SSE_HEARTBEAT_SECONDS,
+    SSE_CLIENT_QUEUE_SIZE,
 )
-from src.inference_service import classify_ticket
+from src.dedup import NearDuplicateIndex
+from src.drift import DRIFT_MONITOR
+from src.history_cache import HISTORY_CACHE
+from src.event_bus import SUBSCRIBER
+from src.spool import write_ticket, write_status, start_replayer, spool_stats
+from src.data_generation import assign_priority
+from src.scheduler import SLOScheduler, parse_targets
+from src.admission import AdmissionController, parse_priority_limits, retry_after_header
+from src.profiler import sample_process, ProfilerBusy
+
+# Startup / readiness state (reported by /ready)
+STARTUP = {
+    "warm": False,
+    "import_seconds": round(time.perf_counter() - _IMPORT_START, 4),
+    "warmup": None,
+    "error": None,
+    "worker_started": False,
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Startup phase: warm the models (load + dummy prediction) before serving,
+    then start the worker so the first job doesn't pay the model load either.
+    """
+    if WARMUP_ON_STARTUP:
+        try:
+            STARTUP["warmup"] = warm_up_models()
+            STARTUP["warm"] = True
+        except Exception as e:
+            # Keep serving (e.g. models not trained yet); /ready reports not-ready
+            STARTUP["error"] = f"Model warm-up failed: {e}"
+            print(f"[Startup] {STARTUP['error']}")
+    else:
+        STARTUP["warm"] = True
+
+    start_worker()
+    if SPOOL_ENABLED:
+        start_replayer()
+    if EVENT_STREAM_ENABLED:
+        SUBSCRIBER.start()
+    print(f"[Startup] Ready={STARTUP['warm']} import={STARTUP['import_seconds']}s warmup={STARTUP['warmup']}")
+    yield
+
 
 app = FastAPI(
     title="University Support AI (Lab 05)",
-    version="2.1"
+    version="2.1",
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------
 # 1. GLOBAL CONFIG & STATE
 # ---------------------------------------------------------
-# The Queue stores tuples: (priority_int, ticket_id, text)
-# PriorityQueue sorts by the first item (Integer). Smallest = First.
-JOB_QUEUE = queue.PriorityQueue()
+# The Queue stores (ticket_id, text, created_at) per priority class.
+# Jobs are served earliest-deadline-first: deadline = arrival + class latency target,
+# so waiting jobs age and Low tickets can't starve behind a stream of High ones.
+JOB_QUEUE = SLOScheduler(parse_targets(SCHEDULER_TARGETS))
 
-# Map string inputs to integers for the queue (High=1, Medium=2, Low=3)
+# Map string inputs to integers (High=1, Medium=2, Low=3); unknown inputs count as Low
 PRIORITY_INT_MAP = {"High": 1, "Medium": 2, "Low": 3}
+PRIORITY_NAME_MAP = {v: k for k, v in PRIORITY_INT_MAP.items()}
+
+# Accepted tickets promoted to High by the fast pre-classifier (by requested class)
+PROMOTIONS = Counter()
+_PROMOTIONS_LOCK = threading.Lock()
+
+# Recent submissions per student (scope=student_id) to flag resubmitted complaints
+SUBMISSION_INDEX = NearDuplicateIndex(
+    threshold=DEDUP_THRESHOLD,
+    window_seconds=DEDUP_WINDOW_SECONDS,
+    max_entries=DEDUP_MAX_ENTRIES,
+)
+
+# Admission control for /submit (per-priority depth limits + per-student token buckets)
+ADMISSION = AdmissionController(
+    queue_limits=parse_priority_limits(ADMISSION_QUEUE_LIMITS),
+    student_rate=ADMISSION_STUDENT_RATE,
+    student_burst=ADMISSION_STUDENT_BURST,
+)
 
 # Lab Metrics
 METRICS = {
@@ -44,16 +147,62 @@ IS_MONOLITHIC = os.getenv("MONOLITHIC_MODE", "false").lower() == "true"
 # ---------------------------------------------------------
 # 2. WORKER LOOP (The "Cloud" Backend)
 # ---------------------------------------------------------
+def save_ticket(*args, **kwargs):
+    return write_ticket(*args, **kwargs) if SPOOL_ENABLED else insert_incoming_ticket(*args, **kwargs)
+
+
+def save_status(*args, **kwargs):
+    return write_status(*args, **kwargs) if SPOOL_ENABLED else update_ticket_status(*args, **kwargs)
+
+
+def effective_priority(requested, text):
+    """
+    Queue class for a ticket: the requested priority, optionally promoted to High
+    when a cheap keyword pre-classification says the ticket is urgent.
+    Returns (queue class, requested class if promoted else None).
+    """
+    p_name = PRIORITY_NAME_MAP[PRIORITY_INT_MAP.get(requested, 3)]
+    if SCHEDULER_PROMOTE_HIGH and p_name != "High" and assign_priority(text) == "High":
+        return "High", p_name
+    return p_name, None
+
+
+def record_promotion(promoted_from):
+    # Called from request threads once the ticket is accepted
+    if promoted_from is not None:
+        with _PROMOTIONS_LOCK:
+            PROMOTIONS[promoted_from] += 1
+
+
+def _promotions_snapshot():
+    with _PROMOTIONS_LOCK:
+        return dict(PROMOTIONS)
+
+
+def backfill_deferred():
+    """
+    Worker is idle: pull DEFERRED tickets (stored during overload) back into the queue.
+    They keep their original arrival time, so they age like any other job.
+    """
+    for row in claim_deferred_tickets(limit=DEFER_BACKFILL_BATCH):
+        # Already counted in PROMOTIONS when the ticket was accepted
+        p_name, _ = effective_priority(row["requested_priority"], row["text"])
+        JOB_QUEUE.put(
+            p_name, (row["ticket_id"], row["text"], row["created_at"]), arrival=row["created_at"].timestamp()
+        )
+
+
 def worker_loop():
     print(f"[Worker] Online. Monolithic Mode: {IS_MONOLITHIC}")
     
     while True:
         try:
-            # Get the highest priority item (blocks if empty)
-            priority_int, ticket_id, text = JOB_QUEUE.get(timeout=1)
+            # Get the most urgent item (blocks if empty)
+            p_name, (ticket_id, text, created_at), waited = JOB_QUEUE.get(timeout=1)
+            job_start = time.time()
             
             # 1. Update DB -> Processing
-            update_ticket_status(ticket_id, "PROCESSING")
+            save_status(ticket_id, "PROCESSING", created_at=created_at)
             
             # 2. Simulate Heavy Work (Lab Requirement)
             time.sleep(1.0) 
@@ -61,26 +210,34 @@ def worker_loop():
             # 3. Run your Project's AI (Business Logic)
             try:
                 # We run the AI to categorize the ticket and store prediction
-                result = classify_ticket(ticket_id=ticket_id, text=text)
+                result = classify_ticket(ticket_id=ticket_id, text=text, spool=SPOOL_ENABLED)
                 note = f"AI Classified: {result.get('pred_category')}"
             except Exception as e:
                 note = f"AI Error: {str(e)}"
 
             # 4. Mark Done in Tickets table
-            update_ticket_status(ticket_id, "RESOLVED", datetime.now(timezone.utc), note)
+            save_status(ticket_id, "RESOLVED", datetime.now(timezone.utc), note, created_at=created_at)
             
-            JOB_QUEUE.task_done()
-            print(f"[Worker] Processed Ticket {ticket_id} (Priority Level: {priority_int})")
+            ADMISSION.record_service_time(time.time() - job_start)
+            print(f"[Worker] Processed Ticket {ticket_id} (Priority: {p_name}, waited {waited:.1f}s)")
             
         except queue.Empty:
+            if ADMISSION_OVERLOAD_MODE == "defer":
+                try:
+                    backfill_deferred()
+                except Exception as e:
+                    print(f"[Worker] Backfill error: {e}")
             continue
         except Exception as e:
             print(f"[Worker] Error: {e}")
 
-# Start Worker (Only if NOT Monolithic)
-if not IS_MONOLITHIC:
+def start_worker():
+    # Start Worker (Only if NOT Monolithic), once per process
+    if IS_MONOLITHIC or STARTUP["worker_started"]:
+        return
     t = threading.Thread(target=worker_loop, daemon=True)
     t.start()
+    STARTUP["worker_started"] = True
 
 
 # ---------------------------------------------------------
@@ -97,6 +254,7 @@ class TicketResponse(BaseModel):
     ticket_id: str
     status: str
     message: str
+    duplicate_of: Optional[str] = None  # Earlier near-identical ticket from the same student
 
 # Model for the Original Project Predict endpoint
 class TicketRequest(BaseModel):
@@ -106,7 +264,8 @@ class PredictionResponse(BaseModel):
     ticket_id: str
     category: str
     priority: str
-    confidence: float
+    confidence: Optional[float] = None  # None for rule-tier answers
+    tier: Optional[str] = None
     processed_at: str
 
 
@@ -121,6 +280,14 @@ def root():
         "mode": "MONOLITHIC" if IS_MONOLITHIC else "ASYNC_QUEUE"
     }
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 200 once models are warm, 503 before (or if warm-up failed).
+    Also reports import / model load / warm-up timings.
+    """
+    return JSONResponse(status_code=200 if STARTUP["warm"] else 503, content=STARTUP)
+
 # --- ENDPOINT 1: SUBMIT (Lab Task 1: Priority + Queue) ---
 @app.post("/submit", response_model=TicketResponse)
 def submit_ticket(req: LabTicketRequest):
@@ -134,11 +301,52 @@ def submit_ticket(req: LabTicketRequest):
     ticket_id = str(uuid.uuid4())[:8]
     created_at = datetime.now(timezone.utc)
     
-    # Insert into DB immediately with status="QUEUED"
-    insert_incoming_ticket(ticket_id, req.text, created_at, req.student_id, req.priority)
-    
-    # Convert "High" string to Integer 1
-    p_int = PRIORITY_INT_MAP.get(req.priority, 3) 
+    # Queue class (requested priority, possibly promoted to High)
+    p_name, promoted_from = effective_priority(req.priority, req.text)
+
+    # Admission control (before touching the DB)
+    deferred = False
+    if not IS_MONOLITHIC:
+        admit, retry_after = ADMISSION.check_depth(p_name, JOB_QUEUE.depth(p_name))
+        if not admit:
+            if ADMISSION_OVERLOAD_MODE != "defer":
+                ADMISSION.record_shed("queue_full", p_name)
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"{p_name} priority queue is full. Please retry later.",
+                    headers={"Retry-After": retry_after_header(retry_after)},
+                )
+            deferred = True
+
+    # Rate limit last, so a ticket shed for queue depth doesn't use up the student's token
+    wait = ADMISSION.check_rate(req.student_id)
+    if wait > 0:
+        ADMISSION.record_shed("rate_limited", p_name)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many tickets from this student. Please retry later.",
+            headers={"Retry-After": retry_after_header(wait)},
+        )
+    if deferred:
+        ADMISSION.record_deferred(p_name)
+
+    # Flag likely resubmissions of the same complaint (same student, recent window)
+    duplicate_of = None
+    if DEDUP_ENABLED:
+        sig = SUBMISSION_INDEX.signature(req.text)
+        match = SUBMISSION_INDEX.query(req.text, scope=req.student_id, sig=sig)
+        duplicate_of = match[0] if match else None
+
+    # Insert into DB immediately with status="QUEUED" (or "DEFERRED" under overload);
+    # with SPOOL_ENABLED a slow/down DB spools the write to local disk instead
+    save_ticket(
+        ticket_id, req.text, created_at, req.student_id, req.priority,
+        status="DEFERRED" if deferred else "QUEUED",
+    )
+    record_promotion(promoted_from)
+    # Indexed only once stored, so a failed save can't be reported as the original
+    if DEDUP_ENABLED:
+        SUBMISSION_INDEX.add(ticket_id, req.text, scope=req.student_id, sig=sig)
 
     if IS_MONOLITHIC:
         # --- MONOLITHIC MODE (The "Bad" Way) ---
@@ -146,15 +354,19 @@ def submit_ticket(req: LabTicketRequest):
         time.sleep(1.0)
         
         # Run AI logic immediately
-        classify_ticket(ticket_id, req.text)
-        update_ticket_status(ticket_id, "RESOLVED", datetime.now(timezone.utc), "Processed Sync")
+        classify_ticket(ticket_id, req.text, spool=SPOOL_ENABLED)
+        save_status(ticket_id, "RESOLVED", datetime.now(timezone.utc), "Processed Sync", created_at=created_at)
         
         status = "RESOLVED"
         msg = "Processed Synchronously (Slow)"
+    elif deferred:
+        # --- OVERLOAD: DB only, worker picks it up when idle ---
+        status = "DEFERRED"
+        msg = "Queue full: stored and will be queued when workers catch up"
     else:
         # --- CLOUD QUEUE MODE (The "Good" Way) ---
         # We push to queue and return IMMEDIATELY.
-        JOB_QUEUE.put((p_int, ticket_id, req.text))
+        JOB_QUEUE.put(p_name, (ticket_id, req.text, created_at))
         
         status = "QUEUED"
         msg = "Added to Priority Queue"
@@ -164,18 +376,30 @@ def submit_ticket(req: LabTicketRequest):
     METRICS["count"] += 1
     METRICS["total_latency"] += duration
 
-    return TicketResponse(ticket_id=ticket_id, status=status, message=msg)
+    return TicketResponse(ticket_id=ticket_id, status=status, message=msg, duplicate_of=duplicate_of)
 
 
 # --- ENDPOINT 2: GET BY STUDENT (Lab Task 2) ---
 @app.get("/tickets")
-def get_tickets_by_student(student_id: str = Query(..., description="The Student ID to search for")):
+def get_tickets_by_student(
+    student_id: str = Query(..., description="The Student ID to search for"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Returns all tickets for a specific student_id.
+    Returns all tickets for a specific student_id (plus per-status counts).
     Example: GET /tickets?student_id=S12345
+    Send the returned ETag back as If-None-Match to get a 304 when nothing changed.
     """
-    tickets = fetch_tickets_by_student(student_id)
-    return {"student_id": student_id, "tickets": tickets}
+    if not HISTORY_CACHE_ENABLED:
+        # May be served by a read replica lagging at most a few seconds
+        tickets = fetch_tickets_by_student(student_id, max_staleness=TICKET_HISTORY_MAX_STALENESS_SECONDS)
+        status_counts = dict(Counter(t["status"] for t in tickets))
+        return {"student_id": student_id, "tickets": tickets, "status_counts": status_counts}
+
+    body, etag, not_modified = HISTORY_CACHE.get(student_id, if_none_match)
+    if not_modified:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 # --- ENDPOINT 3: METRICS (Lab Task 3) ---
@@ -189,10 +413,120 @@ def get_metrics():
         "total_requests": METRICS["count"],
         "average_response_time_seconds": round(avg, 4),
         "current_queue_length": JOB_QUEUE.qsize(),
+        "queue_length_by_priority": JOB_QUEUE.depth(),
+        "queue_wait_seconds": JOB_QUEUE.wait_stats(),
+        "promoted_to_high": _promotions_snapshot(),
+        "cascade": cascade_stats(),
+        "history_cache": HISTORY_CACHE.snapshot() if HISTORY_CACHE_ENABLED else {"enabled": False},
+        "events": {**SUBSCRIBER.snapshot(), "sse": dict(SSE_STATS)},
+        "dedup": {
+            "enabled": DEDUP_ENABLED,
+            "predictions": PREDICTION_INDEX.snapshot(),
+            "submissions": SUBMISSION_INDEX.snapshot(),
+        },
+        "admission": ADMISSION.snapshot(),
+        "spool": spool_stats() if SPOOL_ENABLED else {"enabled": False},
+        "db_reads": read_stats(),
         "mode": "MONOLITHIC" if IS_MONOLITHIC else "ASYNC_QUEUE"
     }
 
 
+@app.get("/drift")
+def get_drift():
+    """
+    Online drift statistics: sliding-window sketches vs the training reference (PSI / KL per feature).
+    """
+    return {"enabled": DRIFT_ENABLED, **DRIFT_MONITOR.snapshot()}
+
+
+# --- EVENT STREAM (Server-Sent Events) ---
+SSE_STATS = Counter()
+
+
+def _sse_message(message, event_id):
+    return f"id: {event_id}\nevent: {message['event_type']}\ndata: {json.dumps(message, default=str)}\n\n"
+
+
+def _replay_events(last_event_id, event_types, page_size=500):
+    """
+    Events a reconnecting client may have missed: everything after Last-Event-ID,
+    plus EVENT_REORDER_WINDOW ids behind it for events that committed late.
+    """
+    after = max(0, last_event_id - EVENT_REORDER_WINDOW)
+    replayed = []
+    while True:
+        rows = fetch_events_after(after, event_types, limit=page_size)
+        if not rows:
+            return replayed
+        replayed.extend(rows)
+        after = rows[-1]["id"]
+
+
+@app.get("/events/stream")
+async def stream_events(
+    request: Request,
+    types: str = Query("TICKET_CLASSIFIED", description="Comma-separated event types"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Pushes events (by default the High-priority TICKET_CLASSIFIED alerts) as they
+    are stored, via Postgres LISTEN/NOTIFY. Browsers reconnect with Last-Event-ID
+    and get the events they missed from public.events first.
+    Example: curl -N localhost:8000/events/stream
+    """
+    if not EVENT_STREAM_ENABLED:
+        raise HTTPException(status_code=404, detail="Event stream disabled (EVENT_STREAM_ENABLED=false)")
+
+    event_types = [t.strip() for t in types.split(",") if t.strip()]
+    loop = asyncio.get_running_loop()
+    inbox = asyncio.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
+
+    def offer(message):
+        try:
+            inbox.put_nowait(message)
+        except asyncio.QueueFull:
+            SSE_STATS["dropped"] += 1
+
+    # Runs on the listener (or writer) thread: hand off to this client's event loop
+    def on_event(message):
+        loop.call_soon_threadsafe(offer, message)
+
+    # Subscribe before the replay so nothing falls between the two
+    token = SUBSCRIBER.subscribe(on_event, event_types)
+    SSE_STATS["clients"] += 1
+
+    async def events():
+        # `id:` is the highest id sent so far, so a late low id doesn't move Last-Event-ID back
+        replayed, cursor = set(), 0
+        try:
+            if last_event_id and last_event_id.isdigit():
+                for message in await run_in_threadpool(_replay_events, int(last_event_id), event_types):
+                    replayed.add(message["id"])
+                    cursor = max(cursor, message["id"])
+                    yield _sse_message(message, cursor)
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(inbox.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message["id"] in replayed:
+                    continue  # already sent by the replay
+                SSE_STATS["sent"] += 1
+                cursor = max(cursor, message["id"])
+                yield _sse_message(message, cursor)
+        finally:
+            SUBSCRIBER.unsubscribe(token)
+            SSE_STATS["clients"] -= 1
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # --- ENDPOINT 4: ORIGINAL PROJECT PREDICT ---
 @app.post("/predict", response_model=PredictionResponse)
 def predict_original(req: TicketRequest):
@@ -212,6 +546,30 @@ def predict_original(req: TicketRequest):
         ticket_id=ticket_id,
         category=result.get("pred_category", "Unknown"),
         priority=result.get("pred_priority", "Unknown"),
-        confidence=result.get("confidence", 0.0),
+        confidence=result.get("confidence"),
+        tier=result.get("tier"),
         processed_at=datetime.now(timezone.utc).isoformat()
-    )
\ No newline at end of file
+    )
+
+
+# --- ENDPOINT 5: ADMIN PROFILER ---
+@app.get("/admin/profile", response_class=PlainTextResponse)
+def profile_process(
+    seconds: float = Query(10.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval: float = Query(PROFILE_DEFAULT_INTERVAL, ge=0.001, le=1.0),
+    idle: bool = Query(False, description="Also count threads parked in waits (queue.get, select, ...)"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Samples all threads (worker_loop, request handlers, ...) for N seconds.
+    Returns collapsed stacks, e.g.:
+    curl -H "X-Admin-Token: $ADMIN_TOKEN" "localhost:8000/admin/profile?seconds=30" > api.folded
+    """
+    # Constant-time comparison, so response timing doesn't leak the token
+    if not ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+    try:
+        return sample_process(seconds=seconds, interval=interval, include_idle=idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
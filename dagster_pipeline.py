@@ -1,9 +1,23 @@
-from dagster import asset, Definitions
+import time
+from datetime import datetime, timezone
+
+from dagster import (
+    AssetExecutionContext,
+    DailyPartitionsDefinition,
+    Definitions,
+    Output,
+    ScheduleDefinition,
+    asset,
+    build_schedule_from_partitioned_job,
+    define_asset_job,
+)
 
 from src.data_generation import generate_and_store_tickets
 from src.train_model import train_models
-from src.inference_service import batch_classify_from_db
-from src.monitoring import compute_monitoring
+from src.archival import run_maintenance
+from src.config import PIPELINE_PARTITION_START
+from src.inference_service import batch_classify_from_db, classify_window
+from src.monitoring import compute_monitoring, compute_daily_monitoring
 
 
 # ----------------------------
@@ -21,7 +35,8 @@ def synthetic_data_to_postgres() -> str:
 # ----------------------------
 @asset(group_name="training", compute_kind="sklearn", deps=[synthetic_data_to_postgres])
 def train_baseline_models() -> dict:
-    cat_acc, pri_acc = train_models(test_size=0.2, seed=42)
+    # Primary read: the tickets were just written, a replica may lag behind
+    cat_acc, pri_acc = train_models(test_size=0.2, seed=42, max_staleness=0)
     return {"category_accuracy": cat_acc, "priority_accuracy": pri_acc}
 
 
@@ -41,15 +56,106 @@ def batch_inference_run() -> str:
 @asset(group_name="monitoring", compute_kind="sklearn", deps=[batch_inference_run])
 def monitoring_report() -> dict:
     # Reads DB (tickets + predictions), writes outputs/metrics.json and CSVs
-    metrics = compute_monitoring()
+    # Primary read: batch_inference_run just wrote the predictions
+    metrics = compute_monitoring(max_staleness=0)
     return metrics
 
 
+# ----------------------------
+# DAILY PARTITIONS (ticket created_at day, UTC)
+# Backfills fan out one run per day; re-materializing a day only classifies
+# tickets that are still unclassified in that window.
+# ----------------------------
+daily_partitions = DailyPartitionsDefinition(start_date=PIPELINE_PARTITION_START, timezone="UTC")
+
+
+def _partition_window(context: AssetExecutionContext):
+    # Plain datetimes (the SQLite adapter doesn't accept pendulum subclasses)
+    window = context.partition_time_window
+    return (
+        datetime.fromtimestamp(window.start.timestamp(), tz=timezone.utc),
+        datetime.fromtimestamp(window.end.timestamp(), tz=timezone.utc),
+    )
+
+
+@asset(group_name="inference", compute_kind="sklearn", deps=[train_baseline_models],
+       partitions_def=daily_partitions)
+def daily_batch_inference(context: AssetExecutionContext) -> Output[dict]:
+    # Classifies the day's unclassified tickets -> predictions/events + parquet day partition
+    start, end = _partition_window(context)
+    t0 = time.perf_counter()
+    result = classify_window(start, end)
+    duration = time.perf_counter() - t0
+    return Output(
+        result,
+        metadata={
+            "day": context.partition_key,
+            "rows": result["rows"],
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(result["rows"] / duration, 1) if duration > 0 else 0.0,
+        },
+    )
+
+
+@asset(group_name="monitoring", compute_kind="sklearn", deps=[daily_batch_inference],
+       partitions_def=daily_partitions)
+def daily_monitoring_report(context: AssetExecutionContext) -> Output[dict]:
+    # Metrics for the day's tickets only -> outputs/parquet/daily_metrics/day=...
+    start, end = _partition_window(context)
+    t0 = time.perf_counter()
+    metrics = compute_daily_monitoring(start, end)
+    duration = time.perf_counter() - t0
+    metadata = {
+        "day": context.partition_key,
+        "rows": metrics["n_predictions"],
+        "duration_seconds": round(duration, 3),
+    }
+    if metrics["n_predictions"]:
+        metadata["category_accuracy"] = round(metrics["category_accuracy"], 4)
+        if metrics["avg_confidence"] is not None:
+            metadata["avg_confidence"] = round(metrics["avg_confidence"], 4)
+    return Output(metrics, metadata=metadata)
+
+
+daily_tickets_job = define_asset_job(
+    "daily_tickets_job",
+    selection=[daily_batch_inference, daily_monitoring_report],
+)
+
+# Materializes the previous (completed) day shortly after midnight UTC
+daily_tickets_schedule = build_schedule_from_partitioned_job(daily_tickets_job, hour_of_day=0, minute_of_hour=15)
+
+
+# ----------------------------
+# MAINTENANCE (Postgres monthly partitions)
+# ----------------------------
+@asset(group_name="maintenance", compute_kind="postgres")
+def partition_maintenance() -> Output[dict]:
+    # Creates upcoming monthly partitions, archives + detaches old ones (outputs/archive/)
+    result = run_maintenance()
+    return Output(
+        result,
+        metadata={
+            "partitions_created": sum(result["created"].values()),
+            "partitions_archived": len(result["archived"]),
+        },
+    )
+
+
+partition_maintenance_job = define_asset_job("partition_maintenance_job", selection=[partition_maintenance])
+partition_maintenance_schedule = ScheduleDefinition(job=partition_maintenance_job, cron_schedule="0 2 * * *")
+
+
 defs = Definitions(
     assets=[
         synthetic_data_to_postgres,
         train_baseline_models,
         batch_inference_run,
         monitoring_report,
-    ]
+        daily_batch_inference,
+        daily_monitoring_report,
+        partition_maintenance,
+    ],
+    jobs=[daily_tickets_job, partition_maintenance_job],
+    schedules=[daily_tickets_schedule, partition_maintenance_schedule],
 )
\ No newline at end of file
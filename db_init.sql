@@ -9,12 +9,23 @@ DROP TABLE IF EXISTS public.metrics;
 DROP TABLE IF EXISTS public.events;
 DROP TABLE IF EXISTS public.predictions;
 DROP TABLE IF EXISTS public.tickets;
+DROP TABLE IF EXISTS public.prediction_keys;
+DROP TABLE IF EXISTS public.ticket_keys;
+
+-- ===============================
+-- Tickets, predictions and events are range-partitioned by month on their
+-- timestamp column: queries with a time predicate only touch recent
+-- partitions, and old months are archived + detached (python -m src.archival).
+-- Primary keys must include the partition column, so ticket_id uniqueness and
+-- the predictions -> tickets reference are enforced through small unpartitioned
+-- key tables (ticket_keys / prediction_keys) maintained by BEFORE INSERT triggers.
+-- ===============================
 
 -- ===============================
 -- 1) Tickets Table
 -- ===============================
 CREATE TABLE public.tickets (
-    ticket_id VARCHAR(50) PRIMARY KEY,
+    ticket_id VARCHAR(50) NOT NULL,
     student_id VARCHAR(50) DEFAULT 'Anonymous',
     text TEXT NOT NULL,
     true_category VARCHAR(50) DEFAULT 'Unknown',
@@ -23,32 +34,90 @@ CREATE TABLE public.tickets (
     status VARCHAR(20) DEFAULT 'QUEUED', 
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     resolved_at TIMESTAMP WITH TIME ZONE,
-    resolution_note TEXT
-);
+    resolution_note TEXT,
+    PRIMARY KEY (ticket_id, created_at)
+) PARTITION BY RANGE (created_at);
 
 -- ===============================
 -- 2) Predictions Table
 -- ===============================
 CREATE TABLE public.predictions (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     -- FIXED: Changed from VARCHAR(20) to VARCHAR(50) to match tickets table
-    ticket_id VARCHAR(50) REFERENCES public.tickets(ticket_id) ON DELETE CASCADE,
+    ticket_id VARCHAR(50) NOT NULL,
     pred_category VARCHAR(50) NOT NULL,
     pred_priority VARCHAR(20) NOT NULL,
-    confidence DOUBLE PRECISION NOT NULL,
-    processed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    -- Model probability; NULL for rule-tier answers (no calibrated score)
+    confidence DOUBLE PRECISION,
+    -- Cascade tier that answered: model / rules / dedup
+    tier VARCHAR(20) NOT NULL DEFAULT 'model',
+    processed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, processed_at)
+) PARTITION BY RANGE (processed_at);
 
 -- ===============================
 -- 3) Events Table
 -- ===============================
 CREATE TABLE public.events (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     event_type VARCHAR(100) NOT NULL,
     payload JSONB NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- ===============================
+-- Key tables (uniqueness across partitions)
+-- ===============================
+-- One row per ticket_id ever inserted: a re-sent ticket with a different
+-- created_at is skipped, like ON CONFLICT (ticket_id) DO NOTHING before partitioning.
+CREATE TABLE public.ticket_keys (
+    ticket_id VARCHAR(50) PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL
 );
 
+-- At most one prediction per ticket, and only for tickets that exist
+CREATE TABLE public.prediction_keys (
+    ticket_id VARCHAR(50) PRIMARY KEY REFERENCES public.ticket_keys(ticket_id) ON DELETE CASCADE,
+    processed_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION public.claim_ticket_key()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO public.ticket_keys (ticket_id, created_at)
+    VALUES (NEW.ticket_id, COALESCE(NEW.created_at, CURRENT_TIMESTAMP))
+    ON CONFLICT (ticket_id) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- duplicate ticket_id: skip the row
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.claim_prediction_key()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Unknown ticket_id raises a foreign key violation (as the old FK did)
+    INSERT INTO public.prediction_keys (ticket_id, processed_at)
+    VALUES (NEW.ticket_id, NEW.processed_at)
+    ON CONFLICT (ticket_id) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- ticket already has a prediction: skip the row
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER tickets_claim_key BEFORE INSERT ON public.tickets
+    FOR EACH ROW EXECUTE FUNCTION public.claim_ticket_key();
+CREATE TRIGGER predictions_claim_key BEFORE INSERT ON public.predictions
+    FOR EACH ROW EXECUTE FUNCTION public.claim_prediction_key();
+
 -- ===============================
 -- 4) Metrics Table
 -- ===============================
@@ -62,10 +131,86 @@ CREATE TABLE public.metrics (
     computed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ===============================
+-- Monthly partitions
+-- ===============================
+-- Creates the missing monthly partitions <table>_pYYYY_MM for p_months months
+-- starting at p_from's month. Idempotent; run ahead of time (src.archival does)
+-- so rows rarely land in the DEFAULT partition. Rows that did land there for a
+-- new month are moved into the new partition before it is attached (Postgres
+-- refuses to create a partition whose range has rows in DEFAULT).
+CREATE OR REPLACE FUNCTION public.ensure_partitions(p_table TEXT, p_from DATE, p_months INT)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    m_start DATE;
+    lo TIMESTAMPTZ;
+    hi TIMESTAMPTZ;
+    part TEXT;
+    default_part TEXT := p_table || '_default';
+    has_default BOOLEAN;
+    part_col TEXT;
+    misplaced BOOLEAN;
+    created INT := 0;
+BEGIN
+    has_default := to_regclass('public.' || default_part) IS NOT NULL;
+    SELECT a.attname INTO part_col
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = ('public.' || p_table)::regclass;
+
+    FOR i IN 0 .. p_months - 1 LOOP
+        m_start := (date_trunc('month', p_from) + make_interval(months => i))::date;
+        lo := m_start::timestamp AT TIME ZONE 'UTC';
+        hi := (m_start + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+        part := format('%s_p%s', p_table, to_char(m_start, 'YYYY_MM'));
+        IF to_regclass('public.' || part) IS NOT NULL THEN
+            CONTINUE;
+        END IF;
+
+        misplaced := FALSE;
+        IF has_default THEN
+            -- Block inserts into DEFAULT until the new partition is attached
+            EXECUTE format('LOCK TABLE public.%I IN EXCLUSIVE MODE', default_part);
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM public.%I WHERE %I >= %L AND %I < %L)',
+                           default_part, part_col, lo, part_col, hi)
+            INTO misplaced;
+        END IF;
+
+        IF misplaced THEN
+            EXECUTE format('CREATE TABLE public.%I (LIKE public.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                           part, p_table);
+            EXECUTE format('WITH moved AS (DELETE FROM public.%I WHERE %I >= %L AND %I < %L RETURNING *) '
+                           'INSERT INTO public.%I SELECT * FROM moved',
+                           default_part, part_col, lo, part_col, hi, part);
+            EXECUTE format('ALTER TABLE public.%I ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                           p_table, part, lo, hi);
+        ELSE
+            EXECUTE format('CREATE TABLE public.%I PARTITION OF public.%I FOR VALUES FROM (%L) TO (%L)',
+                           part, p_table, lo, hi);
+        END IF;
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- Catch-all for rows outside the created months (emptied by ensure_partitions)
+CREATE TABLE public.tickets_default PARTITION OF public.tickets DEFAULT;
+CREATE TABLE public.predictions_default PARTITION OF public.predictions DEFAULT;
+CREATE TABLE public.events_default PARTITION OF public.events DEFAULT;
+
+-- Last 12 months (synthetic data is back-dated) + the next 3
+SELECT public.ensure_partitions(t, (CURRENT_DATE - INTERVAL '12 months')::date, 16)
+FROM unnest(ARRAY['tickets', 'predictions', 'events']) AS t;
+
 -- ===============================
 -- Helpful Indexes
 -- ===============================
 CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON public.tickets(created_at);
 CREATE INDEX IF NOT EXISTS idx_tickets_student_id ON public.tickets(student_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_deferred ON public.tickets(created_at) WHERE status = 'DEFERRED';
 CREATE INDEX IF NOT EXISTS idx_predictions_ticket_id ON public.predictions(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_processed_at ON public.predictions(processed_at);
 CREATE INDEX IF NOT EXISTS idx_events_created_at ON public.events(created_at);
\ No newline at end of file
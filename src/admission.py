@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Tuple
+
+
+def parse_priority_limits(spec: str) -> Dict[str, int]:
+    """
+    "High=0,Medium=500,Low=200" -> {"High": 0, "Medium": 500, "Low": 200}
+    0 (or a missing priority) means unlimited.
+    """
+    limits = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/second, up to `burst` tokens banked.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Take one token. Returns 0.0 if allowed, else seconds until a token is available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Admission control for /submit:
+    - per-student token bucket rate limiting
+    - per-priority queue depth limits (load shedding)
+    Tracks shed counts so /metrics can report them.
+    """
+
+    def __init__(
+        self,
+        queue_limits: Dict[str, int],
+        student_rate: float = 0.0,
+        student_burst: float = 5.0,
+        max_students: int = 10_000,
+    ):
+        self.queue_limits = queue_limits
+        self.student_rate = student_rate
+        self.student_burst = student_burst
+        self.max_students = max_students
+
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._avg_service_s = 1.0
+        self.shed: Counter = Counter()
+        self.deferred: Counter = Counter()
+
+    # ---------- rate limiting ----------
+    def check_rate(self, student_id: str) -> float:
+        """
+        Returns 0.0 if the student may submit, else a Retry-After in seconds.
+        """
+        if self.student_rate <= 0:
+            return 0.0
+
+        with self._lock:
+            bucket = self._buckets.get(student_id)
+            if bucket is None:
+                bucket = TokenBucket(self.student_rate, self.student_burst)
+                self._buckets[student_id] = bucket
+                # Bounded memory: drop the least recently seen student
+                if len(self._buckets) > self.max_students:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(student_id)
+
+            return bucket.take()
+
+    # ---------- queue depth ----------
+    def check_depth(self, priority: str, depth: int) -> Tuple[bool, float]:
+        """
+        (admit, retry_after_seconds) for a ticket of `priority` given the current
+        number of queued tickets of that priority.
+        """
+        limit = self.queue_limits.get(priority, 0)
+        if limit <= 0 or depth < limit:
+            return True, 0.0
+
+        with self._lock:
+            retry_after = (depth - limit + 1) * self._avg_service_s
+        return False, max(1.0, retry_after)
+
+    def record_shed(self, reason: str, priority: str) -> None:
+        with self._lock:
+            self.shed[(reason, priority)] += 1
+
+    def record_deferred(self, priority: str) -> None:
+        with self._lock:
+            self.deferred[priority] += 1
+
+    def record_service_time(self, seconds: float, alpha: float = 0.2) -> None:
+        """
+        EWMA of worker time per job; used to size Retry-After.
+        """
+        with self._lock:
+            self._avg_service_s = (1 - alpha) * self._avg_service_s + alpha * seconds
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            shed: Dict[str, Dict[str, int]] = {}
+            for (reason, key), count in self.shed.items():
+                shed.setdefault(reason, {})[key] = count
+            return {
+                "queue_limits": dict(self.queue_limits),
+                "student_rate_per_s": self.student_rate,
+                "shed": shed,
+                "shed_total": int(sum(self.shed.values())),
+                "deferred": dict(self.deferred),
+                "avg_service_seconds": round(self._avg_service_s, 4),
+            }
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(int(math.ceil(seconds)))
@@ -0,0 +1,181 @@
+"""
+Partition maintenance for the range-partitioned Postgres tables (see db_init.sql).
+
+- ensure_partitions(): create the monthly partitions for the coming months.
+- archive_partitions(): export months older than ARCHIVE_AFTER_MONTHS to
+  outputs/archive/<table>/<partition>.csv.gz, then detach (and optionally drop) them.
+  Archiving a month also frees its ticket_keys / prediction_keys rows.
+
+Run:
+    python -m src.archival                 # ensure + archive (detach only)
+    python -m src.archival --drop          # also drop archived partitions
+    python -m src.archival --dry-run       # list what would be archived
+"""
+
+import argparse
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from src.config import ARCHIVE_AFTER_MONTHS, ARCHIVE_DIR, DB_BACKEND, PARTITION_MONTHS_AHEAD
+from src.db import get_cursor
+
+
+PARTITIONED_TABLES = ("tickets", "predictions", "events")
+
+
+def _add_months(d: date, months: int) -> date:
+    idx = d.year * 12 + (d.month - 1) + months
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def _skip_sqlite() -> bool:
+    if DB_BACKEND == "sqlite":
+        print("[Archival] DB_BACKEND=sqlite has no partitions; nothing to do.")
+        return True
+    return False
+
+
+def ensure_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> Dict[str, int]:
+    """
+    Create any missing monthly partitions from the current month through `months_ahead`.
+    Returns the number of partitions created per table.
+    """
+    if _skip_sqlite():
+        return {}
+
+    created = {}
+    with get_cursor() as cur:
+        for table in PARTITIONED_TABLES:
+            cur.execute(
+                "SELECT public.ensure_partitions(%s, date_trunc('month', CURRENT_DATE)::date, %s) AS created;",
+                (table, months_ahead + 1),
+            )
+            created[table] = cur.fetchone()["created"]
+    print(f"[OK] Partitions ensured ({months_ahead} months ahead): {created}")
+    return created
+
+
+def list_partitions(table: str) -> List[Tuple[str, date]]:
+    """
+    Monthly partitions of `table` as (name, first day of month), oldest first.
+    The DEFAULT partition is never listed.
+    """
+    pattern = re.compile(rf"^{table}_p(\d{{4}})_(\d{{2}})$")
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = p.relnamespace
+            WHERE n.nspname = 'public' AND p.relname = %s;
+            """,
+            (table,),
+        )
+        names = [r["relname"] for r in cur.fetchall()]
+
+    parts = []
+    for name in names:
+        m = pattern.match(name)
+        if m:
+            parts.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(parts, key=lambda p: p[1])
+
+
+def _export_partition(cur, table: str, partition: str) -> str:
+    out_dir = os.path.join(ARCHIVE_DIR, table)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{partition}.csv.gz")
+    tmp = path + ".tmp"
+
+    # COPY streams rows straight into the gzip file (no full partition in memory)
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        cur.copy_expert(f'COPY (SELECT * FROM public."{partition}") TO STDOUT WITH (FORMAT csv, HEADER)', f)
+    os.replace(tmp, path)
+    return path
+
+
+def _prune_keys(cur, table: str, month: date) -> None:
+    """
+    Delete the uniqueness keys (see db_init.sql) of an archived month.
+    A ticket key whose prediction is still live is kept: deleting it would
+    cascade into that prediction's key. It goes once the prediction's month
+    is archived (tickets are archived before predictions).
+    """
+    end = _add_months(month, 1)
+    unreferenced = "NOT EXISTS (SELECT 1 FROM public.prediction_keys p WHERE p.ticket_id = k.ticket_id)"
+    if table == "tickets":
+        cur.execute(
+            f"DELETE FROM public.ticket_keys k WHERE k.created_at >= %s AND k.created_at < %s AND {unreferenced};",
+            (month, end),
+        )
+    elif table == "predictions":
+        cur.execute(
+            "DELETE FROM public.prediction_keys WHERE processed_at >= %s AND processed_at < %s;",
+            (month, end),
+        )
+        # Ticket keys held back for these predictions (their tickets are already archived)
+        cur.execute(f"DELETE FROM public.ticket_keys k WHERE k.created_at < %s AND {unreferenced};", (end,))
+
+
+def archive_partitions(older_than_months: int = ARCHIVE_AFTER_MONTHS, drop: bool = False,
+                       dry_run: bool = False) -> List[Dict[str, Any]]:
+    """
+    Export + detach every monthly partition that ends before the cutoff
+    (first day of the month `older_than_months` ago).
+    Each partition is exported, detached and has its key rows pruned in its
+    own transaction.
+    """
+    if _skip_sqlite():
+        return []
+
+    cutoff = _add_months(datetime.now(timezone.utc).date().replace(day=1), -older_than_months)
+    archived = []
+
+    for table in PARTITIONED_TABLES:
+        for partition, month in list_partitions(table):
+            if _add_months(month, 1) > cutoff:
+                continue
+            if dry_run:
+                archived.append({"table": table, "partition": partition, "path": None})
+                continue
+
+            with get_cursor() as cur:
+                path = _export_partition(cur, table, partition)
+                cur.execute(f'ALTER TABLE public.{table} DETACH PARTITION public."{partition}";')
+                _prune_keys(cur, table, month)
+                if drop:
+                    cur.execute(f'DROP TABLE public."{partition}";')
+
+            archived.append({"table": table, "partition": partition, "path": path, "dropped": drop})
+            print(f"[OK] Archived {partition} -> {path}{' (dropped)' if drop else ' (detached)'}")
+
+    if not archived:
+        print(f"[Archival] Nothing older than {cutoff} to archive.")
+    return archived
+
+
+def run_maintenance(older_than_months: int = ARCHIVE_AFTER_MONTHS, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                    drop: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    created = ensure_partitions(months_ahead=months_ahead) if not dry_run else {}
+    archived = archive_partitions(older_than_months=older_than_months, drop=drop, dry_run=dry_run)
+    return {"created": created, "archived": archived}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming partitions and archive old ones")
+    parser.add_argument("--older-than-months", type=int, default=ARCHIVE_AFTER_MONTHS)
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--drop", action="store_true", help="Drop partitions after export (default: detach only)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list partitions that would be archived")
+    args = parser.parse_args()
+    run_maintenance(
+        older_than_months=args.older_than_months,
+        months_ahead=args.months_ahead,
+        drop=args.drop,
+        dry_run=args.dry_run,
+    )
@@ -0,0 +1,94 @@
+"""
+Columnar output layer: day-partitioned, compressed Parquet datasets under outputs/parquet/.
+
+Each run appends new files (part-<run_id>-N.parquet) instead of overwriting, and
+readers can select columns and a day range so only the needed partitions are read.
+
+    from src.artifacts import read_dataset
+    df = read_dataset(PREDICTIONS_DATASET, columns=["pred_category", "confidence"], start_day="2026-01-01")
+"""
+
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Optional
+
+from src.config import OUTPUT_FORMAT, PARQUET_COMPRESSION
+
+# pandas/pyarrow are imported inside the functions: this module is on the API
+# import path (via src.inference_service) and must not add to cold start.
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def writes_csv() -> bool:
+    return OUTPUT_FORMAT in ("csv", "both")
+
+
+def writes_parquet() -> bool:
+    return OUTPUT_FORMAT in ("parquet", "both")
+
+
+def new_run_id() -> str:
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:6]}"
+
+
+def _day_partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+
+def write_dataset(df: "pd.DataFrame", path: str, run_id: str) -> str:
+    """
+    Append `df` to the dataset at `path`, partitioned by its string `day` column.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if df.empty:
+        return path
+    if "day" not in df.columns:
+        raise ValueError("write_dataset expects a 'day' partition column")
+
+    os.makedirs(path, exist_ok=True)
+    table = pa.Table.from_pandas(df.assign(day=df["day"].astype(str)), preserve_index=False)
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=_day_partitioning(),
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression=PARQUET_COMPRESSION),
+    )
+    return path
+
+
+def read_dataset(
+    path: str,
+    columns: Optional[List[str]] = None,
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+) -> "pd.DataFrame":
+    """
+    Read selected columns for days in [start_day, end_day] (inclusive, "YYYY-MM-DD").
+    Partition pruning means other days' files are never opened.
+    """
+    import pandas as pd
+    import pyarrow.dataset as ds
+
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns or [])
+
+    dataset = ds.dataset(path, format="parquet", partitioning=_day_partitioning())
+
+    expr = None
+    if start_day is not None:
+        expr = ds.field("day") >= start_day
+    if end_day is not None:
+        cond = ds.field("day") <= end_day
+        expr = cond if expr is None else expr & cond
+
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
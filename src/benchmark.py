@@ -0,0 +1,243 @@
+"""
+Performance benchmarks for the pipeline stages.
+
+Examples:
+    python -m src.benchmark --scales 500,2000,8000 --out outputs/benchmarks/baseline.json
+    python -m src.benchmark --compare outputs/benchmarks/baseline.json --threshold 0.25
+    python -m src.benchmark --db   # also time DB helper round-trips (its 'bench-*' rows are deleted afterwards)
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from src import db
+from src.config import OUTPUT_DIR
+from src.data_generation import generate_tickets
+from src.train_model import fit_models
+from src.monitoring import join_predictions, summarize_predictions
+from src import inference_service
+
+
+BENCH_DIR = os.path.join(OUTPUT_DIR, "benchmarks")
+
+
+def _best_of(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """
+    Run fn `repeat` times, return (best wall-clock seconds, last result).
+    """
+    best = float("inf")
+    result = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    idx = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def _record(results: Dict[str, Dict[str, Any]], key: str, value: float, unit: str, better: str = "lower") -> None:
+    results[key] = {"value": float(value), "unit": unit, "better": better}
+    print(f"  {key:<40} {value:>12.4f} {unit}")
+
+
+# --------------------------------------------------
+# Stages
+# --------------------------------------------------
+
+def bench_training(results, scales: List[int], seed: int, repeat: int):
+    print("[Bench] train_models (fit_models) vs corpus size")
+    models = None
+    for n in scales:
+        df = pd.DataFrame(generate_tickets(n_samples=n, seed=seed))
+        seconds, models = _best_of(lambda: fit_models(df, test_size=0.2, seed=seed), repeat)
+        _record(results, f"train_models.seconds@{n}", seconds, "s")
+    # Keep the largest-scale models for the inference stages
+    return models[0], models[1]
+
+
+def bench_inference(results, scales: List[int], seed: int, repeat: int, single_calls: int):
+    print("[Bench] predict_text latency / batch throughput")
+    texts = [t["text"] for t in generate_tickets(n_samples=single_calls, seed=seed + 1)]
+
+    # Warm-up call (first call pays lazy allocations)
+    inference_service.predict_text(texts[0])
+
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        inference_service.predict_text(text)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+
+    _record(results, "predict_text.p50_ms", statistics.median(latencies), "ms")
+    _record(results, "predict_text.p95_ms", _percentile(latencies, 0.95), "ms")
+
+    for n in scales:
+        batch = [t["text"] for t in generate_tickets(n_samples=n, seed=seed + 2)]
+        seconds, _ = _best_of(lambda: inference_service.predict_texts(batch), repeat)
+        _record(results, f"predict_texts.items_per_s@{n}", n / seconds, "items/s", better="higher")
+
+
+def bench_monitoring(results, scales: List[int], seed: int, repeat: int):
+    print("[Bench] monitoring summary vs table size")
+    for n in scales:
+        tickets = pd.DataFrame(generate_tickets(n_samples=n, seed=seed + 3))
+        preds = pd.DataFrame(inference_service.predict_texts(tickets["text"].tolist()))
+        preds["ticket_id"] = tickets["ticket_id"]
+        preds["processed_at"] = datetime.now(timezone.utc)
+
+        def _run():
+            return summarize_predictions(join_predictions(tickets, preds))
+
+        seconds, _ = _best_of(_run, repeat)
+        _record(results, f"compute_monitoring.seconds@{n}", seconds, "s")
+
+
+def bench_db(results, round_trips: int):
+    """
+    DB helper round-trips against the configured database.
+    Rows are written under a one-off student_id 'bench-<hex>' with ticket ids
+    prefixed 'bench-', and deleted again at the end (even if a call fails).
+    """
+    print("[Bench] DB helper round-trips")
+    timings: Dict[str, List[float]] = {
+        "insert_incoming_ticket": [],
+        "update_ticket_status": [],
+        "insert_prediction": [],
+        "fetch_tickets_by_student": [],
+    }
+
+    def _timed(name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        timings[name].append((time.perf_counter() - start) * 1000.0)
+
+    student_id = f"bench-{uuid.uuid4().hex[:8]}"
+    ticket_ids = []
+    try:
+        for _ in range(round_trips):
+            ticket_id = f"bench-{uuid.uuid4().hex[:12]}"
+            ticket_ids.append(ticket_id)
+            now = datetime.now(timezone.utc)
+            _timed("insert_incoming_ticket", db.insert_incoming_ticket, ticket_id, "benchmark ticket", now, student_id, "Low")
+            _timed("update_ticket_status", db.update_ticket_status, ticket_id, "PROCESSING")
+            _timed("insert_prediction", db.insert_prediction, ticket_id, "General", "Low", 0.5)
+            _timed("fetch_tickets_by_student", db.fetch_tickets_by_student, student_id)
+    finally:
+        deleted = db.delete_tickets(ticket_ids)
+        print(f"[Bench] Removed {deleted} benchmark tickets")
+
+    for name, values in timings.items():
+        _record(results, f"db.{name}.p50_ms", statistics.median(values), "ms")
+
+
+# --------------------------------------------------
+# Run / compare
+# --------------------------------------------------
+
+def run_benchmarks(scales: List[int], seed: int = 42, repeat: int = 3, single_calls: int = 200,
+                   with_db: bool = False, db_round_trips: int = 50) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+
+    category_model, priority_model = bench_training(results, scales, seed, repeat)
+    inference_service.use_models(category_model, priority_model)
+
+    bench_inference(results, scales, seed, repeat, single_calls)
+    bench_monitoring(results, scales, seed, repeat)
+
+    if with_db:
+        bench_db(results, db_round_trips)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scales": scales,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Return a list of human-readable regressions (empty list = pass).
+    A stage regresses if it is worse than baseline by more than `threshold` (fraction).
+    """
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        cur = current["results"].get(key)
+        if cur is None or base["value"] <= 0:
+            continue
+
+        if base.get("better", "lower") == "lower":
+            change = cur["value"] / base["value"] - 1.0
+        else:
+            change = base["value"] / cur["value"] - 1.0 if cur["value"] > 0 else float("inf")
+
+        status = "REGRESSION" if change > threshold else "ok"
+        print(f"  {key:<40} {base['value']:>12.4f} -> {cur['value']:>12.4f} {cur['unit']:<8} ({change:+.1%}) {status}")
+        if change > threshold:
+            regressions.append(f"{key}: {change:+.1%} (threshold {threshold:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages")
+    parser.add_argument("--scales", default="500,2000,8000", help="Comma-separated corpus sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N for wall-clock stages")
+    parser.add_argument("--single-calls", type=int, default=200, help="predict_text calls for latency percentiles")
+    parser.add_argument("--db", action="store_true", help="Also time DB helper round-trips")
+    parser.add_argument("--db-round-trips", type=int, default=50)
+    parser.add_argument("--out", default=None, help="Results JSON path (default: outputs/benchmarks/bench-<ts>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown fraction before failing")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    report = run_benchmarks(
+        scales,
+        seed=args.seed,
+        repeat=args.repeat,
+        single_calls=args.single_calls,
+        with_db=args.db,
+        db_round_trips=args.db_round_trips,
+    )
+
+    out_path = args.out or os.path.join(BENCH_DIR, f"bench-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Benchmark results -> {out_path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"[Bench] Comparing against {args.compare}")
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print("[FAIL] Performance regressions:")
+            for r in regressions:
+                print(f"  - {r}")
+            return 1
+        print("[OK] No regressions beyond threshold")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
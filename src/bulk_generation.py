@@ -0,0 +1,405 @@
+"""
+Large-scale synthetic ticket generator (capacity tests, benchmarks).
+
+Same text model as src.data_generation (TEMPLATES + SHARED_PHRASES + DEADLINE_CONTEXT,
+priority from assign_priority, label noise), but:
+- vectorized: every distinct text is built once; tickets are NumPy index samples into that table
+- parallel: the dataset is split into fixed-size shards, each with its own SeedSequence child,
+  so the output only depends on (seed, n, shard_size), not on the number of workers
+- streamed: each shard writes chunk by chunk to Parquet / CSV files or bulk-loads into the DB
+- configurable category / priority / weekday mix and drift injection from a given day
+
+Run:
+    python -m src.bulk_generation --n 10000000 --workers 8 --out parquet
+    python -m src.bulk_generation --n 200000 --out db --drift-from-day 20 --drift-category-weights Fees=5
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.config import CATEGORIES, DB_BACKEND, OUTPUT_DIR, PRIORITIES
+from src.data_generation import CONFUSION_MAP, DEADLINE_CONTEXT, SHARED_PHRASES, TEMPLATES, assign_priority
+
+
+# Unseen vocabulary for drift injection (no urgency cues, so priorities stay comparable)
+DRIFT_PHRASES = [
+    "The new student app keeps crashing.",
+    "The campus wifi captive page loops forever.",
+    "My library locker booking disappeared.",
+]
+
+US_PER_DAY = 86_400 * 1_000_000
+
+
+def parse_weights(spec: Optional[str], labels: List[str]) -> Optional[np.ndarray]:
+    """
+    "IT=2,Fees=1" -> normalized weights over `labels` (unlisted labels get 0).
+    None / "" -> None (use the default mix).
+    """
+    if not spec:
+        return None
+    weights = dict.fromkeys(labels, 0.0)
+    for part in spec.split(","):
+        name, value = part.split("=")
+        if name.strip() not in weights:
+            raise ValueError(f"Unknown label '{name.strip()}' (expected one of {labels})")
+        weights[name.strip()] = float(value)
+    w = np.array([weights[l] for l in labels])
+    if w.sum() <= 0:
+        raise ValueError(f"Weights '{spec}' sum to zero")
+    return w / w.sum()
+
+
+def make_spec(
+    days: int = 30,
+    start: Optional[str] = None,
+    category_weights: Optional[str] = None,
+    priority_weights: Optional[str] = None,
+    day_weights: Optional[str] = None,
+    shared_rate: float = 0.7,
+    deadline_rate: float = 0.35,
+    mislabel_rate: float = 0.08,
+    drift_from_day: Optional[int] = None,
+    drift_category_weights: Optional[str] = None,
+    drift_deadline_rate: Optional[float] = None,
+    drift_phrase_rate: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Generation settings as a plain dict (picklable for the worker processes).
+    day_weights: 7 values (Mon..Sun pattern) or one value per day.
+    priority_weights overrides the phrase rates: texts are drawn to hit that priority mix.
+    Tickets on/after `drift_from_day` use the drift_* settings.
+    """
+    start_day = date.fromisoformat(start) if start else datetime.now(timezone.utc).date() - timedelta(days=days)
+
+    w_days = np.ones(days)
+    if day_weights:
+        values = np.array([float(v) for v in day_weights.split(",")])
+        if values.size == 7:
+            w_days = values[[(start_day + timedelta(days=d)).weekday() for d in range(days)]]
+        elif values.size == days:
+            w_days = values
+        else:
+            raise ValueError(f"--day-weights needs 7 (weekday) or {days} values, got {values.size}")
+
+    return {
+        "days": days,
+        "start_day": start_day.isoformat(),
+        "day_weights": w_days / w_days.sum(),
+        "category_weights": parse_weights(category_weights, CATEGORIES),
+        "priority_weights": parse_weights(priority_weights, PRIORITIES),
+        "shared_rate": shared_rate,
+        "deadline_rate": deadline_rate,
+        "mislabel_rate": mislabel_rate,
+        "drift_from_day": drift_from_day,
+        "drift_category_weights": parse_weights(drift_category_weights, CATEGORIES),
+        "drift_deadline_rate": drift_deadline_rate,
+        "drift_phrase_rate": drift_phrase_rate,
+    }
+
+
+# --------------------------------------------------
+# Text table: every (category, template, shared, deadline, drift phrase) combination
+# --------------------------------------------------
+
+_TABLES = None
+
+
+def _text_tables():
+    """
+    texts[c, t, s, d, x] and priority codes for all combinations (index 0 of the
+    s / d / x axes means "no phrase"). Built once per process: a few thousand strings.
+    """
+    global _TABLES
+    if _TABLES is None:
+        n_tpl = max(len(TEMPLATES[c]) for c in CATEGORIES)
+        shape = (len(CATEGORIES), n_tpl, len(SHARED_PHRASES) + 1, len(DEADLINE_CONTEXT) + 1, len(DRIFT_PHRASES) + 1)
+        texts = np.empty(shape, dtype=object)
+        priorities = np.full(shape, -1, dtype=np.int8)
+
+        for c, cat in enumerate(CATEGORIES):
+            for t, template in enumerate(TEMPLATES[cat]):
+                for s, shared in enumerate([None] + SHARED_PHRASES):
+                    for d, deadline in enumerate([None] + DEADLINE_CONTEXT):
+                        for x, drift in enumerate([None] + DRIFT_PHRASES):
+                            text = " ".join(p for p in (template, shared, deadline, drift) if p)
+                            texts[c, t, s, d, x] = text
+                            priorities[c, t, s, d, x] = PRIORITIES.index(assign_priority(text))
+
+        n_templates = np.array([len(TEMPLATES[c]) for c in CATEGORIES])
+        _TABLES = (texts, priorities, n_templates)
+    return _TABLES
+
+
+def _sample_optional(rng: np.random.Generator, n: int, n_choices: int, rate) -> np.ndarray:
+    """
+    0 with probability 1 - rate, else uniform in 1..n_choices (rate may be per row).
+    """
+    picked = rng.random(n) < rate
+    return np.where(picked, rng.integers(1, n_choices + 1, size=n), 0)
+
+
+def generate_chunk(rng: np.random.Generator, n: int, spec: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    n tickets as column arrays (ticket_id, text, true_category, true_priority, created_at).
+    """
+    texts, priorities, n_templates = _text_tables()
+    n_cats = len(CATEGORIES)
+
+    # Days (and the drift mask) first: later choices depend on them
+    day = rng.choice(spec["days"], size=n, p=spec["day_weights"])
+    drifted = np.zeros(n, dtype=bool)
+    if spec["drift_from_day"] is not None:
+        drifted = day >= spec["drift_from_day"]
+
+    cat = rng.choice(n_cats, size=n, p=spec["category_weights"])
+    if spec["drift_category_weights"] is not None and drifted.any():
+        cat[drifted] = rng.choice(n_cats, size=int(drifted.sum()), p=spec["drift_category_weights"])
+
+    deadline_rate = np.full(n, spec["deadline_rate"])
+    if spec["drift_deadline_rate"] is not None:
+        deadline_rate[drifted] = spec["drift_deadline_rate"]
+
+    tpl = (rng.random(n) * n_templates[cat]).astype(np.int64)
+    shared = _sample_optional(rng, n, len(SHARED_PHRASES), spec["shared_rate"])
+    deadline = _sample_optional(rng, n, len(DEADLINE_CONTEXT), deadline_rate)
+    drift_phrase = _sample_optional(rng, n, len(DRIFT_PHRASES), np.where(drifted, spec["drift_phrase_rate"], 0.0))
+
+    if spec["priority_weights"] is not None:
+        # Target priority mix: draw the priority, then a uniform phrase combination with that priority
+        target = rng.choice(len(PRIORITIES), size=n, p=spec["priority_weights"])
+        for c in range(n_cats):
+            for p in range(len(PRIORITIES)):
+                rows = np.flatnonzero((cat == c) & (target == p))
+                if rows.size == 0:
+                    continue
+                combos = np.argwhere(priorities[c, :n_templates[c], :, :, 0] == p)
+                if combos.size == 0:
+                    raise ValueError(f"No {PRIORITIES[p]} text combination for category {CATEGORIES[c]}")
+                chosen = combos[rng.integers(0, len(combos), size=rows.size)]
+                tpl[rows], shared[rows], deadline[rows] = chosen[:, 0], chosen[:, 1], chosen[:, 2]
+
+    text = texts[cat, tpl, shared, deadline, drift_phrase]
+    priority = priorities[cat, tpl, shared, deadline, drift_phrase]
+
+    # Label noise into a nearby category
+    confusion = np.array([[CATEGORIES.index(x) for x in CONFUSION_MAP[c]] for c in CATEGORIES])
+    mislabel = rng.random(n) < spec["mislabel_rate"]
+    stored_cat = np.where(mislabel, confusion[cat, rng.integers(0, confusion.shape[1], size=n)], cat)
+
+    start = np.datetime64(spec["start_day"], "us")
+    created_at = start + (day * US_PER_DAY + rng.integers(0, US_PER_DAY, size=n)).astype("timedelta64[us]")
+
+    return {
+        "ticket_id": np.char.mod("%016x", rng.integers(0, np.iinfo(np.int64).max, size=n)),
+        "text": text,
+        "true_category": np.array(CATEGORIES, dtype=object)[stored_cat],
+        "true_priority": np.array(PRIORITIES, dtype=object)[priority],
+        "created_at": created_at,
+    }
+
+
+# --------------------------------------------------
+# Sinks (one per shard, written chunk by chunk)
+# --------------------------------------------------
+
+def _iso_utc(created_at: np.ndarray) -> np.ndarray:
+    # Same text form as the DB adapters (isoformat with +00:00)
+    return np.char.add(np.datetime_as_string(created_at, unit="us"), "+00:00")
+
+
+class _ParquetSink:
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path = path
+        self.schema = pa.schema([
+            ("ticket_id", pa.string()),
+            ("text", pa.string()),
+            ("true_category", pa.string()),
+            ("true_priority", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, chunk: Dict[str, np.ndarray]) -> None:
+        arrays = [self._pa.array(chunk[field.name], type=field.type) for field in self.schema]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _CSVSink:
+    def __init__(self, path: str):
+        import csv
+        import gzip
+
+        self.path = path
+        self._f = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(["ticket_id", "text", "true_category", "true_priority", "created_at"])
+
+    def write(self, chunk: Dict[str, np.ndarray]) -> None:
+        self._w.writerows(zip(chunk["ticket_id"], chunk["text"], chunk["true_category"],
+                              chunk["true_priority"], _iso_utc(chunk["created_at"])))
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _DBSink:
+    def __init__(self):
+        from src.db import bulk_insert_tickets
+
+        self.path = None
+        self._insert = bulk_insert_tickets
+
+    def write(self, chunk: Dict[str, np.ndarray]) -> None:
+        self._insert(zip(chunk["ticket_id"].tolist(), chunk["text"].tolist(), chunk["true_category"].tolist(),
+                         chunk["true_priority"].tolist(), _iso_utc(chunk["created_at"]).tolist()))
+
+    def close(self) -> None:
+        pass
+
+
+def _open_sink(out: str, out_dir: str, shard: int):
+    if out == "parquet":
+        return _ParquetSink(os.path.join(out_dir, f"part-{shard:05d}.parquet"))
+    if out == "csv":
+        return _CSVSink(os.path.join(out_dir, f"part-{shard:05d}.csv.gz"))
+    if out == "db":
+        return _DBSink()
+    raise ValueError(f"Unknown output '{out}' (expected parquet, csv or db)")
+
+
+def _run_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate and write one shard. Top-level so it can run in a worker process.
+    """
+    rng = np.random.default_rng(task["seed_seq"])
+    sink = _open_sink(task["out"], task["out_dir"], task["shard"])
+    remaining = task["n"]
+    try:
+        while remaining > 0:
+            n = min(task["chunk_size"], remaining)
+            sink.write(generate_chunk(rng, n, task["spec"]))
+            remaining -= n
+    finally:
+        sink.close()
+    return {"shard": task["shard"], "rows": task["n"], "path": sink.path}
+
+
+def generate_dataset(
+    n: int,
+    seed: int = 7,
+    out: str = "parquet",
+    out_dir: Optional[str] = None,
+    workers: int = 1,
+    shard_size: int = 250_000,
+    chunk_size: int = 50_000,
+    spec: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Generate `n` tickets across ceil(n / shard_size) shards (deterministic per seed).
+    out="parquet"/"csv" writes one file per shard under out_dir; out="db" bulk-loads public.tickets.
+    """
+    spec = spec or make_spec()
+    out_dir = out_dir or os.path.join(OUTPUT_DIR, "generated", f"tickets_n{n}_seed{seed}")
+    if out != "db":
+        os.makedirs(out_dir, exist_ok=True)
+    if out == "db" and DB_BACKEND == "sqlite" and workers > 1:
+        # The SQLite backend is a single in-process connection
+        print("[Generate] DB_BACKEND=sqlite: loading shards in-process (workers=1)")
+        workers = 1
+
+    n_shards = max(math.ceil(n / shard_size), 1)
+    children = np.random.SeedSequence(seed).spawn(n_shards)
+    tasks = [
+        {
+            "shard": i,
+            "n": min(shard_size, n - i * shard_size),
+            "seed_seq": children[i],
+            "spec": spec,
+            "out": out,
+            "out_dir": out_dir,
+            "chunk_size": chunk_size,
+        }
+        for i in range(n_shards)
+    ]
+
+    t0 = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_run_shard, tasks))
+    else:
+        shards = [_run_shard(t) for t in tasks]
+    elapsed = time.perf_counter() - t0
+
+    summary = {
+        "rows": n,
+        "shards": n_shards,
+        "workers": workers,
+        "out": out,
+        "path": None if out == "db" else out_dir,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(n / elapsed, 1) if elapsed > 0 else None,
+    }
+    print(f"[OK] Generated {n} tickets in {n_shards} shards -> {summary['path'] or 'public.tickets'} "
+          f"({elapsed:.1f}s, {summary['rows_per_second']} rows/s)")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized, parallel synthetic ticket generator")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", choices=["parquet", "csv", "db"], default="parquet")
+    parser.add_argument("--out-dir", default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=250_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--start", default=None, help="First day YYYY-MM-DD (default: today - days)")
+    parser.add_argument("--category-weights", default=None, help="e.g. IT=3,Fees=1,Timetable=1,Exams=1,General=1")
+    parser.add_argument("--priority-weights", default=None, help="e.g. High=0.2,Medium=0.3,Low=0.5")
+    parser.add_argument("--day-weights", default=None, help="7 weekday weights (Mon..Sun) or one per day")
+    parser.add_argument("--deadline-rate", type=float, default=0.35)
+    parser.add_argument("--mislabel-rate", type=float, default=0.08)
+    parser.add_argument("--drift-from-day", type=int, default=None, help="Day index where drift starts")
+    parser.add_argument("--drift-category-weights", default=None)
+    parser.add_argument("--drift-deadline-rate", type=float, default=None)
+    parser.add_argument("--drift-phrase-rate", type=float, default=0.0, help="Share of drifted tickets with new vocabulary")
+    args = parser.parse_args()
+
+    generate_dataset(
+        n=args.n,
+        seed=args.seed,
+        out=args.out,
+        out_dir=args.out_dir,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        chunk_size=args.chunk_size,
+        spec=make_spec(
+            days=args.days,
+            start=args.start,
+            category_weights=args.category_weights,
+            priority_weights=args.priority_weights,
+            day_weights=args.day_weights,
+            deadline_rate=args.deadline_rate,
+            mislabel_rate=args.mislabel_rate,
+            drift_from_day=args.drift_from_day,
+            drift_category_weights=args.drift_category_weights,
+            drift_deadline_rate=args.drift_deadline_rate,
+            drift_phrase_rate=args.drift_phrase_rate,
+        ),
+    )
@@ -18,6 +18,21 @@ DATABASE_URL = os.getenv(
     f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
 )
 
+# Read replicas: comma-separated DSNs for heavy read-only helpers (history, training,
+# monitoring). Empty = everything on the primary.
+DB_READ_URLS = os.getenv("DB_READ_URLS", "")
+# Default replica lag a read accepts (per-call max_staleness overrides; 0 = primary only)
+DB_READ_MAX_STALENESS_SECONDS = float(os.getenv("DB_READ_MAX_STALENESS_SECONDS", "30"))
+# /tickets wants fresher history (a student just submitted)
+TICKET_HISTORY_MAX_STALENESS_SECONDS = float(os.getenv("TICKET_HISTORY_MAX_STALENESS_SECONDS", "5"))
+# A failed replica is skipped for this long before being retried
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# Storage backend: "postgres" (default) or "sqlite" (in-process, for hermetic perf tests)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres").lower()
+# ":memory:" keeps the whole DB inside the process; a file path persists it
+SQLITE_PATH = os.getenv("SQLITE_PATH", ":memory:")
+
 # -------------------------
 # Outputs (artifacts)
 # -------------------------
@@ -32,12 +47,157 @@ CONFUSION_MATRIX_CSV_PATH = os.path.join(OUTPUT_DIR, "confusion_matrix.csv")
 HIGH_PRIORITY_PER_DAY_CSV_PATH = os.path.join(OUTPUT_DIR, "high_priority_per_day.csv")
 DRIFT_CSV_PATH = os.path.join(OUTPUT_DIR, "drift_confidence_over_time.csv")
 
+# Columnar outputs: "csv" (default: the legacy CSV files only), "parquet" or "both"
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "csv").lower()
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+PARQUET_DIR = os.path.join(OUTPUT_DIR, "parquet")
+PREDICTIONS_DATASET = os.path.join(PARQUET_DIR, "predictions")
+HIGH_PRIORITY_PER_DAY_DATASET = os.path.join(PARQUET_DIR, "high_priority_per_day")
+DRIFT_DATASET = os.path.join(PARQUET_DIR, "drift_confidence")
+DAILY_METRICS_DATASET = os.path.join(PARQUET_DIR, "daily_metrics")
+
 # -------------------------
 # Model / inference settings
 # -------------------------
 # If confidence is below this, we can flag it (optional improvement)
 LOW_CONFIDENCE_THRESHOLD = float(os.getenv("LOW_CONFIDENCE_THRESHOLD", "0.60"))
 
+# Load + warm the models in the API startup phase (before /ready reports ready); off = load on first use
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+
+# Cascade inference: answer easy tickets with keyword rules, escalate the rest to the models
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "false").lower() == "true"
+# Share of category cue hits that must agree for the rule tier to answer (1.0 = unambiguous only)
+CASCADE_RULE_THRESHOLD = float(os.getenv("CASCADE_RULE_THRESHOLD", "1.0"))
+# Fraction of rule answers re-checked by the full models (tier-1 agreement tracking)
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))
+
 # Categories required by assignment
 CATEGORIES = ["IT", "Fees", "Timetable", "Exams", "General"]
 PRIORITIES = ["Low", "Medium", "High"]
+
+# -------------------------
+# Profiling (admin only)
+# -------------------------
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_DEFAULT_INTERVAL = float(os.getenv("PROFILE_DEFAULT_INTERVAL", "0.01"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# -------------------------
+# Admission control (/submit)
+# -------------------------
+# Max queued tickets per requested priority, e.g. "High=0,Medium=500,Low=200" (0 = unlimited)
+ADMISSION_QUEUE_LIMITS = os.getenv("ADMISSION_QUEUE_LIMITS", "")
+# Token bucket per student_id (tickets/second, 0 disables) and burst size
+ADMISSION_STUDENT_RATE = float(os.getenv("ADMISSION_STUDENT_RATE", "0"))
+ADMISSION_STUDENT_BURST = float(os.getenv("ADMISSION_STUDENT_BURST", "5"))
+# What to do when a priority's queue is full: "reject" (429 + Retry-After) or "defer" (store as DEFERRED in DB only)
+ADMISSION_OVERLOAD_MODE = os.getenv("ADMISSION_OVERLOAD_MODE", "reject").lower()
+# How many DEFERRED tickets the worker pulls back into the queue when it goes idle
+DEFER_BACKFILL_BATCH = int(os.getenv("DEFER_BACKFILL_BATCH", "50"))
+
+# -------------------------
+# Worker queue scheduling
+# -------------------------
+# Per-class queue wait targets in seconds (earliest deadline first => aging)
+SCHEDULER_TARGETS = os.getenv("SCHEDULER_TARGETS", "High=30,Medium=300,Low=1800")
+# Promote tickets to High when the keyword pre-classifier flags them as urgent
+SCHEDULER_PROMOTE_HIGH = os.getenv("SCHEDULER_PROMOTE_HIGH", "false").lower() == "true"
+
+# -------------------------
+# Near-duplicate tickets (MinHash/LSH)
+# -------------------------
+# Reuse the prediction of a near-identical recent ticket in classify_ticket
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "false").lower() == "true"
+# Estimated Jaccard similarity (character 5-grams) to count as a duplicate
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# Only tickets seen within this window are matched; older entries are evicted
+DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "3600"))
+# Hard cap on indexed tickets (per index) to bound memory
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "20000"))
+
+# -------------------------
+# Shared model server (src/model_server.py)
+# -------------------------
+# Unix socket of the model server; empty = load models in-process (default)
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "")
+# Fall back to in-process models if the server is unreachable
+MODEL_SERVER_FALLBACK = os.getenv("MODEL_SERVER_FALLBACK", "true").lower() == "true"
+# Server-side batching: max texts per batch, and how long to wait for more requests
+MODEL_SERVER_MAX_BATCH = int(os.getenv("MODEL_SERVER_MAX_BATCH", "64"))
+MODEL_SERVER_BATCH_WAIT_MS = float(os.getenv("MODEL_SERVER_BATCH_WAIT_MS", "5"))
+
+# -------------------------
+# Orchestration (Dagster daily partitions)
+# -------------------------
+# First day of the daily partitions (ticket created_at days, UTC)
+PIPELINE_PARTITION_START = os.getenv("PIPELINE_PARTITION_START", "2026-01-01")
+
+# -------------------------
+# Partition maintenance / archival (Postgres)
+# -------------------------
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Monthly partitions entirely older than this are exported + detached
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "12"))
+ARCHIVE_DIR = os.path.join(OUTPUT_DIR, "archive")
+
+# -------------------------
+# Online drift monitor (sliding-window sketches vs training reference)
+# -------------------------
+DRIFT_ENABLED = os.getenv("DRIFT_ENABLED", "false").lower() == "true"
+DRIFT_REFERENCE_PATH = os.path.join(OUTPUT_DIR, "drift_reference.json")
+DRIFT_WINDOW_SECONDS = float(os.getenv("DRIFT_WINDOW_SECONDS", "900"))
+DRIFT_BUCKET_SECONDS = float(os.getenv("DRIFT_BUCKET_SECONDS", "60"))
+# No verdict until the window holds this many tickets
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "100"))
+# ...and no alerts while the reference is smaller than this (PSI on tiny samples is noise)
+DRIFT_MIN_REFERENCE_SAMPLES = int(os.getenv("DRIFT_MIN_REFERENCE_SAMPLES", "200"))
+# The reference is built from out-of-fold predictions over the whole training set
+DRIFT_REFERENCE_FOLDS = int(os.getenv("DRIFT_REFERENCE_FOLDS", "5"))
+# PSI > 0.2 is the usual "significant shift" rule of thumb
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+DRIFT_CHECK_EVERY = int(os.getenv("DRIFT_CHECK_EVERY", "25"))
+DRIFT_ALERT_COOLDOWN_SECONDS = float(os.getenv("DRIFT_ALERT_COOLDOWN_SECONDS", "900"))
+
+# -------------------------
+# Ingestion spool + DB circuit breaker
+# -------------------------
+# Spool /submit writes to a local WAL when the DB is slow/down and replay them later
+SPOOL_ENABLED = os.getenv("SPOOL_ENABLED", "false").lower() == "true"
+SPOOL_DIR = os.path.join(OUTPUT_DIR, "spool")
+SPOOL_FSYNC_INTERVAL_MS = float(os.getenv("SPOOL_FSYNC_INTERVAL_MS", "5"))
+SPOOL_REPLAY_BATCH = int(os.getenv("SPOOL_REPLAY_BATCH", "500"))
+SPOOL_REPLAY_INTERVAL = float(os.getenv("SPOOL_REPLAY_INTERVAL", "1.0"))
+# How often the replayer looks for logs left behind by dead processes
+SPOOL_ORPHAN_SCAN_SECONDS = float(os.getenv("SPOOL_ORPHAN_SCAN_SECONDS", "30"))
+# Records the DB rejects for good (constraint violations, bad data) are moved here
+SPOOL_DEAD_LETTER_PATH = os.path.join(SPOOL_DIR, "dead_letter.jsonl")
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+# Mean latency of recent DB writes above which the breaker opens
+BREAKER_LATENCY_MS = float(os.getenv("BREAKER_LATENCY_MS", "500"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "10"))
+# Fail fast instead of hanging on an unreachable Postgres
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
+# -------------------------
+# Per-student history cache (GET /tickets)
+# -------------------------
+HISTORY_CACHE_ENABLED = os.getenv("HISTORY_CACHE_ENABLED", "false").lower() == "true"
+HISTORY_CACHE_MAX_STUDENTS = int(os.getenv("HISTORY_CACHE_MAX_STUDENTS", "10000"))
+# Upper bound on staleness from writes made by other API processes (write-through is per process)
+HISTORY_CACHE_TTL_SECONDS = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "5"))
+
+# -------------------------
+# Event push (Postgres LISTEN/NOTIFY + SSE)
+# -------------------------
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "ticket_events")
+EVENT_STREAM_ENABLED = os.getenv("EVENT_STREAM_ENABLED", "false").lower() == "true"
+EVENT_LISTEN_RECONNECT_SECONDS = float(os.getenv("EVENT_LISTEN_RECONNECT_SECONDS", "2"))
+# Event ids are taken at INSERT, so a slow transaction can commit an id below ones
+# already delivered. Catch-up and SSE replay re-read this many ids behind the last one.
+EVENT_REORDER_WINDOW = int(os.getenv("EVENT_REORDER_WINDOW", "100"))
+# SSE keep-alive comment interval (keeps proxies from closing idle streams)
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Per-client buffer; a client that falls this far behind loses events (counted in /metrics)
+SSE_CLIENT_QUEUE_SIZE = int(os.getenv("SSE_CLIENT_QUEUE_SIZE", "1000"))
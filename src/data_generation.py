@@ -65,6 +65,15 @@ DEADLINE_CONTEXT = [
     "My class starts today.",
 ]
 
+# Nearby categories a human labeler confuses each category with
+CONFUSION_MAP = {
+    "IT": ["Fees", "Timetable"],
+    "Fees": ["IT", "General"],
+    "Timetable": ["IT", "General"],
+    "Exams": ["General", "Timetable"],
+    "General": ["IT", "Fees"],
+}
+
 
 def assign_priority(text: str) -> str:
     """
@@ -107,20 +116,18 @@ def maybe_mislabel_category(true_category: str, rng: random.Random) -> str:
     if rng.random() > 0.08:
         return true_category
 
-    confusion_map = {
-        "IT": ["Fees", "Timetable"],
-        "Fees": ["IT", "General"],
-        "Timetable": ["IT", "General"],
-        "Exams": ["General", "Timetable"],
-        "General": ["IT", "Fees"],
-    }
-    return rng.choice(confusion_map[true_category])
+    return rng.choice(CONFUSION_MAP[true_category])
 
 
-def generate_and_store_tickets(n_samples=300, seed=42):
+def generate_tickets(n_samples=300, seed=42):
+    """
+    Build synthetic tickets in memory (no DB writes).
+    Returns a list of dicts with the public.tickets columns.
+    """
     rng = random.Random(seed)
     base_time = datetime.now(timezone.utc) - timedelta(days=30)
 
+    tickets = []
     for _ in range(n_samples):
         true_category = rng.choice(CATEGORIES)
         text = rng.choice(TEMPLATES[true_category])
@@ -140,16 +147,23 @@ def generate_and_store_tickets(n_samples=300, seed=42):
             minutes=rng.randint(0, 59),
         )
 
-        ticket_id = str(uuid.uuid4())[:8]
-
-        insert_ticket(
-            ticket_id=ticket_id,
-            text=text,
-            true_category=stored_category,
-            true_priority=true_priority,
-            created_at=created_at
+        tickets.append(
+            {
+                "ticket_id": str(uuid.uuid4())[:8],
+                "text": text,
+                "true_category": stored_category,
+                "true_priority": true_priority,
+                "created_at": created_at,
+            }
         )
 
+    return tickets
+
+
+def generate_and_store_tickets(n_samples=300, seed=42):
+    for ticket in generate_tickets(n_samples=n_samples, seed=seed):
+        insert_ticket(**ticket)
+
     print(f"Inserted {n_samples} synthetic tickets into database.")
 
 
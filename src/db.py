@@ -1,8 +1,33 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor, Json
+import itertools
+import json
+import threading
+import time
 from contextlib import contextmanager
 
-from src.config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+from src.config import (
+    DB_BACKEND, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_CONNECT_TIMEOUT,
+    DB_READ_URLS, DB_READ_MAX_STALENESS_SECONDS, DB_REPLICA_RETRY_SECONDS, EVENTS_CHANNEL,
+)
+
+# psycopg2 is only required for the Postgres backend
+try:
+    import psycopg2
+    from psycopg2.extras import RealDictCursor, Json, execute_batch, execute_values
+except ImportError:  # pragma: no cover - DB_BACKEND=sqlite without psycopg2
+    psycopg2 = None
+
+if DB_BACKEND == "sqlite":
+    from src import sqlite_backend
+elif DB_BACKEND != "postgres":
+    raise ValueError(f"Unknown DB_BACKEND '{DB_BACKEND}' (expected 'postgres' or 'sqlite')")
+
+# Errors that mean the database is unreachable or overloaded (worth retrying
+# later), as opposed to a bad statement or row (constraint violation, NUL in text, ...)
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError) if psycopg2 is not None else ()
+if DB_BACKEND == "sqlite":
+    import sqlite3
+
+    TRANSIENT_ERRORS += (sqlite3.OperationalError,)  # e.g. "database is locked"
 
 
 # --------------------------------------------------
@@ -12,13 +37,20 @@ from src.config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
 def get_connection():
     """
     Create a new database connection.
+    (DB_BACKEND=sqlite returns the shared in-process connection.)
     """
+    if DB_BACKEND == "sqlite":
+        return sqlite_backend.get_connection()
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 is required for DB_BACKEND=postgres (pip install psycopg2-binary).")
+
     return psycopg2.connect(
         host=DB_HOST,
         port=DB_PORT,
         dbname=DB_NAME,
         user=DB_USER,
-        password=DB_PASSWORD
+        password=DB_PASSWORD,
+        connect_timeout=DB_CONNECT_TIMEOUT,
     )
 
 
@@ -28,6 +60,11 @@ def get_cursor():
     Context manager for DB cursor.
     Automatically commits and closes.
     """
+    if DB_BACKEND == "sqlite":
+        with sqlite_backend.get_cursor() as cursor:
+            yield cursor
+        return
+
     conn = get_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     try:
@@ -41,6 +78,132 @@ def get_cursor():
         conn.close()
 
 
+# --------------------------------------------------
+# Write hooks (e.g. the /tickets history cache)
+# --------------------------------------------------
+
+_WRITE_HOOKS = []
+
+
+def register_write_hook(fn):
+    """
+    fn(event, data) runs after a committed ticket write:
+    "ticket_inserted" {row}, "ticket_status" {ticket_id, status, resolved_at, note},
+    "tickets_bulk_inserted" {student_ids}; and, on SQLite only, "event_inserted" {message}.
+    """
+    _WRITE_HOOKS.append(fn)
+
+
+def _notify(event, **data):
+    for fn in _WRITE_HOOKS:
+        try:
+            fn(event, data)
+        except Exception as e:  # a cache must never fail a write
+            print(f"[DB] Write hook failed for {event}: {e}")
+
+
+# --------------------------------------------------
+# Read routing (replicas)
+# --------------------------------------------------
+
+# Ignored for DB_BACKEND=sqlite (single in-process database)
+READ_URLS = [u.strip() for u in DB_READ_URLS.split(",") if u.strip()] if DB_BACKEND == "postgres" else []
+READ_STATS = {"replica": 0, "primary": 0, "replica_errors": 0, "too_stale": 0}
+
+_replica_rr = itertools.count()
+_replica_down_until = {}   # url -> monotonic time until which it is skipped
+_replica_lag = {}          # url -> (checked_at, lag_seconds), guarded by _read_lock
+_LAG_CHECK_SECONDS = 5.0
+_read_lock = threading.Lock()
+
+
+def _replica_lag_seconds(url, cur):
+    """
+    Replication lag (time since the last replayed commit), cached for a few seconds.
+    A replica counts as caught up (0) only while its WAL receiver is running and
+    has replayed everything received, so an idle primary doesn't make it look
+    stale. A replica that lost its replication stream ages normally, and one that
+    never replayed a commit counts as infinitely stale.
+    """
+    with _read_lock:
+        checked_at, lag = _replica_lag.get(url, (0.0, None))
+    if lag is not None and time.monotonic() - checked_at < _LAG_CHECK_SECONDS:
+        return lag
+    cur.execute(
+        """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN EXISTS (SELECT 1 FROM pg_stat_wal_receiver)
+                 AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity'::float8)
+        END AS lag;
+        """
+    )
+    lag = float(cur.fetchone()["lag"])
+    with _read_lock:
+        _replica_lag[url] = (time.monotonic(), lag)
+    return lag
+
+
+def _read_replica(url, sql, params, max_staleness):
+    """
+    Run a read on one replica. Returns rows, or None if it lags more than max_staleness.
+    """
+    conn = psycopg2.connect(url, connect_timeout=DB_CONNECT_TIMEOUT)
+    try:
+        conn.set_session(readonly=True, autocommit=True)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        if _replica_lag_seconds(url, cursor) > max_staleness:
+            return None
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def read_all(sql, params=(), max_staleness=None):
+    """
+    Read-only query routed to a replica (round-robin over DB_READ_URLS) when one
+    is reachable and lags at most `max_staleness` seconds; otherwise the primary.
+    max_staleness=0 always reads the primary.
+    """
+    if max_staleness is None:
+        max_staleness = DB_READ_MAX_STALENESS_SECONDS
+
+    if READ_URLS and max_staleness > 0:
+        start = next(_replica_rr)
+        for i in range(len(READ_URLS)):
+            url = READ_URLS[(start + i) % len(READ_URLS)]
+            if _replica_down_until.get(url, 0.0) > time.monotonic():
+                continue
+            try:
+                rows = _read_replica(url, sql, params, max_staleness)
+            except psycopg2.Error as e:
+                with _read_lock:
+                    _replica_down_until[url] = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+                    READ_STATS["replica_errors"] += 1
+                print(f"[DB] Replica read failed, falling back: {e}")
+                continue
+            with _read_lock:
+                READ_STATS["replica" if rows is not None else "too_stale"] += 1
+            if rows is not None:
+                return rows
+
+    with _read_lock:
+        READ_STATS["primary"] += 1
+    with get_cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def read_stats():
+    return {
+        "replicas": len(READ_URLS),
+        "replicas_down": sum(1 for t in _replica_down_until.values() if t > time.monotonic()),
+        **READ_STATS,
+    }
+
+
 # --------------------------------------------------
 # Tickets
 # --------------------------------------------------
@@ -55,103 +218,404 @@ def insert_ticket(ticket_id, text, true_category, true_priority, created_at):
             INSERT INTO public.tickets
             (ticket_id, text, true_category, true_priority, created_at)
             VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (ticket_id) DO NOTHING;
+            ON CONFLICT DO NOTHING;
             """,
             (ticket_id, text, true_category, true_priority, created_at),
         )
 
 
-def insert_incoming_ticket(ticket_id, text, created_at, student_id="Anonymous", priority="Low"):
+def bulk_insert_tickets(rows):
+    """
+    Bulk load (ticket_id, text, true_category, true_priority, created_at) rows.
+    Postgres: COPY into a temp staging table, then one INSERT ... ON CONFLICT DO NOTHING
+    (re-loading the same seed is a no-op). SQLite: executemany.
+    Returns the number of rows written.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    if DB_BACKEND == "sqlite":
+        with get_cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO public.tickets
+                (ticket_id, text, true_category, true_priority, created_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT DO NOTHING;
+                """,
+                rows,
+            )
+            return cur.rowcount
+
+    import csv
+    import io
+
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE tickets_stage
+            (ticket_id VARCHAR(50), text TEXT, true_category VARCHAR(50), true_priority VARCHAR(20),
+             created_at TIMESTAMP WITH TIME ZONE)
+            ON COMMIT DROP;
+            """
+        )
+        cur.copy_expert(
+            "COPY tickets_stage (ticket_id, text, true_category, true_priority, created_at) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+        cur.execute(
+            """
+            INSERT INTO public.tickets
+            (ticket_id, text, true_category, true_priority, created_at)
+            SELECT ticket_id, text, true_category, true_priority, created_at FROM tickets_stage
+            ON CONFLICT DO NOTHING;
+            """
+        )
+        return cur.rowcount
+
+
+def insert_incoming_ticket(ticket_id, text, created_at, student_id="Anonymous", priority="Low", status="QUEUED"):
     """
     Used by API /submit endpoint.
+    (status="DEFERRED" when admission control parks the ticket in the DB only.)
     """
     with get_cursor() as cur:
         cur.execute(
             """
             INSERT INTO public.tickets
             (ticket_id, student_id, text, true_category, true_priority, requested_priority, status, created_at)
-            VALUES (%s, %s, %s, 'Unknown', 'Unknown', %s, 'QUEUED', %s)
-            ON CONFLICT (ticket_id) DO NOTHING;
+            VALUES (%s, %s, %s, 'Unknown', 'Unknown', %s, %s, %s)
+            ON CONFLICT DO NOTHING;
             """,
-            (ticket_id, student_id, text, priority, created_at),
+            (ticket_id, student_id, text, priority, status, created_at),
         )
+        inserted = cur.rowcount != 0
+
+    if inserted:
+        _notify("ticket_inserted", row={
+            "ticket_id": ticket_id, "student_id": student_id, "text": text,
+            "true_category": "Unknown", "true_priority": "Unknown", "requested_priority": priority,
+            "status": status, "created_at": created_at, "resolved_at": None, "resolution_note": None,
+        })
+
 
+def bulk_insert_incoming_tickets(rows):
+    """
+    Used by the ingestion spool replayer.
+    rows: (ticket_id, student_id, text, requested_priority, status, created_at);
+    already-present tickets are skipped, so replaying a batch twice is harmless.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
 
-def fetch_all_tickets():
     with get_cursor() as cur:
-        cur.execute("SELECT * FROM public.tickets;")
-        return cur.fetchall()
+        if DB_BACKEND == "sqlite":
+            cur.executemany(
+                """
+                INSERT INTO public.tickets
+                (ticket_id, student_id, text, true_category, true_priority, requested_priority, status, created_at)
+                VALUES (%s, %s, %s, 'Unknown', 'Unknown', %s, %s, %s)
+                ON CONFLICT DO NOTHING;
+                """,
+                rows,
+            )
+        else:
+            execute_values(
+                cur,
+                """
+                INSERT INTO public.tickets
+                (ticket_id, student_id, text, true_category, true_priority, requested_priority, status, created_at)
+                VALUES %s
+                ON CONFLICT DO NOTHING;
+                """,
+                rows,
+                template="(%s, %s, %s, 'Unknown', 'Unknown', %s, %s, %s)",
+            )
+        count = cur.rowcount
+
+    _notify("tickets_bulk_inserted", student_ids={r[1] for r in rows})
+    return count
+
+
+def fetch_all_tickets(since=None, max_staleness=None):
+    """
+    since: only tickets created at/after this time (prunes older partitions).
+    Served by a read replica when configured (see read_all).
+    """
+    if since is not None:
+        return read_all("SELECT * FROM public.tickets WHERE created_at >= %s;", (since,), max_staleness)
+    return read_all("SELECT * FROM public.tickets;", (), max_staleness)
 
 
-def fetch_tickets_by_student(student_id):
+def fetch_tickets_by_student(student_id, since=None, max_staleness=None):
     """
     Lab Req: Get history for a specific student.
+    (since: only tickets created at/after this time, so older partitions are skipped.)
     """
+    if since is not None:
+        return read_all(
+            """
+            SELECT * FROM public.tickets
+            WHERE student_id = %s AND created_at >= %s
+            ORDER BY created_at DESC;
+            """,
+            (student_id, since),
+            max_staleness,
+        )
+    return read_all(
+        "SELECT * FROM public.tickets WHERE student_id = %s ORDER BY created_at DESC;",
+        (student_id,),
+        max_staleness,
+    )
+
+
+def claim_deferred_tickets(limit=50):
+    """
+    Used by Worker when idle: move DEFERRED tickets back to QUEUED (highest
+    requested priority first, then oldest) and return them.
+    SKIP LOCKED lets several API processes claim concurrently without overlap.
+    """
+    limit = int(limit)
     with get_cursor() as cur:
         cur.execute(
-            "SELECT * FROM public.tickets WHERE student_id = %s ORDER BY created_at DESC;",
-            (student_id,)
+            f"""
+            UPDATE public.tickets
+            SET status = 'QUEUED'
+            WHERE ticket_id IN (
+                SELECT ticket_id FROM public.tickets
+                WHERE status = 'DEFERRED'
+                ORDER BY CASE requested_priority WHEN 'High' THEN 1 WHEN 'Medium' THEN 2 ELSE 3 END, created_at
+                LIMIT {limit}
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING ticket_id, text, requested_priority, created_at;
+            """
         )
-        return cur.fetchall()
+        rows = cur.fetchall()
+
+    for row in rows:
+        _notify("ticket_status", ticket_id=row["ticket_id"], status="QUEUED", resolved_at=None, note=None)
+    return rows
 
 
-def update_ticket_status(ticket_id, status, resolved_at=None, note=None):
+def _status_update(ticket_id, status, resolved_at=None, note=None, created_at=None):
+    """
+    (sql, params) for one status update; the SQL text depends only on which
+    optional values are set, so consecutive updates of the same shape can be batched.
+    """
+    key_sql = "ticket_id = %s"
+    key_params = (ticket_id,)
+    if created_at is not None:
+        key_sql += " AND created_at = %s"
+        key_params += (created_at,)
+
+    if resolved_at:
+        return (
+            f"UPDATE public.tickets SET status = %s, resolved_at = %s, resolution_note = %s WHERE {key_sql};",
+            (status, resolved_at, note) + key_params,
+        )
+    return f"UPDATE public.tickets SET status = %s WHERE {key_sql};", (status,) + key_params
+
+
+def update_ticket_status(ticket_id, status, resolved_at=None, note=None, created_at=None):
     """
     Used by Worker to update status (PROCESSING -> RESOLVED).
+    Passing the ticket's created_at lets Postgres touch only its partition.
     """
+    sql, params = _status_update(ticket_id, status, resolved_at, note, created_at)
     with get_cursor() as cur:
-        if resolved_at:
-            cur.execute(
+        cur.execute(sql, params)
+        updated = cur.rowcount != 0
+
+    if updated:
+        _notify("ticket_status", ticket_id=ticket_id, status=status, resolved_at=resolved_at, note=note)
+
+
+def bulk_update_ticket_status(rows):
+    """
+    Used by the ingestion spool replayer.
+    rows: (ticket_id, status, resolved_at, note, created_at), applied in order
+    in one transaction (runs of same-shape updates go in one execute_batch).
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    statements = [_status_update(*row) for row in rows]
+    with get_cursor() as cur:
+        for sql, group in itertools.groupby(statements, key=lambda s: s[0]):
+            params = [p for _, p in group]
+            if DB_BACKEND == "sqlite":
+                cur.executemany(sql, params)
+            else:
+                execute_batch(cur, sql, params)
+
+    for ticket_id, status, resolved_at, note, _ in rows:
+        _notify("ticket_status", ticket_id=ticket_id, status=status, resolved_at=resolved_at, note=note)
+
+
+# --------------------------------------------------
+# Predictions
+# --------------------------------------------------
+
+def bulk_insert_predictions(rows):
+    """
+    Used by the ingestion spool replayer.
+    rows: (ticket_id, pred_category, pred_priority, confidence, tier); tickets
+    that already have a prediction are skipped, so replaying twice is harmless.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    with get_cursor() as cur:
+        if DB_BACKEND == "sqlite":
+            cur.executemany(
                 """
-                UPDATE public.tickets 
-                SET status = %s, resolved_at = %s, resolution_note = %s 
-                WHERE ticket_id = %s;
+                INSERT INTO public.predictions
+                (ticket_id, pred_category, pred_priority, confidence, tier)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT DO NOTHING;
                 """,
-                (status, resolved_at, note, ticket_id)
+                rows,
             )
         else:
-            cur.execute(
-                "UPDATE public.tickets SET status = %s WHERE ticket_id = %s;",
-                (status, ticket_id)
+            execute_values(
+                cur,
+                """
+                INSERT INTO public.predictions
+                (ticket_id, pred_category, pred_priority, confidence, tier)
+                VALUES %s
+                ON CONFLICT DO NOTHING;
+                """,
+                rows,
             )
+        return cur.rowcount
 
 
-# --------------------------------------------------
-# Predictions
-# --------------------------------------------------
-
-def insert_prediction(ticket_id, pred_category, pred_priority, confidence):
+def insert_prediction(ticket_id, pred_category, pred_priority, confidence, tier="model"):
+    """
+    confidence is None for rule-tier answers (keyword purity is not a probability).
+    A ticket keeps its first prediction (later ones are skipped); an unknown
+    ticket_id raises a foreign key error.
+    """
     with get_cursor() as cur:
         cur.execute(
             """
             INSERT INTO public.predictions
-            (ticket_id, pred_category, pred_priority, confidence)
-            VALUES (%s, %s, %s, %s);
+            (ticket_id, pred_category, pred_priority, confidence, tier)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT DO NOTHING;
             """,
-            (ticket_id, pred_category, pred_priority, confidence),
+            (ticket_id, pred_category, pred_priority, confidence, tier),
         )
 
 
-def fetch_all_predictions():
+def delete_tickets(ticket_ids):
+    """
+    Delete tickets with their predictions (and, in Postgres, their ticket_keys /
+    prediction_keys rows). Used to clean up benchmark rows. Returns tickets deleted.
+    """
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return 0
+    placeholders = ", ".join(["%s"] * len(ticket_ids))
     with get_cursor() as cur:
-        cur.execute("SELECT * FROM public.predictions;")
-        return cur.fetchall()
+        cur.execute(f"DELETE FROM public.predictions WHERE ticket_id IN ({placeholders});", ticket_ids)
+        cur.execute(f"DELETE FROM public.tickets WHERE ticket_id IN ({placeholders});", ticket_ids)
+        deleted = cur.rowcount
+        if DB_BACKEND == "postgres":
+            # prediction_keys rows go with them (ON DELETE CASCADE)
+            cur.execute(f"DELETE FROM public.ticket_keys WHERE ticket_id IN ({placeholders});", ticket_ids)
+    return deleted
+
+
+def fetch_all_predictions(since=None, max_staleness=None):
+    """
+    since: only predictions processed at/after this time (prunes older partitions).
+    Served by a read replica when configured (see read_all).
+    """
+    if since is not None:
+        return read_all("SELECT * FROM public.predictions WHERE processed_at >= %s;", (since,), max_staleness)
+    return read_all("SELECT * FROM public.predictions;", (), max_staleness)
 
 
 # --------------------------------------------------
 # Events
 # --------------------------------------------------
 
+def _json_param(payload):
+    return json.dumps(payload) if DB_BACKEND == "sqlite" else Json(payload)
+
+
+# pg_notify payloads are limited to 8000 bytes
+_NOTIFY_MAX_BYTES = 7900
+
+
 def insert_event(event_type, payload):
+    """
+    Store the event and push it to subscribers (src.event_bus.EventSubscriber):
+    Postgres sends NOTIFY on EVENTS_CHANNEL in the same transaction (delivered on
+    commit); SQLite has no other processes, so it dispatches in-process.
+    """
     with get_cursor() as cur:
         cur.execute(
             """
             INSERT INTO public.events
             (event_type, payload)
-            VALUES (%s, %s);
+            VALUES (%s, %s)
+            RETURNING id, created_at;
             """,
-            (event_type, Json(payload)),
+            (event_type, _json_param(payload)),
         )
+        row = cur.fetchone()
+        message = {"id": row["id"], "event_type": event_type, "created_at": str(row["created_at"]), "payload": payload}
+
+        if DB_BACKEND == "postgres":
+            body = json.dumps(message, default=str)
+            if len(body.encode("utf-8")) > _NOTIFY_MAX_BYTES:
+                # Too big to push: listeners fetch it by id (fetch_events_after)
+                body = json.dumps(dict(message, payload=None, truncated=True), default=str)
+            cur.execute("SELECT pg_notify(%s, %s);", (EVENTS_CHANNEL, body))
+
+    if DB_BACKEND == "sqlite":
+        _notify("event_inserted", message=message)
+
+
+def fetch_events_after(last_id, event_types=None, limit=500):
+    """
+    Events with id > last_id, oldest first (SSE reconnects with Last-Event-ID).
+    """
+    limit = int(limit)
+    if event_types:
+        placeholders = ", ".join(["%s"] * len(event_types))
+        sql = f"""
+            SELECT id, event_type, payload, created_at FROM public.events
+            WHERE id > %s AND event_type IN ({placeholders})
+            ORDER BY id LIMIT {limit};
+        """
+        params = (last_id, *event_types)
+    else:
+        sql = f"SELECT id, event_type, payload, created_at FROM public.events WHERE id > %s ORDER BY id LIMIT {limit};"
+        params = (last_id,)
+
+    with get_cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    return [
+        {
+            "id": r["id"],
+            "event_type": r["event_type"],
+            "created_at": str(r["created_at"]),
+            "payload": json.loads(r["payload"]) if isinstance(r["payload"], str) else r["payload"],
+        }
+        for r in rows
+    ]
 
 
 # --------------------------------------------------
@@ -189,4 +653,47 @@ def fetch_unclassified_tickets(limit=200):
             LIMIT {limit};
             """
         )
-        return cur.fetchall()
\ No newline at end of file
+        return cur.fetchall()
+
+def fetch_unclassified_tickets_between(start, end, limit=None):
+    """
+    Unclassified tickets with start <= created_at < end (one pipeline partition).
+    A prediction is never older than its ticket, so predictions are bounded by
+    processed_at >= start as well (both sides prune partitions).
+    """
+    limit_sql = f"LIMIT {int(limit)}" if limit is not None else ""
+    with get_cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT t.*
+            FROM public.tickets t
+            LEFT JOIN public.predictions p
+                ON t.ticket_id = p.ticket_id
+               AND p.processed_at >= %s
+            WHERE p.ticket_id IS NULL
+              AND t.created_at >= %s AND t.created_at < %s
+            ORDER BY t.created_at
+            {limit_sql};
+            """,
+            (start, start, end),
+        )
+        return cur.fetchall()
+
+
+def fetch_predictions_between(start, end, max_staleness=None):
+    """
+    Predictions joined with true labels for tickets with start <= created_at < end.
+    """
+    return read_all(
+        """
+        SELECT p.ticket_id, p.pred_category, p.pred_priority, p.confidence, p.processed_at,
+               t.true_category, t.true_priority, t.created_at
+        FROM public.predictions p
+        JOIN public.tickets t
+            ON t.ticket_id = p.ticket_id
+        WHERE t.created_at >= %s AND t.created_at < %s
+          AND p.processed_at >= %s;
+        """,
+        (start, end, start),
+        max_staleness,
+    )
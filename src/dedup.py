@@ -0,0 +1,162 @@
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# (a * h + b) stays below 2**64 for a, b < 2**31 and 32-bit shingle hashes
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def _shingles(text: str, k: int) -> set:
+    """
+    Character k-grams over normalized text (lower-case, no punctuation, single spaces).
+    Robust to small wording changes in short tickets.
+    """
+    t = _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+    if len(t) <= k:
+        return {t}
+    return {t[i:i + k] for i in range(len(t) - k + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH index over recent ticket texts.
+
+    - Memory is bounded by max_entries (oldest evicted first).
+    - Entries older than window_seconds are evicted lazily on add/query.
+    - `scope` partitions the index (e.g. per student_id) without separate instances.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        window_seconds: float = 3600.0,
+        max_entries: int = 20_000,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = random.Random(seed)
+        prime = int(_MERSENNE_PRIME)
+        self._a = np.array([rng.randint(1, prime - 1) for _ in range(num_perm)], dtype=np.uint64)[:, None]
+        self._b = np.array([rng.randint(0, prime - 1) for _ in range(num_perm)], dtype=np.uint64)[:, None]
+
+        # key -> (added_at, scope, signature, meta)
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[int, ...], Dict[str, Any]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[Any, int, Tuple[int, ...]], set] = {}
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "hits": 0, "evicted": 0}
+
+    # ---------- hashing ----------
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in _shingles(text, self.shingle_size)),
+            dtype=np.uint64,
+        )
+        # One row per permutation, min over shingles
+        return tuple(((self._a * hashes[None, :] + self._b) % _MERSENNE_PRIME).min(axis=1).tolist())
+
+    def _band_keys(self, scope: Any, sig: Tuple[int, ...]) -> List[Tuple[Any, int, Tuple[int, ...]]]:
+        return [(scope, b, sig[b * self.rows:(b + 1) * self.rows]) for b in range(self.bands)]
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """
+        Estimated Jaccard similarity between two signatures.
+        """
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+    # ---------- eviction ----------
+    def _remove(self, key: str) -> None:
+        _, scope, sig, _ = self._entries.pop(key)
+        for band_key in self._band_keys(scope, sig):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._entries:
+            key, (added_at, _, _, _) = next(iter(self._entries.items()))
+            if added_at >= cutoff and len(self._entries) <= self.max_entries:
+                break
+            self._remove(key)
+            self.stats["evicted"] += 1
+
+    # ---------- public API ----------
+    def query(self, text: str, scope: Any = None, sig: Optional[Tuple[int, ...]] = None
+              ) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Best match (key, similarity, meta) above threshold within `scope`, or None.
+        """
+        sig = sig or self.signature(text)
+        with self._lock:
+            self._evict(time.time())
+            self.stats["queries"] += 1
+
+            candidates = set()
+            for band_key in self._band_keys(scope, sig):
+                candidates |= self._buckets.get(band_key, set())
+
+            best = None
+            for key in candidates:
+                sim = self.similarity(sig, self._entries[key][2])
+                if sim >= self.threshold and (best is None or sim > best[1]):
+                    best = (key, sim, self._entries[key][3])
+
+            if best is not None:
+                self.stats["hits"] += 1
+            return best
+
+    def add(self, key: str, text: str, meta: Optional[Dict[str, Any]] = None, scope: Any = None,
+            sig: Optional[Tuple[int, ...]] = None) -> None:
+        sig = sig or self.signature(text)
+        with self._lock:
+            now = time.time()
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (now, scope, sig, meta or {})
+            for band_key in self._band_keys(scope, sig):
+                self._buckets.setdefault(band_key, set()).add(key)
+            self._evict(now)
+
+    def query_and_add(self, key: str, text: str, meta: Optional[Dict[str, Any]] = None, scope: Any = None
+                      ) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Look up a near-duplicate, then index this text (signature computed once).
+        """
+        sig = self.signature(text)
+        match = self.query(text, scope=scope, sig=sig)
+        self.add(key, text, meta=meta, scope=scope, sig=sig)
+        return match
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            queries = self.stats["queries"]
+            return {
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "hit_rate": round(self.stats["hits"] / queries, 4) if queries else None,
+                **self.stats,
+            }
@@ -0,0 +1,288 @@
+"""
+Online drift monitor fed by classify_ticket (model-tier predictions only).
+
+Constant-memory sketches over a sliding time window (ring of per-minute buckets):
+- confidence histogram
+- predicted category / priority frequencies
+- hashed token frequencies (feature hashing into a fixed number of buckets)
+
+Each is compared against a reference sketch captured at training time
+(outputs/drift_reference.json) with PSI and KL divergence. When a feature's PSI
+crosses DRIFT_PSI_THRESHOLD, a DRIFT_DETECTED event is published on the BUS and
+stored in public.events.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import (
+    CATEGORIES,
+    PRIORITIES,
+    DRIFT_REFERENCE_PATH,
+    DRIFT_WINDOW_SECONDS,
+    DRIFT_BUCKET_SECONDS,
+    DRIFT_MIN_SAMPLES,
+    DRIFT_MIN_REFERENCE_SAMPLES,
+    DRIFT_PSI_THRESHOLD,
+    DRIFT_CHECK_EVERY,
+    DRIFT_ALERT_COOLDOWN_SECONDS,
+)
+
+
+CONFIDENCE_BINS = 10
+TOKEN_BUCKETS = 64
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+# Smoothing for empty bins (PSI / KL are undefined at zero)
+_EPS = 1e-4
+
+
+def token_buckets(text: str, n_buckets: int = TOKEN_BUCKETS) -> List[int]:
+    return [zlib.crc32(tok.encode("utf-8")) % n_buckets for tok in _TOKEN.findall(text.lower())]
+
+
+def confidence_bin(confidence: float) -> int:
+    return min(max(int(confidence * CONFIDENCE_BINS), 0), CONFIDENCE_BINS - 1)
+
+
+class Sketch:
+    """
+    Fixed-size counters for one time bucket (or the reference window).
+    """
+
+    FEATURES = ("confidence", "category", "priority", "tokens")
+
+    def __init__(self):
+        self.n = 0
+        self.counts = {
+            "confidence": np.zeros(CONFIDENCE_BINS),
+            "category": np.zeros(len(CATEGORIES) + 1),  # last slot: unknown label
+            "priority": np.zeros(len(PRIORITIES) + 1),
+            "tokens": np.zeros(TOKEN_BUCKETS),
+        }
+
+    @staticmethod
+    def _label_index(labels: List[str], value: str) -> int:
+        return labels.index(value) if value in labels else len(labels)
+
+    def add(self, text: str, category: str, priority: str, confidence: float) -> None:
+        self.n += 1
+        self.counts["confidence"][confidence_bin(confidence)] += 1
+        self.counts["category"][self._label_index(CATEGORIES, category)] += 1
+        self.counts["priority"][self._label_index(PRIORITIES, priority)] += 1
+        np.add.at(self.counts["tokens"], token_buckets(text), 1)
+
+    def merge(self, other: "Sketch") -> None:
+        self.n += other.n
+        for name in self.FEATURES:
+            self.counts[name] += other.counts[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, **{name: self.counts[name].tolist() for name in self.FEATURES}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Sketch":
+        sketch = cls()
+        sketch.n = int(data["n"])
+        for name in cls.FEATURES:
+            values = np.asarray(data[name], dtype=float)
+            if values.shape != sketch.counts[name].shape:
+                raise ValueError(f"Reference sketch '{name}' has {values.size} bins, expected {sketch.counts[name].size}")
+            sketch.counts[name] = values
+        return sketch
+
+
+def _distribution(counts: np.ndarray) -> np.ndarray:
+    p = counts + _EPS
+    return p / p.sum()
+
+
+def psi(current: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Population Stability Index: sum((p - q) * ln(p / q)). ~0.1 minor shift, >0.2 significant.
+    """
+    p, q = _distribution(current), _distribution(reference)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def kl_divergence(current: np.ndarray, reference: np.ndarray) -> float:
+    """
+    KL(current || reference) in nats.
+    """
+    p, q = _distribution(current), _distribution(reference)
+    return float(np.sum(p * np.log(p / q)))
+
+
+def build_reference(texts: Iterable[str], categories: Iterable[str], priorities: Iterable[str],
+                    confidences: Iterable[float], path: str = DRIFT_REFERENCE_PATH) -> Sketch:
+    """
+    Capture the reference sketch (training time, out-of-fold predictions) and save it as JSON.
+    """
+    sketch = Sketch()
+    for text, cat, pri, conf in zip(texts, categories, priorities, confidences):
+        sketch.add(str(text), str(cat), str(pri), float(conf))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now(timezone.utc).isoformat(), **sketch.to_dict()}, f)
+    print(f"[OK] Saved drift reference -> {path} ({sketch.n} samples)")
+    return sketch
+
+
+class DriftMonitor:
+    """
+    Sliding-window sketches vs the training reference.
+
+    Memory is window_seconds / bucket_seconds sketches, independent of traffic.
+    Statistics are recomputed every `check_every` observations (a few array sums).
+    """
+
+    def __init__(
+        self,
+        reference_path: str = DRIFT_REFERENCE_PATH,
+        window_seconds: float = DRIFT_WINDOW_SECONDS,
+        bucket_seconds: float = DRIFT_BUCKET_SECONDS,
+        min_samples: int = DRIFT_MIN_SAMPLES,
+        min_reference_samples: int = DRIFT_MIN_REFERENCE_SAMPLES,
+        psi_threshold: float = DRIFT_PSI_THRESHOLD,
+        check_every: int = DRIFT_CHECK_EVERY,
+        cooldown_seconds: float = DRIFT_ALERT_COOLDOWN_SECONDS,
+    ):
+        self.reference_path = reference_path
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.min_samples = min_samples
+        self.min_reference_samples = min_reference_samples
+        self.psi_threshold = psi_threshold
+        self.check_every = max(int(check_every), 1)
+        self.cooldown_seconds = cooldown_seconds
+
+        self._buckets: Deque[Tuple[int, Sketch]] = deque()
+        self._reference: Optional[Sketch] = None
+        self._reference_mtime: Optional[float] = None
+        self._since_check = 0
+        self._last_stats: Dict[str, Any] = {}
+        self._last_alert = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"observed": 0, "checks": 0, "alerts": 0}
+
+    # ---------- reference ----------
+    def _load_reference(self) -> Optional[Sketch]:
+        """
+        (Re)load the reference when the file appears or changes (after retraining).
+        """
+        try:
+            mtime = os.path.getmtime(self.reference_path)
+        except OSError:
+            return self._reference
+        if mtime != self._reference_mtime:
+            with open(self.reference_path, "r", encoding="utf-8") as f:
+                self._reference = Sketch.from_dict(json.load(f))
+            self._reference_mtime = mtime
+        return self._reference
+
+    # ---------- window ----------
+    def _evict(self, now: float) -> None:
+        oldest = int((now - self.window_seconds) // self.bucket_seconds)
+        while self._buckets and self._buckets[0][0] <= oldest:
+            self._buckets.popleft()
+
+    def _window(self) -> Sketch:
+        total = Sketch()
+        for _, sketch in self._buckets:
+            total.merge(sketch)
+        return total
+
+    def observe(self, text: str, category: str, priority: str, confidence: float) -> Optional[Dict[str, Any]]:
+        """
+        Add one classified ticket. Returns a DRIFT_DETECTED payload when this
+        observation triggered an alert (the caller publishes it), else None.
+        """
+        now = time.time()
+        with self._lock:
+            key = int(now // self.bucket_seconds)
+            if not self._buckets or self._buckets[-1][0] != key:
+                self._buckets.append((key, Sketch()))
+            self._buckets[-1][1].add(text, category, priority, confidence)
+            self.stats["observed"] += 1
+
+            self._since_check += 1
+            if self._since_check < self.check_every:
+                return None
+            self._since_check = 0
+            stats = self._check(now)
+
+            if not stats.get("drifted") or now - self._last_alert < self.cooldown_seconds:
+                return None
+            self._last_alert = now
+            self.stats["alerts"] += 1
+
+        return {
+            "event": "DRIFT_DETECTED",
+            "features": stats["drifted"],
+            "psi": {name: s["psi"] for name, s in stats["features"].items()},
+            "window_samples": stats["window_samples"],
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _check(self, now: float) -> Dict[str, Any]:
+        self._evict(now)
+        self.stats["checks"] += 1
+        window = self._window()
+        reference = self._load_reference()
+
+        stats: Dict[str, Any] = {
+            "window_seconds": self.window_seconds,
+            "window_samples": window.n,
+            "reference_samples": reference.n if reference is not None else 0,
+            "psi_threshold": self.psi_threshold,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if reference is None:
+            stats["status"] = "no_reference"
+        elif reference.n < self.min_reference_samples:
+            stats["status"] = "reference_too_small"
+        elif window.n < self.min_samples:
+            stats["status"] = "warming_up"
+        else:
+            features = {
+                name: {
+                    "psi": round(psi(window.counts[name], reference.counts[name]), 4),
+                    "kl": round(kl_divergence(window.counts[name], reference.counts[name]), 4),
+                }
+                for name in Sketch.FEATURES
+            }
+            drifted = [name for name, s in features.items() if s["psi"] > self.psi_threshold]
+            stats.update(status="drift" if drifted else "ok", features=features, drifted=drifted)
+
+        self._last_stats = stats
+        return stats
+
+    def snapshot(self, recompute: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._check(time.time()) if recompute else dict(self._last_stats)
+            window = self._window()
+            reference = self._reference
+            current_conf = _distribution(window.counts["confidence"]) if window.n else None
+            return {
+                **stats,
+                "confidence_histogram": {
+                    "window": [round(x, 4) for x in current_conf] if current_conf is not None else [],
+                    "reference": [round(x, 4) for x in _distribution(reference.counts["confidence"])]
+                    if reference is not None else [],
+                },
+                **self.stats,
+            }
+
+
+# Global monitor (fed by src.inference_service.classify_ticket)
+DRIFT_MONITOR = DriftMonitor()
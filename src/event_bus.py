@@ -1,6 +1,11 @@
 import json
 import queue
-from typing import Any, Dict, List, Optional
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.config import DB_BACKEND, EVENTS_CHANNEL, EVENT_LISTEN_RECONNECT_SECONDS, EVENT_REORDER_WINDOW
 
 
 class EventBus:
@@ -32,3 +37,209 @@ class EventBus:
 
 # Global bus instance (simple for this project)
 BUS = EventBus()
+
+
+class EventSubscriber:
+    """
+    Push subscriber for events stored with src.db.insert_event.
+
+    Postgres: a background thread LISTENs on EVENTS_CHANNEL over its own
+    autocommit connection and dispatches each NOTIFY to the registered handlers
+    (reconnecting after errors). SQLite: insert_event dispatches in-process.
+
+    Handlers receive {"id", "event_type", "created_at", "payload"} and run on
+    the listener thread, so they must be quick (e.g. hand off to a queue).
+
+    Notifications too big for NOTIFY arrive without a payload and are re-read
+    from public.events. After a reconnect, events stored while the listener was
+    down are replayed from public.events before live notifications resume.
+
+    Ids don't commit in order, so the replay starts `reorder_window` ids behind
+    the highest one dispatched; ids dispatched within that window are remembered
+    and never dispatched twice.
+    """
+
+    def __init__(self, channel: str = EVENTS_CHANNEL, reconnect_seconds: float = EVENT_LISTEN_RECONNECT_SECONDS,
+                 reorder_window: int = EVENT_REORDER_WINDOW):
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.reorder_window = reorder_window
+        self._handlers: Dict[int, tuple] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = False
+        self._last_id: Optional[int] = None  # highest event id dispatched by the listener
+        self._seen: set = set()  # ids dispatched by the listener, down to _last_id - reorder_window
+        self.stats = {
+            "received": 0, "dispatched": 0, "handler_errors": 0, "reconnects": 0,
+            "refetched": 0, "caught_up": 0, "duplicates": 0, "listening": False,
+        }
+
+    def subscribe(self, handler: Callable[[Dict[str, Any]], None], event_types: Optional[Iterable[str]] = None) -> int:
+        """
+        Register a handler (optionally only for some event types). Returns a token for unsubscribe().
+        """
+        with self._lock:
+            self._next_id += 1
+            self._handlers[self._next_id] = (handler, set(event_types) if event_types else None)
+            return self._next_id
+
+    def unsubscribe(self, token: int) -> None:
+        with self._lock:
+            self._handlers.pop(token, None)
+
+    def dispatch(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            handlers = list(self._handlers.values())
+            self.stats["received"] += 1
+        for handler, types in handlers:
+            if types is not None and message.get("event_type") not in types:
+                continue
+            try:
+                handler(message)
+                self.stats["dispatched"] += 1
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                print(f"[Events] Handler failed: {e}")
+
+    def _on_write(self, event: str, data: Dict[str, Any]) -> None:
+        if event == "event_inserted":
+            self.dispatch(data["message"])
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        if DB_BACKEND == "sqlite":
+            from src.db import register_write_hook
+
+            register_write_hook(self._on_write)
+            self.stats["listening"] = True
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_loop, daemon=True, name="event-listener")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._started = False
+
+    def _listen_loop(self) -> None:
+        from src.db import get_connection
+
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = get_connection()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}";')
+                self.stats["listening"] = True
+                print(f"[Events] Listening on '{self.channel}'")
+
+                # LISTEN is active, so anything stored from here on is also notified;
+                # replay what was stored while we were disconnected.
+                self._catch_up()
+
+                while not self._stop.is_set():
+                    # Wake up at least once a second to notice stop()
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            message = json.loads(notify.payload)
+                        except ValueError:
+                            print(f"[Events] Ignoring malformed payload on '{notify.channel}'")
+                            continue
+                        if message.get("id") in self._seen:
+                            self.stats["duplicates"] += 1
+                            continue  # already dispatched by the catch-up
+                        if message.get("truncated"):
+                            message = self._refetch(message)
+                            if message is None:
+                                continue
+                        self._dispatch_listened(message)
+            except Exception as e:
+                self.stats["listening"] = False
+                self.stats["reconnects"] += 1
+                print(f"[Events] Listener error, reconnecting in {self.reconnect_seconds}s: {e}")
+                time.sleep(self.reconnect_seconds)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+        self.stats["listening"] = False
+
+    def _dispatch_listened(self, message: Dict[str, Any]) -> bool:
+        """
+        Dispatches a listened or replayed event once. Returns False for a duplicate.
+        """
+        event_id = message["id"]
+        if event_id in self._seen:
+            self.stats["duplicates"] += 1
+            return False
+        self._seen.add(event_id)
+        self.dispatch(message)
+        if self._last_id is None or event_id > self._last_id:
+            self._last_id = event_id
+        if len(self._seen) > 2 * self.reorder_window:
+            floor = self._last_id - self.reorder_window
+            self._seen = {i for i in self._seen if i >= floor}
+        return True
+
+    def _refetch(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Reads a NOTIFY that was sent without its payload back from public.events.
+        """
+        from src.db import fetch_events_after
+
+        rows = fetch_events_after(message["id"] - 1, limit=1)
+        if not rows or rows[0]["id"] != message["id"]:
+            print(f"[Events] Event {message['id']} not found for re-fetch, skipping")
+            return None
+        self.stats["refetched"] += 1
+        return rows[0]
+
+    def _catch_up(self, page_size: int = 500) -> int:
+        """
+        Dispatches the events we missed while disconnected (nothing on the first
+        connection), re-reading `reorder_window` ids behind the last one for late
+        commits. Returns the number of events replayed.
+        """
+        from src.db import fetch_events_after
+
+        if self._last_id is None:
+            return 0
+        after = max(0, self._last_id - self.reorder_window)
+        replayed = 0
+        while not self._stop.is_set():
+            rows = fetch_events_after(after, limit=page_size)
+            if not rows:
+                break
+            for message in rows:
+                if self._dispatch_listened(message):
+                    replayed += 1
+            after = rows[-1]["id"]
+        self.stats["caught_up"] += replayed
+        if replayed:
+            print(f"[Events] Caught up {replayed} events after reconnect (last id {self._last_id})")
+        return replayed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"channel": self.channel, "subscribers": len(self._handlers), **self.stats}
+
+
+# Process-wide subscriber (started by the API for GET /events/stream)
+SUBSCRIBER = EventSubscriber()
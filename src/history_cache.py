@@ -0,0 +1,283 @@
+"""
+Per-student ticket history cache for GET /tickets.
+
+A bounded LRU of {student_id -> tickets (newest first) + status counts}, kept
+current by write-through from src.db's write hooks instead of re-querying the
+whole history on every poll. The serialized body and its ETag are computed once
+per change, so repeated polls cost a dict lookup (or a 304).
+
+Misses load from a replica (within TICKET_HISTORY_MAX_STALENESS_SECONDS). A
+replica snapshot can miss this process's latest writes, so those are kept in a
+short log and re-applied on top of it; loads fall back to the primary when the
+log can't vouch for the student (overflow or a bulk insert).
+
+Write-through only sees this process's writes. Writes from other processes
+(other API workers, the worker service, Dagster's classify_window status
+updates) show up when the entry is reloaded, i.e. after up to
+HISTORY_CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set
+
+from src import db
+from src.config import (
+    HISTORY_CACHE_MAX_STUDENTS,
+    HISTORY_CACHE_TTL_SECONDS,
+    TICKET_HISTORY_MAX_STALENESS_SECONDS,
+)
+
+# Writes remembered for re-applying on top of replica snapshots
+_RECENT_WRITES_MAX = 10000
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class _Entry:
+    __slots__ = ("student_id", "tickets", "counts", "loaded_at", "body", "etag")
+
+    def __init__(self, student_id: str, tickets: List[Dict[str, Any]]):
+        self.student_id = student_id
+        self.tickets = tickets
+        self.counts = Counter(t["status"] for t in tickets)
+        self.loaded_at = time.monotonic()
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+
+    def render(self):
+        """
+        Serialize once per change; the ETag is a content hash, so it is the same
+        across API processes and reloads as long as the history is unchanged.
+        """
+        if self.body is None:
+            self.body = json.dumps(
+                {"student_id": self.student_id, "tickets": self.tickets, "status_counts": dict(self.counts)},
+                default=_json_default,
+            ).encode("utf-8")
+            self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+        return self.body, self.etag
+
+
+class StudentHistoryCache:
+    def __init__(
+        self,
+        max_students: int = HISTORY_CACHE_MAX_STUDENTS,
+        ttl_seconds: float = HISTORY_CACHE_TTL_SECONDS,
+        max_staleness: float = TICKET_HISTORY_MAX_STALENESS_SECONDS,
+    ):
+        self.max_students = max(int(max_students), 1)
+        self.ttl_seconds = ttl_seconds
+        self.max_staleness = max_staleness
+        # Replica lag is checked every db._LAG_CHECK_SECONDS, so a snapshot can be
+        # that much older than max_staleness
+        self.recent_window = max_staleness + db._LAG_CHECK_SECONDS + 1.0 if max_staleness > 0 else 0.0
+        self._recent: "deque" = deque(maxlen=_RECENT_WRITES_MAX)  # (monotonic, event, data)
+        self._recent_dropped_at = 0.0  # newest write pushed out of _recent
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._owner: Dict[str, str] = {}  # ticket_id -> student_id (cached students only)
+        self._loading: Dict[str, bool] = {}  # student_id -> dirtied by a write during the load
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "writes_applied": 0,
+            "primary_loads": 0, "writes_reapplied": 0,
+        }
+
+    # ---------- reads ----------
+    def get(self, student_id: str, if_none_match: Optional[str] = None):
+        """
+        Returns (body, etag, not_modified). body is None when not_modified.
+        """
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is not None and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+                self._drop(student_id)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(student_id)
+                self.stats["hits"] += 1
+                body, etag = entry.render()
+            else:
+                self.stats["misses"] += 1
+                self._loading[student_id] = False
+
+        if entry is None:
+            entry = self._load(student_id)
+            body, etag = entry.render()
+
+        if if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return None, etag, True
+        return body, etag, False
+
+    def _load(self, student_id: str) -> _Entry:
+        started = time.monotonic()
+        with self._lock:
+            max_staleness = 0 if self._needs_primary(student_id, started) else self.max_staleness
+            if max_staleness == 0:
+                self.stats["primary_loads"] += 1
+        try:
+            rows = db.fetch_tickets_by_student(student_id, max_staleness=max_staleness)
+        except Exception:
+            with self._lock:
+                self._loading.pop(student_id, None)
+            raise
+
+        tickets = [dict(r) for r in rows]
+        with self._lock:
+            if max_staleness > 0:
+                self._reapply_recent(student_id, tickets, started - self.recent_window)
+            entry = _Entry(student_id, tickets)
+            dirty = self._loading.pop(student_id, True)
+            # A write landed while we were reading: serve this result but don't cache it
+            if not dirty:
+                self._install(entry)
+        return entry
+
+    def _needs_primary(self, student_id: str, now: float) -> bool:
+        """
+        True when a replica snapshot might miss writes we can't re-apply.
+        """
+        if self.max_staleness <= 0:
+            return True
+        cutoff = now - self.recent_window
+        if self._recent_dropped_at >= cutoff:
+            return True  # the log no longer covers the whole window
+        for t, event, data in reversed(self._recent):
+            if t < cutoff:
+                break
+            if event == "tickets_bulk_inserted" and student_id in data["student_ids"]:
+                return True  # rows we can't re-apply
+        return False
+
+    def _reapply_recent(self, student_id: str, tickets: List[Dict[str, Any]], cutoff: float) -> None:
+        """
+        Re-applies this process's writes from the staleness window on top of a
+        replica snapshot (idempotent: rows already there are left alone).
+        """
+        by_id = {t["ticket_id"]: t for t in tickets}
+        for t, event, data in self._recent:
+            if t < cutoff:
+                continue
+            if event == "ticket_inserted":
+                row = data["row"]
+                if row["student_id"] == student_id and row["ticket_id"] not in by_id:
+                    by_id[row["ticket_id"]] = dict(row)
+                    tickets.insert(0, by_id[row["ticket_id"]])
+                    self.stats["writes_reapplied"] += 1
+            elif event == "ticket_status":
+                ticket = by_id.get(data["ticket_id"])
+                if ticket is not None and ticket["status"] != data["status"]:
+                    ticket["status"] = data["status"]
+                    if data["resolved_at"]:
+                        ticket["resolved_at"] = data["resolved_at"]
+                        ticket["resolution_note"] = data["note"]
+                    self.stats["writes_reapplied"] += 1
+
+    def _remember(self, event: str, data: Dict[str, Any]) -> None:
+        if self.recent_window <= 0:
+            return
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._recent_dropped_at = self._recent[0][0]
+            self._recent.append((time.monotonic(), event, data))
+
+    def _install(self, entry: _Entry) -> None:
+        self._drop(entry.student_id)
+        self._entries[entry.student_id] = entry
+        for t in entry.tickets:
+            self._owner[t["ticket_id"]] = entry.student_id
+        while len(self._entries) > self.max_students:
+            _, old = self._entries.popitem(last=False)
+            self._forget(old)
+            self.stats["evictions"] += 1
+
+    def _drop(self, student_id: str) -> None:
+        entry = self._entries.pop(student_id, None)
+        if entry is not None:
+            self._forget(entry)
+
+    def _forget(self, entry: _Entry) -> None:
+        for t in entry.tickets:
+            self._owner.pop(t["ticket_id"], None)
+
+    def invalidate(self, student_ids: Set[str]) -> None:
+        with self._lock:
+            for student_id in student_ids:
+                self._drop(student_id)
+                if student_id in self._loading:
+                    self._loading[student_id] = True
+
+    # ---------- write-through ----------
+    def on_write(self, event: str, data: Dict[str, Any]) -> None:
+        self._remember(event, data)
+        if event == "ticket_inserted":
+            self._on_insert(data["row"])
+        elif event == "ticket_status":
+            self._on_status(data["ticket_id"], data["status"], data["resolved_at"], data["note"])
+        elif event == "tickets_bulk_inserted":
+            self.invalidate(data["student_ids"])
+
+    def _on_insert(self, row: Dict[str, Any]) -> None:
+        student_id = row["student_id"]
+        with self._lock:
+            if student_id in self._loading:
+                self._loading[student_id] = True
+            entry = self._entries.get(student_id)
+            if entry is None or row["ticket_id"] in self._owner:
+                return
+            entry.tickets.insert(0, dict(row))  # newest first, like the query
+            entry.counts[row["status"]] += 1
+            entry.body = entry.etag = None
+            self._owner[row["ticket_id"]] = student_id
+            self.stats["writes_applied"] += 1
+
+    def _on_status(self, ticket_id: str, status: str, resolved_at, note) -> None:
+        with self._lock:
+            student_id = self._owner.get(ticket_id)
+            if student_id is None:
+                # Unknown ticket: it may belong to a student being loaded right now
+                for loading_id in self._loading:
+                    self._loading[loading_id] = True
+                return
+            entry = self._entries[student_id]
+            for t in entry.tickets:
+                if t["ticket_id"] != ticket_id:
+                    continue
+                entry.counts[t["status"]] -= 1
+                if entry.counts[t["status"]] <= 0:
+                    del entry.counts[t["status"]]
+                t["status"] = status
+                entry.counts[status] += 1
+                if resolved_at:
+                    t["resolved_at"] = resolved_at
+                    t["resolution_note"] = note
+                break
+            entry.body = entry.etag = None
+            self.stats["writes_applied"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "students": len(self._entries),
+                "max_students": self.max_students,
+                "ttl_seconds": self.ttl_seconds,
+                "max_staleness": self.max_staleness,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                **self.stats,
+            }
+
+
+# Process-wide cache, kept current by every ticket write made through src.db
+HISTORY_CACHE = StudentHistoryCache()
+db.register_write_hook(HISTORY_CACHE.on_write)
@@ -1,18 +1,39 @@
+import argparse
 import os
+import random
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-import pandas as pd
-from joblib import load
-from src.db import fetch_unclassified_tickets
+from src.db import fetch_unclassified_tickets, fetch_unclassified_tickets_between
 
 from src.config import (
     OUTPUT_DIR,
     CATEGORY_MODEL_PATH,
     PRIORITY_MODEL_PATH,
+    LOW_CONFIDENCE_THRESHOLD,
+    CASCADE_ENABLED,
+    CASCADE_RULE_THRESHOLD,
+    CASCADE_AUDIT_RATE,
+    DEDUP_ENABLED,
+    DEDUP_THRESHOLD,
+    DEDUP_WINDOW_SECONDS,
+    DEDUP_MAX_ENTRIES,
+    MODEL_SERVER_SOCKET,
+    MODEL_SERVER_FALLBACK,
+    PREDICTIONS_DATASET,
+    DRIFT_ENABLED,
 )
+from src.artifacts import new_run_id, write_dataset, writes_csv, writes_parquet
+from src.dedup import NearDuplicateIndex
+from src.drift import DRIFT_MONITOR
+from src.model_server import ModelClient
+from src.data_generation import assign_priority
 from src.db import insert_prediction, insert_event, fetch_all_tickets
 from src.event_bus import BUS
+from src.spool import write_prediction, write_event
+from src.profiler import add_profile_args, run_entry_point
 
 
 EVENTS_LOG_PATH = os.path.join(OUTPUT_DIR, "events.log")
@@ -22,103 +43,334 @@ PREDICTIONS_CSV_PATH = os.path.join(OUTPUT_DIR, "predictions.csv")
 _category_model = None
 _priority_model = None
 
+# Recent ticket texts -> their predictions (near-duplicate reuse)
+PREDICTION_INDEX = NearDuplicateIndex(
+    threshold=DEDUP_THRESHOLD,
+    window_seconds=DEDUP_WINDOW_SECONDS,
+    max_entries=DEDUP_MAX_ENTRIES,
+)
+
 
 def _lazy_load_models():
     global _category_model, _priority_model
+    # Deferred: joblib/sklearn are only needed once models are actually loaded
+    from joblib import load
+
     if _category_model is None:
         _category_model = load(CATEGORY_MODEL_PATH)
     if _priority_model is None:
         _priority_model = load(PRIORITY_MODEL_PATH)
 
 
+def use_models(category_model, priority_model) -> None:
+    """
+    Swap in already-fitted pipelines (benchmarks / tests) instead of loading from disk.
+    """
+    global _category_model, _priority_model
+    _category_model = category_model
+    _priority_model = priority_model
+
+
+# Shared model server client (MODEL_SERVER_SOCKET set => models are not loaded in this process)
+_model_client = ModelClient(MODEL_SERVER_SOCKET) if MODEL_SERVER_SOCKET else None
+_fallback_warned = False
+
+
+def predict_texts(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Predict category + priority for a batch of ticket texts.
+    Uses the shared model server when configured, else the in-process models.
+    """
+    global _fallback_warned
+
+    texts = list(texts)
+    if not texts:
+        return []
+
+    if _model_client is not None:
+        try:
+            return _model_client.predict_texts(texts)
+        except (OSError, ConnectionError, RuntimeError) as e:
+            if not MODEL_SERVER_FALLBACK:
+                raise
+            if not _fallback_warned:
+                print(f"[Inference] Model server unavailable ({e}); falling back to local models")
+                _fallback_warned = True
+
+    return predict_texts_local(texts)
+
+
+def predict_texts_local(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    In-process prediction: one predict_proba call per model for the whole batch.
+    """
+    _lazy_load_models()
+
+    texts = list(texts)
+    if not texts:
+        return []
+
+    cat_proba = _category_model.predict_proba(texts)
+    cat_classes = list(_category_model.classes_)
+    pri_proba = _priority_model.predict_proba(texts)
+    pri_classes = list(_priority_model.classes_)
+
+    results = []
+    for cat_row, pri_row in zip(cat_proba, pri_proba):
+        # Category prediction + confidence
+        cat_idx = int(cat_row.argmax())
+        cat_conf = float(cat_row[cat_idx])
+
+        # Priority prediction + confidence
+        pri_idx = int(pri_row.argmax())
+        pri_conf = float(pri_row[pri_idx])
+
+        results.append(
+            {
+                "pred_category": cat_classes[cat_idx],
+                "pred_priority": pri_classes[pri_idx],
+                # Single confidence score (simple + explainable)
+                "confidence": float((cat_conf + pri_conf) / 2.0),
+                "category_confidence": cat_conf,
+                "priority_confidence": pri_conf,
+            }
+        )
+    return results
+
+
+WARMUP_TEXT = "warm up: I can't access Moodle."
+
+
+def warm_up_local() -> None:
+    """
+    Load the models and run one dummy prediction (first-call allocations).
+    """
+    predict_texts_local([WARMUP_TEXT])
+
+
+def warm_up_models() -> Dict[str, Any]:
+    """
+    Make the first real prediction fast: load (or reach) the models and run a
+    dummy prediction. Returns timings for the readiness endpoint.
+    """
+    start = time.perf_counter()
+    if _model_client is not None:
+        _model_client.ping()
+        source = "model_server"
+    else:
+        _lazy_load_models()
+        source = "local"
+    loaded = time.perf_counter()
+
+    predict_texts([WARMUP_TEXT])
+    done = time.perf_counter()
+
+    return {
+        "source": source,
+        "model_load_seconds": round(loaded - start, 4),
+        "warmup_prediction_seconds": round(done - loaded, 4),
+    }
+
+
 def predict_text(text: str) -> Dict[str, Any]:
     """
     Predict category + priority for a single ticket text.
     Returns predictions + confidence.
     """
-    _lazy_load_models()
+    return predict_texts([text])[0]
 
-    # Category prediction + confidence
-    cat_proba = _category_model.predict_proba([text])[0]
-    cat_classes = list(_category_model.classes_)
-    cat_idx = int(cat_proba.argmax())
-    pred_category = cat_classes[cat_idx]
-    cat_conf = float(cat_proba[cat_idx])
 
-    # Priority prediction + confidence
-    pri_proba = _priority_model.predict_proba([text])[0]
-    pri_classes = list(_priority_model.classes_)
-    pri_idx = int(pri_proba.argmax())
-    pred_priority = pri_classes[pri_idx]
-    pri_conf = float(pri_proba[pri_idx])
+# --------------------------------------------------
+# Cascade: cheap keyword tier -> full models
+# --------------------------------------------------
+
+# Category cue words (lower-case substrings). A ticket is "easy" when its cues
+# point to a single category; mixed cues (e.g. "exam timetable") escalate.
+CATEGORY_KEYWORDS = {
+    "IT": ["moodle", "login", "logging in", "password", "credentials"],
+    "Fees": ["fee", "payment", "tuition", "transaction", "billing", "charged", "receipt"],
+    "Timetable": ["timetable", "tutorial group", "lab session", "overlapping classes", "module"],
+    "Exams": ["exam"],
+    "General": ["enrollment", "student services", "id card", "attendance", "submitted a request"],
+}
+
+_cascade_lock = threading.Lock()
+CASCADE_STATS: Dict[str, Dict[str, int]] = {
+    "rules": {"hits": 0, "audited": 0, "audit_agree_category": 0, "audit_agree_priority": 0,
+              "labeled": 0, "correct_category": 0, "correct_priority": 0},
+    "model": {"hits": 0, "low_confidence": 0,
+              "labeled": 0, "correct_category": 0, "correct_priority": 0},
+}
+
 
-    # Single confidence score (simple + explainable)
-    confidence = float((cat_conf + pri_conf) / 2.0)
+def _bump(tier: str, key: str, n: int = 1) -> None:
+    with _cascade_lock:
+        CASCADE_STATS[tier][key] += n
+
+
+def _rule_tier(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Tier 1: keyword category + urgency-cue priority (assign_priority).
+    Returns None when the cues are not decisive enough.
+    Confidence is None: cue purity is not a calibrated probability and must not
+    be averaged with model confidences (it is kept as rule_purity).
+    """
+    t = text.lower()
+    hits = {cat: sum(1 for kw in kws if kw in t) for cat, kws in CATEGORY_KEYWORDS.items()}
+    total = sum(hits.values())
+    if total == 0:
+        return None
+
+    pred_category = max(hits, key=hits.get)
+    purity = hits[pred_category] / total
+    if purity < CASCADE_RULE_THRESHOLD:
+        return None
 
     return {
         "pred_category": pred_category,
-        "pred_priority": pred_priority,
-        "confidence": confidence,
-        "category_confidence": cat_conf,
-        "priority_confidence": pri_conf,
+        "pred_priority": assign_priority(text),
+        "confidence": None,
+        "category_confidence": None,
+        "priority_confidence": None,
+        "rule_purity": float(purity),
     }
 
 
-def classify_ticket(ticket_id: str, text: str) -> Dict[str, Any]:
+def escalates(text: str) -> bool:
     """
-    Predict, publish an event, and store results in Postgres.
+    True when predict_cascade answers `text` with the full models (the tickets
+    the drift monitor observes, so its training reference must match).
+    """
+    return not CASCADE_ENABLED or _rule_tier(text) is None
+
+
+def predict_cascade(text: str) -> Dict[str, Any]:
     """
+    Answer easy tickets from the keyword tier, escalate the rest to the full models.
+    A CASCADE_AUDIT_RATE sample of rule answers is re-checked against the models
+    to track tier-1 agreement in production (no labels needed).
+    """
+    if CASCADE_ENABLED:
+        result = _rule_tier(text)
+        if result is not None:
+            _bump("rules", "hits")
+            if CASCADE_AUDIT_RATE > 0 and random.random() < CASCADE_AUDIT_RATE:
+                full = predict_text(text)
+                _bump("rules", "audited")
+                _bump("rules", "audit_agree_category", int(full["pred_category"] == result["pred_category"]))
+                _bump("rules", "audit_agree_priority", int(full["pred_priority"] == result["pred_priority"]))
+            result["tier"] = "rules"
+            return result
+
     result = predict_text(text)
+    result["tier"] = "model"
+    _bump("model", "hits")
+    if result["confidence"] < LOW_CONFIDENCE_THRESHOLD:
+        result["low_confidence"] = True
+        _bump("model", "low_confidence")
+    return result
+
+
+def record_cascade_outcome(tier: str, pred_category: str, pred_priority: str,
+                           true_category: str, true_priority: str) -> None:
+    """
+    Per-tier accuracy where ground truth exists (synthetic / labeled tickets).
+    """
+    if tier not in CASCADE_STATS or true_category in (None, "Unknown"):
+        return
+    _bump(tier, "labeled")
+    _bump(tier, "correct_category", int(pred_category == true_category))
+    _bump(tier, "correct_priority", int(pred_priority == true_priority))
+
+
+def cascade_stats() -> Dict[str, Any]:
+    with _cascade_lock:
+        stats = {tier: dict(values) for tier, values in CASCADE_STATS.items()}
+
+    total = sum(v["hits"] for v in stats.values())
+    for values in stats.values():
+        values["hit_rate"] = round(values["hits"] / total, 4) if total else None
+        labeled = values["labeled"]
+        values["category_accuracy"] = round(values["correct_category"] / labeled, 4) if labeled else None
+        values["priority_accuracy"] = round(values["correct_priority"] / labeled, 4) if labeled else None
+    audited = stats["rules"]["audited"]
+    stats["rules"]["audit_category_agreement"] = (
+        round(stats["rules"]["audit_agree_category"] / audited, 4) if audited else None
+    )
+    stats["enabled"] = CASCADE_ENABLED
+    return stats
+
+
+def classify_ticket(ticket_id: str, text: str, spool: bool = False) -> Dict[str, Any]:
+    """
+    Predict, publish an event, and store results in Postgres.
+    Near-duplicates of a recently classified ticket reuse its prediction.
+    spool=True (API with SPOOL_ENABLED) writes the prediction and events through
+    the ingestion spool, so a DB outage doesn't fail the request.
+    """
+    save_prediction = write_prediction if spool else insert_prediction
+    save_event = write_event if spool else insert_event
+
+    match = None
+    if DEDUP_ENABLED:
+        sig = PREDICTION_INDEX.signature(text)
+        match = PREDICTION_INDEX.query(text, sig=sig)
+
+    if match is not None:
+        duplicate_of, similarity, previous = match
+        result = dict(previous, tier="dedup", duplicate_of=duplicate_of, similarity=round(similarity, 4))
+    else:
+        result = predict_cascade(text)
+        if DEDUP_ENABLED:
+            PREDICTION_INDEX.add(ticket_id, text, meta=result, sig=sig)
 
     event_payload = {
         "event": "TICKET_CLASSIFIED",
         "ticket_id": ticket_id,
         "category": result["pred_category"],
         "priority": result["pred_priority"],
-        "confidence": round(result["confidence"], 6),
+        "confidence": round(result["confidence"], 6) if result["confidence"] is not None else None,
+        "tier": result["tier"],
         "processed_at": datetime.now(timezone.utc).isoformat(),
     }
+    if "duplicate_of" in result:
+        event_payload["duplicate_of"] = result["duplicate_of"]
 
     # 1) Publish to in-memory queue (simulation)
     # BUS.publish(event_payload)
 
     # 2) Store in Postgres for persistence
-    insert_prediction(
+    save_prediction(
         ticket_id=ticket_id,
         pred_category=result["pred_category"],
         pred_priority=result["pred_priority"],
         confidence=result["confidence"],
+        tier=result["tier"],
     )
 
     if result["pred_priority"] == "High":
         BUS.publish(event_payload)
-        insert_event(event_type="TICKET_CLASSIFIED", payload=event_payload)
+        save_event(event_type="TICKET_CLASSIFIED", payload=event_payload)
 
     # insert_event(event_type="TICKET_CLASSIFIED", payload=event_payload)
 
+    # The reference is built from model outputs only: rule answers and reused
+    # (dedup) predictions would skew the confidence/label distributions
+    if DRIFT_ENABLED and result["tier"] == "model":
+        alert = DRIFT_MONITOR.observe(text, result["pred_category"], result["pred_priority"], result["confidence"])
+        if alert is not None:
+            BUS.publish(alert)
+            save_event(event_type="DRIFT_DETECTED", payload=alert)
+            print(f"[Drift] {alert['features']} drifted (PSI {alert['psi']})")
+
     return event_payload
 
 
-def batch_classify_from_db(limit: int = 200, seed: int = 42) -> str:
+def _classify_frame(df):
     """
-    Batch inference for pipeline/testing:
-    - reads tickets from DB
-    - classifies a sample
-    - writes outputs/predictions.csv
-    - drains event bus and writes outputs/events.log
+    Classify every row of a tickets frame; returns the predictions frame (sorted by created_at).
     """
-    # rows = fetch_all_tickets()
-    rows = fetch_unclassified_tickets(limit=limit)
-
-    if not rows:
-        raise RuntimeError("No tickets found. Run data_generation first.")
-
-    df = pd.DataFrame(rows)
-
-    # Sample (so we don't predict everything every time)
-    df = df.sample(n=min(limit, len(df)), random_state=seed).reset_index(drop=True)
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    import pandas as pd
 
     preds_out: List[Dict[str, Any]] = []
 
@@ -127,6 +379,9 @@ def batch_classify_from_db(limit: int = 200, seed: int = 42) -> str:
         text = str(row["text"])
 
         event = classify_ticket(ticket_id, text)
+        record_cascade_outcome(
+            event["tier"], event["category"], event["priority"], row["true_category"], row["true_priority"]
+        )
 
         preds_out.append(
             {
@@ -137,25 +392,115 @@ def batch_classify_from_db(limit: int = 200, seed: int = 42) -> str:
                 "pred_category": event["category"],
                 "pred_priority": event["priority"],
                 "confidence": event["confidence"],
+                "tier": event["tier"],
                 "created_at": str(row["created_at"]),
                 "processed_at": event["processed_at"],
             }
         )
 
-    pred_df = pd.DataFrame(preds_out).sort_values("created_at")
-    pred_df.to_csv(PREDICTIONS_CSV_PATH, index=False)
+    return pd.DataFrame(preds_out).sort_values("created_at")
 
-    # Drain queue and write event log (so you show consume side)
+
+def _append_predictions_dataset(pred_df) -> str:
+    """
+    Typed columns + day partitions; each run appends its own files.
+    """
+    import pandas as pd
+
+    run_id = new_run_id()
+    typed = pred_df.assign(
+        created_at=pd.to_datetime(pred_df["created_at"], utc=True, errors="coerce"),
+        processed_at=pd.to_datetime(pred_df["processed_at"], utc=True, errors="coerce"),
+        confidence=pred_df["confidence"].astype(float),
+        run_id=run_id,
+    )
+    typed["day"] = typed["created_at"].dt.strftime("%Y-%m-%d")
+    write_dataset(typed, PREDICTIONS_DATASET, run_id=run_id)
+    print(f"[OK] Appended predictions -> {PREDICTIONS_DATASET} ({len(typed)} rows, run {run_id})")
+    return PREDICTIONS_DATASET
+
+
+def _drain_events_log(mode: str = "w") -> int:
     drained = BUS.consume(max_events=10_000)
-    with open(EVENTS_LOG_PATH, "w", encoding="utf-8") as f:
+    with open(EVENTS_LOG_PATH, mode, encoding="utf-8") as f:
         for evt in drained:
             f.write(f"{evt}\n")
-
-    print(f"[OK] Wrote predictions -> {PREDICTIONS_CSV_PATH} ({len(pred_df)} rows)")
     print(f"[OK] Wrote events log -> {EVENTS_LOG_PATH} ({len(drained)} events)")
-    return PREDICTIONS_CSV_PATH
+    return len(drained)
+
+
+def batch_classify_from_db(limit: int = 200, seed: int = 42) -> str:
+    """
+    Batch inference for pipeline/testing:
+    - reads tickets from DB
+    - classifies a sample
+    - writes outputs/parquet/predictions/ (and/or outputs/predictions.csv, see OUTPUT_FORMAT)
+    - drains event bus and writes outputs/events.log
+    """
+    import pandas as pd  # batch path only; keeps pandas off the API import path
+
+    # rows = fetch_all_tickets()
+    rows = fetch_unclassified_tickets(limit=limit)
+
+    if not rows:
+        raise RuntimeError("No tickets found. Run data_generation first.")
+
+    df = pd.DataFrame(rows)
+
+    # Sample (so we don't predict everything every time)
+    df = df.sample(n=min(limit, len(df)), random_state=seed).reset_index(drop=True)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    pred_df = _classify_frame(df)
+
+    out_path = PREDICTIONS_CSV_PATH
+    if writes_csv():
+        pred_df.to_csv(PREDICTIONS_CSV_PATH, index=False)
+        print(f"[OK] Wrote predictions -> {PREDICTIONS_CSV_PATH} ({len(pred_df)} rows)")
+    if writes_parquet():
+        out_path = _append_predictions_dataset(pred_df)
+
+    # Drain queue and write event log (so you show consume side)
+    _drain_events_log()
+    if CASCADE_ENABLED:
+        print(f"[Cascade] {cascade_stats()}")
+    return out_path
+
+
+def classify_window(start: datetime, end: datetime) -> Dict[str, Any]:
+    """
+    Incremental inference for one time window (a daily pipeline partition):
+    classifies every still-unclassified ticket with start <= created_at < end.
+    Re-running a window only picks up tickets that arrived since the last run.
+    Predictions go to the Parquet dataset only (the single predictions.csv
+    would be overwritten by concurrent partitions); events are appended.
+    """
+    import pandas as pd
+
+    rows = fetch_unclassified_tickets_between(start, end)
+    if not rows:
+        return {"rows": 0, "path": None}
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    pred_df = _classify_frame(pd.DataFrame(rows))
+
+    out_path = _append_predictions_dataset(pred_df) if writes_parquet() else None
+    _drain_events_log(mode="a")
+    # Model-tier rows only (rule answers have no confidence); None if there were none
+    avg_conf = pd.to_numeric(pred_df["confidence"], errors="coerce").mean()
+    return {
+        "rows": int(len(pred_df)),
+        "path": out_path,
+        "avg_confidence": float(avg_conf) if pd.notna(avg_conf) else None,
+    }
 
 
 if __name__ == "__main__":
     # Run a batch inference run (for testing)
-    batch_classify_from_db(limit=200, seed=2)
+    parser = argparse.ArgumentParser(description="Batch classify unclassified tickets")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=2)
+    add_profile_args(parser, "inference_service")
+    args = parser.parse_args()
+    run_entry_point(batch_classify_from_db, args, limit=args.limit, seed=args.seed)
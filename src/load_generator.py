@@ -0,0 +1,293 @@
+"""
+Open-loop load generator for the API (/submit).
+
+Replays a JSONL workload or synthetic tickets at a fixed arrival rate and reports
+submit latency percentiles, time-to-RESOLVED per priority and queue depth over time.
+Run it once against MONOLITHIC_MODE=true and once against the async queue to compare.
+
+Examples:
+    python -m src.load_generator --rate 5 --duration 60
+    python -m src.load_generator --workload requests.jsonl --rate 20 --priority-mix High=0.1,Medium=0.3,Low=0.6
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from src.config import OUTPUT_DIR, PRIORITIES
+
+
+LOADTEST_DIR = os.path.join(OUTPUT_DIR, "loadtest")
+
+
+# --------------------------------------------------
+# HTTP helpers (stdlib only)
+# --------------------------------------------------
+
+def _request(method: str, url: str, body: Optional[Dict[str, Any]] = None, timeout: float = 30.0):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 4)
+
+    return {"count": len(ordered), "p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(ordered[-1], 4)}
+
+
+def _parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    if not spec:
+        return {}
+    mix = {}
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+# --------------------------------------------------
+# Workload
+# --------------------------------------------------
+
+def load_workload(path: Optional[str], count: int, priority_mix: Dict[str, float], seed: int) -> List[Dict[str, str]]:
+    """
+    Build `count` ticket bodies. JSONL rows may carry text (or title/body),
+    priority and student_id; missing priorities are drawn from priority_mix.
+    Rows are cycled if the file is shorter than `count`.
+    """
+    rng = random.Random(seed)
+    names = list(priority_mix) or PRIORITIES
+    weights = [priority_mix[n] for n in names] if priority_mix else None
+
+    if path:
+        rows = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                text = obj.get("text") or " ".join(str(obj.get(k, "")) for k in ("title", "body")).strip()
+                rows.append({"text": text, "priority": obj.get("priority"), "student_id": obj.get("student_id")})
+    else:
+        from src.data_generation import generate_tickets
+
+        rows = [{"text": t["text"], "priority": None, "student_id": None} for t in generate_tickets(count, seed=seed)]
+
+    if not rows:
+        raise RuntimeError("Workload is empty.")
+
+    workload = []
+    for i in range(count):
+        row = dict(rows[i % len(rows)])
+        if priority_mix or not row["priority"]:
+            row["priority"] = rng.choices(names, weights=weights)[0]
+        workload.append(row)
+    return workload
+
+
+# --------------------------------------------------
+# Load run
+# --------------------------------------------------
+
+class LoadRun:
+    def __init__(self, base_url: str, students: int, poll_interval: float, max_in_flight: int):
+        self.base_url = base_url.rstrip("/")
+        self.run_id = uuid.uuid4().hex[:6]
+        self.students = [f"load-{self.run_id}-{i}" for i in range(max(students, 1))]
+        self.poll_interval = poll_interval
+        self.max_in_flight = max_in_flight
+
+        self.submits: List[Dict[str, Any]] = []
+        self.queue_depth: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._stop_sampler = threading.Event()
+        self._t0 = 0.0
+
+    def _submit(self, scheduled: float, body: Dict[str, str]) -> None:
+        sent = time.perf_counter()
+        try:
+            status, payload = _request("POST", f"{self.base_url}/submit", body)
+        except Exception as e:
+            status, payload = None, {"error": str(e)}
+        done = time.perf_counter()
+
+        with self._lock:
+            self.submits.append(
+                {
+                    "priority": body["priority"],
+                    "student_id": body["student_id"],
+                    "status_code": status,
+                    "ticket_id": (payload or {}).get("ticket_id"),
+                    # Service time, and latency from the scheduled arrival (no coordinated omission)
+                    "service_s": done - sent,
+                    "latency_s": done - scheduled,
+                }
+            )
+
+    def _sample_queue(self) -> None:
+        while not self._stop_sampler.is_set():
+            try:
+                _, metrics = _request("GET", f"{self.base_url}/metrics", timeout=5.0)
+                depth = (metrics or {}).get("current_queue_length")
+            except Exception:
+                depth = None
+            self.queue_depth.append({"t": round(time.perf_counter() - self._t0, 3), "queue_length": depth})
+            self._stop_sampler.wait(self.poll_interval)
+
+    def drive(self, workload: List[Dict[str, str]], rate: float, poisson: bool, seed: int) -> float:
+        """
+        Open-loop: arrivals follow the schedule regardless of how fast the API answers.
+        Returns the wall-clock duration of the submit phase.
+        """
+        rng = random.Random(seed)
+        self._t0 = time.perf_counter()
+        sampler = threading.Thread(target=self._sample_queue, daemon=True)
+        sampler.start()
+
+        next_at = self._t0
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for i, row in enumerate(workload):
+                delay = rng.expovariate(rate) if poisson else 1.0 / rate
+                next_at += delay
+                sleep_for = next_at - time.perf_counter()
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+
+                body = {
+                    "student_id": row.get("student_id") or self.students[i % len(self.students)],
+                    "text": row["text"],
+                    "priority": row["priority"],
+                }
+                pool.submit(self._submit, next_at, body)
+
+        return time.perf_counter() - self._t0
+
+    def wait_resolved(self, drain_timeout: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Poll /tickets per student until every accepted ticket is RESOLVED (or timeout).
+        Returns ticket_id -> ticket row.
+        """
+        wanted = {s["ticket_id"] for s in self.submits if s["ticket_id"]}
+        students = {s["student_id"] for s in self.submits if s["ticket_id"]}
+        resolved: Dict[str, Dict[str, Any]] = {}
+        deadline = time.perf_counter() + drain_timeout
+
+        while students and time.perf_counter() < deadline:
+            for student_id in list(students):
+                query = urllib.parse.urlencode({"student_id": student_id})
+                _, payload = _request("GET", f"{self.base_url}/tickets?{query}")
+                pending = False
+                for t in (payload or {}).get("tickets", []):
+                    if t["ticket_id"] not in wanted:
+                        continue
+                    if t.get("status") == "RESOLVED" and t.get("resolved_at"):
+                        resolved[t["ticket_id"]] = t
+                    else:
+                        pending = True
+                if not pending:
+                    students.discard(student_id)
+            if students:
+                time.sleep(self.poll_interval)
+
+        self._stop_sampler.set()
+        return resolved
+
+
+def summarize(run: LoadRun, resolved: Dict[str, Dict[str, Any]], submit_phase_s: float, mode: str,
+              rate: float) -> Dict[str, Any]:
+    accepted = [s for s in run.submits if s["status_code"] == 200]
+    by_status: Dict[str, int] = {}
+    for s in run.submits:
+        by_status[str(s["status_code"])] = by_status.get(str(s["status_code"]), 0) + 1
+
+    priority_of = {s["ticket_id"]: s["priority"] for s in accepted}
+    e2e: Dict[str, List[float]] = {}
+    for ticket_id, t in resolved.items():
+        created = datetime.fromisoformat(str(t["created_at"]))
+        done = datetime.fromisoformat(str(t["resolved_at"]))
+        e2e.setdefault(priority_of.get(ticket_id, "Unknown"), []).append((done - created).total_seconds())
+
+    depths = [d["queue_length"] for d in run.queue_depth if d["queue_length"] is not None]
+
+    return {
+        "run_id": run.run_id,
+        "mode": mode,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "target_rate_per_s": rate,
+        "achieved_rate_per_s": round(len(run.submits) / submit_phase_s, 3) if submit_phase_s > 0 else None,
+        "submitted": len(run.submits),
+        "status_codes": by_status,
+        "submit_latency_s": _percentiles([s["latency_s"] for s in accepted]),
+        "submit_service_time_s": _percentiles([s["service_s"] for s in accepted]),
+        "time_to_resolved_s": {p: _percentiles(v) for p, v in sorted(e2e.items())},
+        "unresolved": len(accepted) - len(resolved),
+        "max_queue_length": max(depths) if depths else None,
+        "queue_depth": run.queue_depth,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Open-loop load generator for /submit")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--workload", default=None, help="JSONL file (text or title/body, optional priority/student_id)")
+    parser.add_argument("--rate", type=float, default=5.0, help="Arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Submit phase length in seconds")
+    parser.add_argument("--count", type=int, default=None, help="Number of tickets (overrides --duration)")
+    parser.add_argument("--uniform", action="store_true", help="Fixed inter-arrival time instead of Poisson")
+    parser.add_argument("--priority-mix", default=None, help="e.g. High=0.2,Medium=0.3,Low=0.5")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--drain-timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    count = args.count or max(int(args.rate * args.duration), 1)
+    workload = load_workload(args.workload, count, _parse_mix(args.priority_mix), args.seed)
+
+    _, root = _request("GET", f"{args.base_url.rstrip('/')}/")
+    mode = (root or {}).get("mode", "UNKNOWN")
+    print(f"[Load] {count} tickets @ {args.rate}/s against {args.base_url} (mode={mode})")
+
+    run = LoadRun(args.base_url, args.students, args.poll_interval, args.max_in_flight)
+    submit_phase_s = run.drive(workload, args.rate, poisson=not args.uniform, seed=args.seed)
+    print(f"[Load] Submit phase done in {submit_phase_s:.1f}s, waiting for RESOLVED ...")
+    resolved = run.wait_resolved(args.drain_timeout)
+
+    report = summarize(run, resolved, submit_phase_s, mode, args.rate)
+
+    out_path = args.out or os.path.join(LOADTEST_DIR, f"load-{mode.lower()}-{run.run_id}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[Summary] submit latency: {report['submit_latency_s']}")
+    for priority, stats in report["time_to_resolved_s"].items():
+        print(f"[Summary] time-to-RESOLVED {priority}: {stats}")
+    print(f"[Summary] max queue length: {report['max_queue_length']}, unresolved: {report['unresolved']}")
+    print(f"[OK] Load test report -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Shared model server: one process holds the joblib pipelines and serves batched
+classification over a Unix socket, so API workers / Dagster don't each load the models.
+
+Run:
+    python -m src.model_server --socket /tmp/uni_support_models.sock
+Then point clients at it:
+    MODEL_SERVER_SOCKET=/tmp/uni_support_models.sock uvicorn api.main:app --workers 8
+
+Wire format: 4-byte big-endian length + UTF-8 JSON, in both directions.
+    request  {"texts": [...]}       -> {"results": [...]}
+    request  {"op": "ping"}         -> {"ok": true, ...}
+"""
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import MODEL_SERVER_BATCH_WAIT_MS, MODEL_SERVER_MAX_BATCH, MODEL_SERVER_SOCKET
+
+
+_HEADER = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Model server connection closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, obj: Dict[str, Any]) -> None:
+    data = json.dumps(obj).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock: socket.socket) -> Dict[str, Any]:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, length))
+
+
+# --------------------------------------------------
+# Client (used by src.inference_service)
+# --------------------------------------------------
+
+class ModelClient:
+    """
+    One persistent connection per thread; reconnects once on a broken connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None) or self._connect()
+            try:
+                send_message(sock, request)
+                response = recv_message(sock)
+                break
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt == 1:
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Model server error: {response['error']}")
+        return response
+
+    def predict_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return self.call({"texts": list(texts)})["results"]
+
+    def ping(self) -> Dict[str, Any]:
+        return self.call({"op": "ping"})
+
+
+# --------------------------------------------------
+# Server
+# --------------------------------------------------
+
+class _Pending:
+    __slots__ = ("texts", "results", "error", "done")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class Batcher:
+    """
+    Coalesces concurrent requests into one predict_proba call per model.
+    Waits up to `wait_ms` after the first request, or until `max_batch` texts.
+    """
+
+    def __init__(self, predict_fn, max_batch: int, wait_ms: float):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.wait_s = wait_ms / 1000.0
+        self._q: "queue.Queue[_Pending]" = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "texts": 0}
+        threading.Thread(target=self._run, name="model-batcher", daemon=True).start()
+
+    def submit(self, texts: List[str]) -> List[Dict[str, Any]]:
+        pending = _Pending(texts)
+        self._q.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise RuntimeError(pending.error)
+        return pending.results
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            n_texts = len(batch[0].texts)
+            deadline = time.monotonic() + self.wait_s
+            while n_texts < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                n_texts += len(item.texts)
+
+            texts = [t for p in batch for t in p.texts]
+            try:
+                results = self.predict_fn(texts)
+                offset = 0
+                for p in batch:
+                    p.results = results[offset:offset + len(p.texts)]
+                    offset += len(p.texts)
+            except Exception as e:
+                for p in batch:
+                    p.error = str(e)
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+            for p in batch:
+                p.done.set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        # Connections are persistent: serve requests until the client hangs up
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                if request.get("op") == "ping":
+                    response = {"ok": True, "pid": os.getpid(), **self.server.batcher.stats}
+                else:
+                    response = {"results": self.server.batcher.submit(request.get("texts", []))}
+            except Exception as e:
+                response = {"error": str(e)}
+
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class ModelServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, batcher: Batcher):
+        self.batcher = batcher
+        super().__init__(path, _Handler)
+
+
+def serve(path: str, max_batch: int = MODEL_SERVER_MAX_BATCH, wait_ms: float = MODEL_SERVER_BATCH_WAIT_MS) -> None:
+    # Imported here: the server is the one process that loads the models locally
+    from src.inference_service import predict_texts_local, warm_up_local
+
+    warm_up_local()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = ModelServer(path, Batcher(predict_texts_local, max_batch=max_batch, wait_ms=wait_ms))
+    print(f"[ModelServer] Serving on {path} (max_batch={max_batch}, wait={wait_ms}ms, pid={os.getpid()})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared model server over a Unix socket")
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET or "/tmp/uni_support_models.sock")
+    parser.add_argument("--max-batch", type=int, default=MODEL_SERVER_MAX_BATCH)
+    parser.add_argument("--batch-wait-ms", type=float, default=MODEL_SERVER_BATCH_WAIT_MS)
+    args = parser.parse_args()
+    serve(args.socket, max_batch=args.max_batch, wait_ms=args.batch_wait_ms)
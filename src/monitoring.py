@@ -1,5 +1,6 @@
 # src/monitoring.py
 
+import argparse
 import json
 import os
 from typing import Dict, Any
@@ -18,18 +19,49 @@ from src.config import (
     CONFUSION_MATRIX_CSV_PATH,
     HIGH_PRIORITY_PER_DAY_CSV_PATH,
     DRIFT_CSV_PATH,
+    PREDICTIONS_DATASET,
+    HIGH_PRIORITY_PER_DAY_DATASET,
+    DRIFT_DATASET,
+    DAILY_METRICS_DATASET,
 )
-from src.db import fetch_all_tickets, fetch_all_predictions, insert_metrics
+from src.artifacts import new_run_id, read_dataset, write_dataset, writes_csv, writes_parquet
+from src.db import fetch_all_tickets, fetch_all_predictions, fetch_predictions_between, insert_metrics
+from src.profiler import add_profile_args, run_entry_point
 
 
-def _load_joined_data() -> pd.DataFrame:
+MONITORING_COLUMNS = [
+    "ticket_id", "true_category", "true_priority",
+    "pred_category", "pred_priority", "confidence", "created_at", "processed_at",
+]
+
+
+def _load_joined_data(since=None, max_staleness=None) -> pd.DataFrame:
+    # Predictions are never older than their ticket, so `since` bounds both tables
+    return join_predictions(
+        pd.DataFrame(fetch_all_tickets(since=since, max_staleness=max_staleness)),
+        pd.DataFrame(fetch_all_predictions(since=since, max_staleness=max_staleness)),
+    )
+
+
+def _load_parquet_data(start_day=None, end_day=None) -> pd.DataFrame:
+    """
+    Read only the monitoring columns / requested days from the predictions dataset
+    (already joined with true labels at batch time).
+    """
+    df = read_dataset(PREDICTIONS_DATASET, columns=MONITORING_COLUMNS, start_day=start_day, end_day=end_day)
+    if df.empty:
+        raise RuntimeError(f"No predictions found in {PREDICTIONS_DATASET}. Run src.inference_service first.")
+
+    # A ticket re-classified in a later run keeps its latest prediction
+    df = df.sort_values("processed_at").drop_duplicates("ticket_id", keep="last")
+    return _clean(df)
+
+
+def join_predictions(tickets: pd.DataFrame, preds: pd.DataFrame) -> pd.DataFrame:
     """
     Join tickets (true labels + created_at) with predictions (model outputs).
     We join on ticket_id so we can compare true vs predicted.
     """
-    tickets = pd.DataFrame(fetch_all_tickets())
-    preds = pd.DataFrame(fetch_all_predictions())
-
     if tickets.empty:
         raise RuntimeError("No tickets found. Run src.data_generation first.")
     if preds.empty:
@@ -40,22 +72,25 @@ def _load_joined_data() -> pd.DataFrame:
         on="ticket_id",
         how="left"
     )
+    return _clean(df)
 
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
     # Clean and parse timestamps
     df["created_at"] = pd.to_datetime(df["created_at"], utc=True, errors="coerce")
     df["processed_at"] = pd.to_datetime(df["processed_at"], utc=True, errors="coerce")
     df["confidence"] = pd.to_numeric(df["confidence"], errors="coerce")
 
-    # Minimal hygiene
-    df = df.dropna(subset=["true_category", "pred_category", "created_at", "confidence"])
+    # Minimal hygiene (confidence stays: it is NULL for rule-tier predictions)
+    df = df.dropna(subset=["true_category", "pred_category", "created_at"])
     return df
 
 
-def compute_monitoring() -> Dict[str, Any]:
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    df = _load_joined_data()
-
+def summarize_predictions(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Pure metric computation over the joined frame (no DB / disk access).
+    Returns the summary numbers plus the confusion matrix and per-day frames.
+    """
     # -----------------------------
     # 1) Core classification metrics (Category)
     # -----------------------------
@@ -75,7 +110,6 @@ def compute_monitoring() -> Dict[str, Any]:
     labels = sorted(list(set(y_true) | set(y_pred)))
     cm = confusion_matrix(y_true, y_pred, labels=labels)
     cm_df = pd.DataFrame(cm, index=[f"true_{l}" for l in labels], columns=[f"pred_{l}" for l in labels])
-    cm_df.to_csv(CONFUSION_MATRIX_CSV_PATH, index=True)
 
     # -----------------------------
     # 2) High-priority tickets per day (Predicted)
@@ -89,7 +123,6 @@ def compute_monitoring() -> Dict[str, Any]:
         .rename(columns={"ticket_id": "high_priority_count"})
         .sort_values("day")
     )
-    high_per_day.to_csv(HIGH_PRIORITY_PER_DAY_CSV_PATH, index=False)
 
     # -----------------------------
     # 3) Drift check (simple): avg confidence over time (per day)
@@ -101,9 +134,71 @@ def compute_monitoring() -> Dict[str, Any]:
         .rename(columns={"confidence": "avg_confidence"})
         .sort_values("day")
     )
-    drift.to_csv(DRIFT_CSV_PATH, index=False)
 
-    avg_conf_overall = float(df["confidence"].mean())
+    # Mean over predictions with a confidence (model / dedup tiers); None if there are none
+    avg_conf = df["confidence"].mean()
+
+    return {
+        "n_predictions": int(len(df)),
+        "category_accuracy": acc,
+        "precision_macro": float(precision_macro),
+        "recall_macro": float(recall_macro),
+        "f1_macro": float(f1_macro),
+        "avg_confidence": float(avg_conf) if pd.notna(avg_conf) else None,
+        "labels": labels,
+        "category_classification_report": report,
+        "confusion_matrix": cm_df,
+        "high_priority_per_day": high_per_day,
+        "drift": drift,
+    }
+
+
+def compute_monitoring(source: str = "db", start_day: str = None, end_day: str = None,
+                       max_staleness: float = None) -> Dict[str, Any]:
+    """
+    source="db" joins public.tickets + public.predictions (full tables, or from
+    start_day on so Postgres only scans the matching partitions).
+    source="parquet" reads the predictions dataset, optionally for a day range only.
+    max_staleness=0 reads the primary (right after a step that wrote predictions).
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    if source == "parquet":
+        df = _load_parquet_data(start_day=start_day, end_day=end_day)
+    else:
+        since = pd.Timestamp(start_day, tz="UTC").to_pydatetime() if start_day else None
+        df = _load_joined_data(since=since, max_staleness=max_staleness)
+    summary = summarize_predictions(df)
+
+    acc = summary["category_accuracy"]
+    precision_macro = summary["precision_macro"]
+    recall_macro = summary["recall_macro"]
+    f1_macro = summary["f1_macro"]
+    avg_conf_overall = summary["avg_confidence"]
+    labels = summary["labels"]
+    report = summary["category_classification_report"]
+
+    summary["confusion_matrix"].to_csv(CONFUSION_MATRIX_CSV_PATH, index=True)
+
+    artifacts = {
+        "metrics_json": METRICS_JSON_PATH,
+        "confusion_matrix_csv": CONFUSION_MATRIX_CSV_PATH,
+    }
+    if writes_csv():
+        summary["high_priority_per_day"].to_csv(HIGH_PRIORITY_PER_DAY_CSV_PATH, index=False)
+        summary["drift"].to_csv(DRIFT_CSV_PATH, index=False)
+        artifacts["high_priority_per_day_csv"] = HIGH_PRIORITY_PER_DAY_CSV_PATH
+        artifacts["drift_csv"] = DRIFT_CSV_PATH
+    if writes_parquet():
+        # Per-day series are appended per run; readers pick the latest computed_at per day
+        run_id = new_run_id()
+        computed_at = pd.Timestamp.now(tz="UTC")
+        for frame, path, key in (
+            (summary["high_priority_per_day"], HIGH_PRIORITY_PER_DAY_DATASET, "high_priority_per_day_parquet"),
+            (summary["drift"], DRIFT_DATASET, "drift_parquet"),
+        ):
+            write_dataset(frame.assign(run_id=run_id, computed_at=computed_at), path, run_id=run_id)
+            artifacts[key] = path
 
     # -----------------------------
     # 4) Store summary metrics in DB
@@ -128,25 +223,64 @@ def compute_monitoring() -> Dict[str, Any]:
         "avg_confidence": avg_conf_overall,
         "labels": labels,
         "category_classification_report": report,
-        "artifacts": {
-            "metrics_json": METRICS_JSON_PATH,
-            "confusion_matrix_csv": CONFUSION_MATRIX_CSV_PATH,
-            "high_priority_per_day_csv": HIGH_PRIORITY_PER_DAY_CSV_PATH,
-            "drift_csv": DRIFT_CSV_PATH,
-        }
+        "source": source,
+        "artifacts": artifacts,
     }
 
     with open(METRICS_JSON_PATH, "w", encoding="utf-8") as f:
         json.dump(metrics_out, f, indent=2)
 
     print(f"[OK] Metrics written -> {METRICS_JSON_PATH}")
-    print(f"[OK] Confusion matrix -> {CONFUSION_MATRIX_CSV_PATH}")
-    print(f"[OK] High priority per day -> {HIGH_PRIORITY_PER_DAY_CSV_PATH}")
-    print(f"[OK] Drift confidence -> {DRIFT_CSV_PATH}")
-    print(f"[Summary] Category Accuracy={acc:.4f}, F1(macro)={f1_macro:.4f}, AvgConf={avg_conf_overall:.4f}")
+    for name, path in artifacts.items():
+        if name != "metrics_json":
+            print(f"[OK] {name} -> {path}")
+    print(f"[Summary] Category Accuracy={acc:.4f}, F1(macro)={f1_macro:.4f}, AvgConf={avg_conf_overall if avg_conf_overall is None else round(avg_conf_overall, 4)}")
 
     return metrics_out
 
 
+def compute_daily_monitoring(start, end, max_staleness: float = 0) -> Dict[str, Any]:
+    """
+    Metrics for tickets created in [start, end) only (one daily pipeline partition).
+    Appends one row per run to the daily_metrics dataset; the global
+    metrics.json / public.metrics summary stays with compute_monitoring().
+    Reads the primary by default: it runs right after classify_window wrote
+    the day's predictions, which a replica may not have replayed yet.
+    """
+    rows = fetch_predictions_between(start, end, max_staleness=max_staleness)
+    if not rows:
+        return {"n_predictions": 0}
+
+    df = _clean(pd.DataFrame(rows))
+    if df.empty:
+        return {"n_predictions": 0}
+    summary = summarize_predictions(df)
+
+    daily = {
+        "n_predictions": summary["n_predictions"],
+        "category_accuracy": summary["category_accuracy"],
+        "f1_macro": summary["f1_macro"],
+        "avg_confidence": summary["avg_confidence"],
+        "high_priority_count": int((df["pred_priority"].astype(str) == "High").sum()),
+    }
+    if writes_parquet():
+        run_id = new_run_id()
+        frame = pd.DataFrame([{
+            **daily,
+            "day": pd.Timestamp(start).strftime("%Y-%m-%d"),
+            "run_id": run_id,
+            "computed_at": pd.Timestamp.now(tz="UTC"),
+        }])
+        write_dataset(frame, DAILY_METRICS_DATASET, run_id=run_id)
+        daily["path"] = DAILY_METRICS_DATASET
+    return daily
+
+
 if __name__ == "__main__":
-    compute_monitoring()
+    parser = argparse.ArgumentParser(description="Compute monitoring metrics + drift")
+    parser.add_argument("--source", choices=["db", "parquet"], default="db")
+    parser.add_argument("--start-day", default=None, help="YYYY-MM-DD")
+    parser.add_argument("--end-day", default=None, help="YYYY-MM-DD (parquet source only)")
+    add_profile_args(parser, "monitoring")
+    args = parser.parse_args()
+    run_entry_point(compute_monitoring, args, source=args.source, start_day=args.start_day, end_day=args.end_day)
@@ -0,0 +1,162 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from src.config import OUTPUT_DIR, PROFILE_DEFAULT_INTERVAL, PROFILE_MAX_SECONDS
+
+
+# Only one sampler may run per process (keeps overhead bounded in production)
+_PROFILE_LOCK = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+# Leaf frames of threads parked in a blocking wait (worker in queue.get, the
+# uvicorn/asyncio loop in select, executor threads waiting for work, ...).
+# They are not using CPU and would otherwise dominate every flame graph.
+IDLE_LEAVES = frozenset({
+    "threading:wait",
+    "threading:_wait_for_tstate_lock",
+    "selectors:select",
+    "socket:accept",
+    "socket:readinto",
+    "ssl:read",
+    "profiler:sample_process",  # the request thread sleeping while it profiles
+})
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+def _collapse(frame, thread_name: str) -> str:
+    """
+    Walk a frame up to the thread root and return a 'root;...;leaf' stack string.
+    """
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.append(f"thread:{thread_name}")
+    return ";".join(reversed(stack))
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampling profiler.
+    A background thread snapshots the stacks of all other threads every
+    `interval` seconds via sys._current_frames() and counts collapsed stacks.
+    Threads parked in a known wait (IDLE_LEAVES) are skipped unless include_idle.
+    """
+
+    def __init__(self, interval: float = PROFILE_DEFAULT_INTERVAL, include_idle: bool = False):
+        self.interval = max(float(interval), 0.001)
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()
+        self.n_samples = 0
+        self.idle_skipped = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            names: Dict[int, str] = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and _frame_label(frame) in IDLE_LEAVES:
+                    self.idle_skipped += 1
+                    continue
+                self.samples[_collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+            self.n_samples += 1
+            self._stop.wait(self.interval)
+
+    def start(self) -> "SamplingProfiler":
+        if not _PROFILE_LOCK.acquire(blocking=False):
+            raise ProfilerBusy("A profiling session is already running in this process.")
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            _PROFILE_LOCK.release()
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def collapsed(self) -> str:
+        """
+        Collapsed stacks ('frame;frame;frame count' per line), flamegraph.pl / speedscope ready.
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def sample_process(seconds: float, interval: float = PROFILE_DEFAULT_INTERVAL, include_idle: bool = False) -> str:
+    """
+    Profile every thread of the running process for `seconds` (capped by PROFILE_MAX_SECONDS).
+    Used by the API admin endpoint.
+    """
+    seconds = min(max(float(seconds), 0.0), PROFILE_MAX_SECONDS)
+    with SamplingProfiler(interval=interval, include_idle=include_idle) as prof:
+        time.sleep(seconds)
+    return prof.collapsed()
+
+
+def run_profiled(fn: Callable, out_path: str, interval: float = PROFILE_DEFAULT_INTERVAL, **kwargs):
+    """
+    Run fn(**kwargs) under the sampler and write collapsed stacks to out_path.
+    """
+    with SamplingProfiler(interval=interval) as prof:
+        result = fn(**kwargs)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(prof.collapsed() + "\n")
+
+    print(f"[OK] Profile ({prof.n_samples} samples, {prof.idle_skipped} idle stacks skipped) -> {out_path}")
+    return result
+
+
+def add_profile_args(parser: argparse.ArgumentParser, name: str) -> None:
+    """
+    Shared --profile options for the module entry points.
+    """
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=os.path.join(OUTPUT_DIR, f"profile_{name}.folded"),
+        default=None,
+        metavar="PATH",
+        help="Sample the run and write collapsed stacks (default: outputs/profile_<name>.folded)",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=PROFILE_DEFAULT_INTERVAL,
+        help="Sampling interval in seconds",
+    )
+
+
+def run_entry_point(fn: Callable, args: argparse.Namespace, **kwargs):
+    """
+    Run an entry point, profiled if --profile was given.
+    """
+    if args.profile:
+        return run_profiled(fn, args.profile, interval=args.profile_interval, **kwargs)
+    return fn(**kwargs)
@@ -0,0 +1,138 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+def parse_targets(spec: str) -> Dict[str, float]:
+    """
+    "High=30,Medium=300,Low=1800" -> {"High": 30.0, "Medium": 300.0, "Low": 1800.0}
+    """
+    targets = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            targets[name.strip()] = float(value)
+    return targets
+
+
+class SLOScheduler:
+    """
+    Job queue ordered by per-class latency targets (earliest deadline first).
+
+    Each job's deadline is arrival + target[class]. A waiting Low job therefore
+    ages: once it has waited longer than the High target it beats newly
+    arrived High jobs, so no class starves. Ties (same deadline) go to the
+    earlier arrival, then to insertion order.
+
+    Replaces the worker's PriorityQueue, with a different API:
+    - put(cls, item, arrival) takes the class instead of a (priority, item) tuple
+    - get(timeout) returns (class, item, waited_seconds); it raises queue.Empty
+      on timeout, like queue.Queue
+    - there is no task_done() / join(); depth() and wait_stats() feed /metrics
+    """
+
+    def __init__(self, targets: Dict[str, float], stats_window: int = 1000):
+        if not targets:
+            raise ValueError("SLOScheduler needs at least one class target")
+        self.targets = dict(targets)
+        # Unknown classes are treated like the most relaxed one
+        self.default_class = max(self.targets, key=self.targets.get)
+
+        self._queues: Dict[str, Deque[Tuple[float, int, Any]]] = {c: deque() for c in self.targets}
+        self._waits: Dict[str, Deque[float]] = {c: deque(maxlen=stats_window) for c in self.targets}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def put(self, cls: str, item: Any, arrival: Optional[float] = None) -> str:
+        """
+        Enqueue `item` in class `cls`. `arrival` (epoch seconds) defaults to now;
+        pass the original created_at when re-queueing older tickets.
+        Returns the class actually used.
+        """
+        cls = cls if cls in self._queues else self.default_class
+        arrival = time.time() if arrival is None else arrival
+        with self._cond:
+            # Per class, deadlines grow with arrival, so keep each class sorted by arrival
+            q = self._queues[cls]
+            entry = (arrival, next(self._seq), item)
+            if q and arrival < q[-1][0]:
+                idx = len(q)
+                while idx > 0 and q[idx - 1][0] > arrival:
+                    idx -= 1
+                q.insert(idx, entry)
+            else:
+                q.append(entry)
+            self._cond.notify()
+        return cls
+
+    def _pick(self) -> Optional[str]:
+        best, best_key = None, None
+        for cls, q in self._queues.items():
+            if not q:
+                continue
+            arrival, seq, _ = q[0]
+            key = (arrival + self.targets[cls], arrival, seq)
+            if best_key is None or key < best_key:
+                best, best_key = cls, key
+        return best
+
+    def get(self, timeout: Optional[float] = None) -> Tuple[str, Any, float]:
+        """
+        Returns (class, item, waited_seconds). Raises queue.Empty on timeout.
+        """
+        with self._cond:
+            end = None if timeout is None else time.monotonic() + timeout
+            cls = self._pick()
+            while cls is None:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+                cls = self._pick()
+
+            arrival, _, item = self._queues[cls].popleft()
+            waited = max(time.time() - arrival, 0.0)
+            self._waits[cls].append(waited)
+            return cls, item, waited
+
+    def qsize(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def depth(self, cls: Optional[str] = None):
+        with self._cond:
+            if cls is not None:
+                return len(self._queues.get(cls, ()))
+            return {c: len(q) for c, q in self._queues.items()}
+
+    def wait_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-class queue wait percentiles over the last `stats_window` jobs,
+        plus the share of jobs that started within their target (SLO attainment).
+        """
+        with self._cond:
+            snapshot = {c: sorted(w) for c, w in self._waits.items()}
+
+        stats = {}
+        for cls, waits in snapshot.items():
+            target = self.targets[cls]
+            if not waits:
+                stats[cls] = {"target_seconds": target, "count": 0}
+                continue
+
+            def pct(q):
+                return round(waits[min(int(q * len(waits)), len(waits) - 1)], 4)
+
+            stats[cls] = {
+                "target_seconds": target,
+                "count": len(waits),
+                "p50": pct(0.50),
+                "p95": pct(0.95),
+                "p99": pct(0.99),
+                "max": round(waits[-1], 4),
+                "slo_attainment": round(sum(1 for w in waits if w <= target) / len(waits), 4),
+            }
+        return stats
@@ -0,0 +1,521 @@
+"""
+Disk-backed spool for ticket writes (SPOOL_ENABLED=true).
+
+/submit and the worker write tickets / status updates through write_ticket() and
+write_status(), and classify_ticket(spool=True) its prediction and events through
+write_prediction() / write_event(). While the DB is healthy they go straight to src.db; when the
+circuit breaker opens (errors or slow calls), or while older spooled records are
+still pending, they are appended to a local write-ahead log instead:
+
+    outputs/spool/tickets-<pid>.wal     one JSON record per line
+    outputs/spool/tickets-<pid>.offset  replay checkpoint (byte offset)
+
+Appends are made durable by group commit (one fsync per SPOOL_FSYNC_INTERVAL_MS).
+A background replayer drains the log into the DB in order, applying runs of
+tickets, status updates and predictions in bulk (inserts skip rows that already
+exist, so replaying a record twice is harmless). Logs left behind by a dead
+process (no longer flock'ed) are adopted and replayed; the directory is rescanned
+every SPOOL_ORPHAN_SCAN_SECONDS.
+
+Only connection-class errors (db.TRANSIENT_ERRORS) trip the breaker and spool a
+write. Any other error is a bad record, not a sick DB: a live write raises it
+to the caller, and a replayed record is moved to SPOOL_DEAD_LETTER_PATH so it
+can't stall everything behind it.
+"""
+
+import fcntl
+import glob
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from src.config import (
+    SPOOL_DIR,
+    SPOOL_FSYNC_INTERVAL_MS,
+    SPOOL_REPLAY_BATCH,
+    SPOOL_REPLAY_INTERVAL,
+    SPOOL_ORPHAN_SCAN_SECONDS,
+    SPOOL_DEAD_LETTER_PATH,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_LATENCY_MS,
+    BREAKER_COOLDOWN_SECONDS,
+)
+from src import db
+
+
+# --------------------------------------------------
+# Circuit breaker
+# --------------------------------------------------
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive errors, or when the mean
+    latency of the last `window` calls exceeds `latency_ms`.
+    open -> half_open after `cooldown_seconds`: one probe call is let through
+    (another one per cooldown if it never reports); success closes the breaker,
+    failure re-opens it.
+    Only exceptions of `failure_types` count as failures in call(); others mean
+    the DB answered (the call itself was bad) and are recorded as successes.
+    """
+
+    def __init__(self, failure_threshold: int = 3, latency_ms: float = 500.0,
+                 cooldown_seconds: float = 10.0, window: int = 20,
+                 failure_types: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.failure_threshold = failure_threshold
+        self.failure_types = failure_types
+        self.latency_s = latency_ms / 1000.0
+        self.cooldown_seconds = cooldown_seconds
+        self.window = window
+
+        self.state = "closed"
+        self._failures = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_at = None
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self.state = "half_open"
+            if self.state == "half_open":
+                now = time.monotonic()
+                if self._probe_at is None or now - self._probe_at >= self.cooldown_seconds:
+                    self._probe_at = now
+                    return True
+            self.stats["rejected"] += 1
+            return False
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_at = None
+        self._latencies.clear()
+        self.stats["opened"] += 1
+
+    def record(self, ok: bool, latency: float) -> None:
+        with self._lock:
+            if not ok:
+                self._failures += 1
+                if self.state == "half_open" or self._failures >= self.failure_threshold:
+                    self._open()
+                return
+
+            self._failures = 0
+            if self.state == "half_open":
+                self.state = "closed"
+                self._probe_at = None
+                self._latencies.clear()
+                return
+
+            self._latencies.append(latency)
+            if len(self._latencies) >= self.window // 2 and sum(self._latencies) / len(self._latencies) > self.latency_s:
+                self._open()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        Run a DB call and record its outcome (the caller checks allow() first).
+        """
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(not isinstance(e, self.failure_types), time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg = sum(self._latencies) / len(self._latencies) if self._latencies else None
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "avg_latency_ms": round(avg * 1000.0, 2) if avg is not None else None,
+                **self.stats,
+            }
+
+
+# --------------------------------------------------
+# Write-ahead log
+# --------------------------------------------------
+
+def _read_offset(path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _checkpoint(offset_path: str, size: int) -> int:
+    """
+    Replay start for a log of `size` bytes. A checkpoint past the end belongs to
+    a log that was truncated after it was written: start over.
+    """
+    offset = _read_offset(offset_path)
+    return offset if offset <= size else 0
+
+
+def _write_offset(path: str, offset: int) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Spool:
+    """
+    Append-only JSONL log owned by this process (held under an exclusive flock).
+    append() returns once its record is fsync'ed; concurrent appends share one fsync.
+    """
+
+    def __init__(self, directory: str = SPOOL_DIR, fsync_interval_ms: float = SPOOL_FSYNC_INTERVAL_MS,
+                 name: Optional[str] = None):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, name or f"tickets-{os.getpid()}.wal")
+        self.offset_path = self.path.replace(".wal", ".offset")
+        self.fsync_interval = fsync_interval_ms / 1000.0
+
+        self._f = open(self.path, "ab")
+        fcntl.flock(self._f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self._cond = threading.Condition()
+        self._size = self._f.tell()
+        self._synced_size = self._size
+        self._read_pos = _checkpoint(self.offset_path, self._size)
+        self.stats = {"appended": 0, "fsyncs": 0, "replayed": 0}
+        threading.Thread(target=self._flusher, name="spool-fsync", daemon=True).start()
+
+    # ---------- write side ----------
+    def append(self, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with self._cond:
+            self._f.write(line)
+            self._size += len(line)
+            target = self._size
+            self.stats["appended"] += 1
+            self._cond.notify_all()
+            while self._synced_size < target:
+                self._cond.wait()
+
+    def _flusher(self) -> None:
+        while True:
+            with self._cond:
+                while self._synced_size == self._size:
+                    self._cond.wait()
+            # Let concurrent appends pile up, then make them durable together
+            time.sleep(self.fsync_interval)
+            with self._cond:
+                self._f.flush()
+                os.fsync(self._f.fileno())
+                self._synced_size = self._size
+                self.stats["fsyncs"] += 1
+                self._cond.notify_all()
+
+    # ---------- replay side ----------
+    def pending(self) -> int:
+        """
+        Bytes appended but not yet replayed (including ones still waiting for fsync).
+        """
+        with self._cond:
+            return self._size - self._read_pos
+
+    def read_batch(self, max_records: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Next durable records after the checkpoint, and the offset just past them.
+        """
+        with self._cond:
+            start, end = self._read_pos, self._synced_size
+        return _read_records(self.path, start, end, max_records)
+
+    def commit(self, offset: int) -> None:
+        """
+        Checkpoint after a replayed batch; truncate the log once it is fully drained.
+        The checkpoint is written under the lock: no append can land between the
+        truncate and the reset checkpoint (a crash in between leaves an empty log,
+        whose stale checkpoint _checkpoint() discards).
+        """
+        with self._cond:
+            self._read_pos = offset
+            if offset == self._size == self._synced_size:
+                self._f.truncate(0)
+                self._f.seek(0)
+                self._size = self._synced_size = self._read_pos = 0
+                offset = 0
+            _write_offset(self.offset_path, offset)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"path": self.path, "pending_bytes": self._synced_size - self._read_pos, **self.stats}
+
+
+def _read_records(path: str, start: int, end: int, max_records: int) -> Tuple[List[Dict[str, Any]], int]:
+    records, pos = [], start
+    if end <= start:
+        return records, pos
+    with open(path, "rb") as f:
+        f.seek(start)
+        while pos < end and len(records) < max_records:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break  # torn tail (crash mid-write): never fsync'ed, so never acknowledged
+            pos += len(line)
+            records.append(json.loads(line))
+    return records, pos
+
+
+# --------------------------------------------------
+# Records -> DB
+# --------------------------------------------------
+
+def _dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _apply_run(op: str, run: List[Dict[str, Any]]) -> None:
+    if op == "ticket":
+        db.bulk_insert_incoming_tickets([
+            (r["ticket_id"], r["student_id"], r["text"], r["priority"], r["status"], _dt(r["created_at"]))
+            for r in run
+        ])
+    elif op == "status":
+        db.bulk_update_ticket_status([
+            (r["ticket_id"], r["status"], _dt(r["resolved_at"]), r["note"], _dt(r["created_at"]))
+            for r in run
+        ])
+    elif op == "prediction":
+        db.bulk_insert_predictions([
+            (r["ticket_id"], r["pred_category"], r["pred_priority"], r["confidence"], r["tier"])
+            for r in run
+        ])
+    elif op == "event":
+        for r in run:
+            db.insert_event(r["event_type"], r["payload"])
+    else:
+        raise ValueError(f"Unknown spool op '{op}'")
+
+
+def dead_letter(record: Dict[str, Any], error: Exception, path: Optional[str] = None) -> None:
+    """
+    Set aside a record the DB rejects for good (one JSON line with the error).
+    """
+    path = path or SPOOL_DEAD_LETTER_PATH
+    line = json.dumps({
+        "record": record,
+        "error": f"{type(error).__name__}: {error}",
+        "failed_at": datetime.now(timezone.utc).isoformat(),
+    }) + "\n"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    COUNTS["dead_lettered"] += 1
+    print(f"[Spool] Dead-lettered {record.get('op')} record ({type(error).__name__}: {error})")
+
+
+def apply_records(records: List[Dict[str, Any]]) -> None:
+    """
+    Apply records in log order, one bulk call per run of the same op
+    (inserts skip existing rows). Events are stored one by one: each needs
+    its own id and NOTIFY, and they are rare (High-priority / drift alerts).
+
+    Connection-class errors propagate (the batch is retried later). If a bulk
+    call fails for any other reason, its run is re-applied record by record and
+    the records that still fail are dead-lettered.
+    """
+    for op, run in itertools.groupby(records, key=lambda rec: rec.get("op")):
+        run = list(run)
+        if op != "event":
+            try:
+                _apply_run(op, run)
+                continue
+            except db.TRANSIENT_ERRORS:
+                raise
+            except Exception as e:
+                print(f"[Spool] Bulk {op} replay failed ({e}); retrying record by record")
+
+        for record in run:
+            try:
+                _apply_run(op, [record])
+            except db.TRANSIENT_ERRORS:
+                raise
+            except Exception as e:
+                dead_letter(record, e)
+
+
+def _apply_batch(records: List[Dict[str, Any]]) -> None:
+    """
+    Replay through the breaker, recorded as per-record latency: a multi-second
+    bulk batch must not look like slow live writes and re-open the breaker.
+    """
+    start = time.monotonic()
+    try:
+        apply_records(records)
+    except Exception:
+        BREAKER.record(False, time.monotonic() - start)
+        raise
+    BREAKER.record(True, (time.monotonic() - start) / len(records))
+
+
+# --------------------------------------------------
+# Process-wide spool + breaker
+# --------------------------------------------------
+
+BREAKER = CircuitBreaker(
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    latency_ms=BREAKER_LATENCY_MS,
+    cooldown_seconds=BREAKER_COOLDOWN_SECONDS,
+    failure_types=db.TRANSIENT_ERRORS,
+)
+_SPOOL: Optional[Spool] = None
+_SPOOL_LOCK = threading.Lock()
+COUNTS = {"direct": 0, "spooled": 0, "db_errors": 0, "dead_lettered": 0}
+
+
+def get_spool() -> Spool:
+    global _SPOOL
+    with _SPOOL_LOCK:
+        if _SPOOL is None:
+            _SPOOL = Spool()
+        return _SPOOL
+
+
+def _write(record: Dict[str, Any], direct: Callable[[], Any]) -> str:
+    """
+    Direct DB write when the breaker allows it and nothing older is spooled
+    (keeps per-ticket order); otherwise append to the spool. Returns "db" or "spooled".
+    Only connection-class errors are spooled; anything else is raised (retrying
+    a rejected record would only block the records behind it).
+    """
+    spool = get_spool()
+    if spool.pending() == 0 and BREAKER.allow():
+        try:
+            BREAKER.call(direct)
+            COUNTS["direct"] += 1
+            return "db"
+        except db.TRANSIENT_ERRORS as e:
+            COUNTS["db_errors"] += 1
+            print(f"[Spool] DB write failed, spooling: {e}")
+    spool.append(record)
+    COUNTS["spooled"] += 1
+    return "spooled"
+
+
+def write_ticket(ticket_id, text, created_at, student_id="Anonymous", priority="Low", status="QUEUED") -> str:
+    record = {
+        "op": "ticket", "ticket_id": ticket_id, "text": text, "created_at": created_at.isoformat(),
+        "student_id": student_id, "priority": priority, "status": status,
+    }
+    return _write(record, lambda: db.insert_incoming_ticket(ticket_id, text, created_at, student_id, priority, status))
+
+
+def write_status(ticket_id, status, resolved_at=None, note=None, created_at=None) -> str:
+    record = {
+        "op": "status", "ticket_id": ticket_id, "status": status, "note": note,
+        "resolved_at": resolved_at.isoformat() if resolved_at else None,
+        "created_at": created_at.isoformat() if created_at else None,
+    }
+    return _write(record, lambda: db.update_ticket_status(ticket_id, status, resolved_at, note, created_at=created_at))
+
+
+def write_prediction(ticket_id, pred_category, pred_priority, confidence, tier="model") -> str:
+    record = {
+        "op": "prediction", "ticket_id": ticket_id, "pred_category": pred_category,
+        "pred_priority": pred_priority, "confidence": confidence, "tier": tier,
+    }
+    return _write(record, lambda: db.insert_prediction(ticket_id, pred_category, pred_priority, confidence, tier))
+
+
+def write_event(event_type, payload) -> str:
+    record = {"op": "event", "event_type": event_type, "payload": payload}
+    return _write(record, lambda: db.insert_event(event_type, payload))
+
+
+def _replay_file(path: str) -> int:
+    """
+    Drain an orphaned log (its process is gone) and delete it.
+    """
+    offset_path = path.replace(".wal", ".offset")
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return 0  # already adopted by another process
+    with f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return 0  # still owned by a live process
+        end = os.path.getsize(path)
+        pos, replayed = _checkpoint(offset_path, end), 0
+        while pos < end:
+            records, new_pos = _read_records(path, pos, end, SPOOL_REPLAY_BATCH)
+            if not records:
+                break
+            _apply_batch(records)
+            _write_offset(offset_path, new_pos)
+            pos, replayed = new_pos, replayed + len(records)
+    os.remove(path)
+    if os.path.exists(offset_path):
+        os.remove(offset_path)
+    print(f"[Spool] Replayed orphaned log {path} ({replayed} records)")
+    return replayed
+
+
+def _find_orphans(spool: Spool) -> List[str]:
+    return [p for p in glob.glob(os.path.join(os.path.dirname(spool.path), "*.wal")) if p != spool.path]
+
+
+def replay_loop() -> None:
+    spool = get_spool()
+    orphans = _find_orphans(spool)
+    scanned_at = time.monotonic()
+
+    while True:
+        # Logs of processes that died after we started (other workers, batch jobs)
+        if not orphans and time.monotonic() - scanned_at >= SPOOL_ORPHAN_SCAN_SECONDS:
+            orphans = _find_orphans(spool)
+            scanned_at = time.monotonic()
+
+        # Only ask the breaker when there is work (in half-open state that is the probe)
+        if (not orphans and spool.pending() == 0) or not BREAKER.allow():
+            time.sleep(SPOOL_REPLAY_INTERVAL)
+            continue
+        try:
+            while orphans:
+                _replay_file(orphans[0])
+                orphans.pop(0)
+
+            records, offset = spool.read_batch(SPOOL_REPLAY_BATCH)
+            if not records:
+                time.sleep(SPOOL_REPLAY_INTERVAL)  # appended but not fsync'ed yet
+                continue
+            _apply_batch(records)
+            spool.commit(offset)
+            spool.stats["replayed"] += len(records)
+        except Exception as e:
+            print(f"[Spool] Replay failed, will retry: {e}")
+            time.sleep(SPOOL_REPLAY_INTERVAL)
+
+
+def start_replayer() -> None:
+    threading.Thread(target=replay_loop, name="spool-replayer", daemon=True).start()
+
+
+def spool_stats() -> Dict[str, Any]:
+    return {
+        "breaker": BREAKER.snapshot(),
+        "spool": get_spool().snapshot(),
+        **COUNTS,
+    }
@@ -0,0 +1,166 @@
+"""
+In-process SQLite storage backend (DB_BACKEND=sqlite).
+
+Same tables and semantics as db_init.sql, so the helpers in src/db.py run unchanged:
+queries are written in the Postgres dialect and translated here (%s -> ?, no schema prefix).
+Intended for hermetic benchmarks / load tests; ":memory:" keeps everything in the process.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from src.config import SQLITE_PATH
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id VARCHAR(50) PRIMARY KEY,
+    student_id VARCHAR(50) DEFAULT 'Anonymous',
+    text TEXT NOT NULL,
+    true_category VARCHAR(50) DEFAULT 'Unknown',
+    true_priority VARCHAR(20) DEFAULT 'Unknown',
+    requested_priority VARCHAR(20) DEFAULT 'Low',
+    status VARCHAR(20) DEFAULT 'QUEUED',
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    resolved_at TIMESTAMP,
+    resolution_note TEXT
+);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id VARCHAR(50) UNIQUE REFERENCES tickets(ticket_id) ON DELETE CASCADE,
+    pred_category VARCHAR(50) NOT NULL,
+    pred_priority VARCHAR(20) NOT NULL,
+    confidence DOUBLE PRECISION,
+    tier VARCHAR(20) NOT NULL DEFAULT 'model',
+    processed_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSON NOT NULL,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_accuracy DOUBLE PRECISION,
+    precision_macro DOUBLE PRECISION,
+    recall_macro DOUBLE PRECISION,
+    f1_macro DOUBLE PRECISION,
+    avg_confidence DOUBLE PRECISION,
+    computed_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_student_id ON tickets(student_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_deferred ON tickets(created_at) WHERE status = 'DEFERRED';
+CREATE INDEX IF NOT EXISTS idx_predictions_ticket_id ON predictions(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_processed_at ON predictions(processed_at);
+CREATE INDEX IF NOT EXISTS idx_events_created_at ON events(created_at);
+"""
+
+
+# --------------------------------------------------
+# Type adapters (match psycopg2: tz-aware datetimes, JSON payloads as dicts)
+# --------------------------------------------------
+
+def _adapt_datetime(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _convert_timestamp(raw: bytes) -> datetime:
+    value = datetime.fromisoformat(raw.decode("utf-8"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("JSON", lambda raw: json.loads(raw.decode("utf-8")))
+
+
+@lru_cache(maxsize=256)
+def _translate(sql: str) -> str:
+    """
+    Postgres dialect -> SQLite: placeholders, schema prefix and row locks
+    (a single connection already serializes writers).
+    """
+    sql = sql.replace("%s", "?").replace("FOR UPDATE SKIP LOCKED", "")
+    return re.sub(r"\bpublic\.", "", sql)
+
+
+class SQLiteCursor:
+    """
+    Thin cursor wrapper returning dict rows (like RealDictCursor).
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cur = cursor
+
+    def execute(self, sql, params=()):
+        self._cur.execute(_translate(sql), tuple(params))
+
+    def executemany(self, sql, seq_of_params):
+        self._cur.executemany(_translate(sql), [tuple(p) for p in seq_of_params])
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(r) for r in self._cur.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def close(self):
+        self._cur.close()
+
+
+# One shared connection: required for ":memory:" and cheap for a local file.
+# The lock serializes transactions across threads (API worker + request handlers).
+_conn = None
+_lock = threading.RLock()
+
+
+def get_connection() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(
+                SQLITE_PATH,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+            )
+            _conn.row_factory = sqlite3.Row
+            _conn.execute("PRAGMA foreign_keys = ON;")
+            if SQLITE_PATH != ":memory:":
+                _conn.execute("PRAGMA journal_mode = WAL;")
+            _conn.executescript(SCHEMA)
+        return _conn
+
+
+@contextmanager
+def get_cursor():
+    with _lock:
+        conn = get_connection()
+        cursor = SQLiteCursor(conn.cursor())
+        try:
+            yield cursor
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            cursor.close()
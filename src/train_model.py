@@ -1,9 +1,12 @@
+import argparse
 import os
+import numpy as np
 import pandas as pd
 from typing import Tuple
 
 from joblib import dump
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold, cross_val_predict, train_test_split
 from sklearn.metrics import accuracy_score
 from sklearn.pipeline import Pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -12,13 +15,17 @@ from sklearn.linear_model import LogisticRegression
 from src.config import (
     OUTPUT_DIR,
     CATEGORY_MODEL_PATH,
-    PRIORITY_MODEL_PATH
+    PRIORITY_MODEL_PATH,
+    DRIFT_REFERENCE_FOLDS,
 )
 from src.db import fetch_all_tickets
+from src.drift import build_reference
+from src.inference_service import escalates
+from src.profiler import add_profile_args, run_entry_point
 
 
-def _load_training_data() -> pd.DataFrame:
-    rows = fetch_all_tickets()
+def _load_training_data(max_staleness=None) -> pd.DataFrame:
+    rows = fetch_all_tickets(max_staleness=max_staleness)
     if not rows:
         raise RuntimeError("No tickets found in DB. Run data_generation first.")
 
@@ -28,10 +35,13 @@ def _load_training_data() -> pd.DataFrame:
     return df
 
 
-def train_models(test_size: float = 0.2, seed: int = 42) -> Tuple[float, float]:
-
-    df = _load_training_data()
-
+def fit_models(
+    df: pd.DataFrame, test_size: float = 0.2, seed: int = 42
+) -> Tuple[Pipeline, Pipeline, float, float, pd.Series]:
+    """
+    Fit both pipelines on a tickets DataFrame (no DB / disk access).
+    Returns (category_pipeline, priority_pipeline, category_acc, priority_acc, X_test).
+    """
     X = df["text"]
     y_cat = df["true_category"]
     y_pri = df["true_priority"]
@@ -80,11 +90,49 @@ def train_models(test_size: float = 0.2, seed: int = 42) -> Tuple[float, float]:
     cat_acc = accuracy_score(y_cat_test, cat_pred)
     pri_acc = accuracy_score(y_pri_test, pri_pred)
 
+    return category_pipeline, priority_pipeline, cat_acc, pri_acc, X_test
+
+
+def build_drift_reference(df: pd.DataFrame, category_pipeline: Pipeline, priority_pipeline: Pipeline,
+                          folds: int = DRIFT_REFERENCE_FOLDS, seed: int = 42):
+    """
+    Drift reference over the whole dataset rather than the small held-out split:
+    out-of-fold predictions (each ticket scored by models that never saw it), so
+    confidences look like production ones. Only tickets the cascade escalates to
+    the models are kept, since those are the only ones the monitor observes.
+    """
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    outputs = []
+    for pipeline, y in ((category_pipeline, df["true_category"]), (priority_pipeline, df["true_priority"])):
+        proba = cross_val_predict(clone(pipeline), df["text"], y, cv=cv.split(df["text"], df["true_category"]),
+                                  method="predict_proba")
+        outputs.append((np.unique(y)[proba.argmax(axis=1)], proba.max(axis=1)))
+    (categories, cat_conf), (priorities, pri_conf) = outputs
+
+    keep = np.array([escalates(t) for t in df["text"]], dtype=bool)
+    return build_reference(
+        texts=df["text"][keep],
+        categories=categories[keep],
+        priorities=priorities[keep],
+        confidences=((cat_conf + pri_conf) / 2.0)[keep],
+    )
+
+
+def train_models(test_size: float = 0.2, seed: int = 42, max_staleness: float = None) -> Tuple[float, float]:
+    """
+    max_staleness=0 reads the primary (e.g. right after tickets were generated).
+    """
+    df = _load_training_data(max_staleness=max_staleness)
+
+    category_pipeline, priority_pipeline, cat_acc, pri_acc, _ = fit_models(df, test_size=test_size, seed=seed)
+
     # Save models
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     dump(category_pipeline, CATEGORY_MODEL_PATH)
     dump(priority_pipeline, PRIORITY_MODEL_PATH)
 
+    build_drift_reference(df, category_pipeline, priority_pipeline, seed=seed)
+
     print(f"[OK] Saved category model -> {CATEGORY_MODEL_PATH}")
     print(f"[OK] Saved priority model -> {PRIORITY_MODEL_PATH}")
     print(f"[Baseline] Category accuracy: {cat_acc:.4f}")
@@ -94,4 +142,6 @@ def train_models(test_size: float = 0.2, seed: int = 42) -> Tuple[float, float]:
 
 
 if __name__ == "__main__":
-    train_models()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train category + priority models")
+    add_profile_args(parser, "train_model")
+    run_entry_point(train_models, parser.parse_args())
\ No newline at end of file
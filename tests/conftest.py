@@ -0,0 +1,51 @@
+"""
+Tests run against the in-process SQLite backend with a throwaway OUTPUT_DIR.
+src.config reads the environment at import time, so this must run before any
+src module is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = ":memory:"
+os.environ["OUTPUT_DIR"] = tempfile.mkdtemp(prefix="tickets-tests-")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uuid  # noqa: E402
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def new_id():
+    """
+    Unique ids: every test shares the one in-memory database.
+    """
+    return lambda prefix="t": f"{prefix}-{uuid.uuid4().hex[:10]}"
+
+
+@pytest.fixture(scope="session")
+def fitted_models():
+    """
+    Small fitted (category, priority) pipelines, so tests don't need the models/ files.
+    """
+    import pandas as pd
+
+    from src.data_generation import generate_tickets
+    from src.train_model import fit_models
+
+    category_model, priority_model, *_ = fit_models(pd.DataFrame(generate_tickets(n_samples=300, seed=5)), seed=5)
+    return category_model, priority_model
+
+
+@pytest.fixture
+def use_fitted_models(fitted_models):
+    from src import inference_service
+
+    previous = (inference_service._category_model, inference_service._priority_model)
+    inference_service.use_models(*fitted_models)
+    yield
+    inference_service.use_models(*previous)
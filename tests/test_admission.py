@@ -0,0 +1,62 @@
+import pytest
+
+from src import admission
+from src.admission import AdmissionController, TokenBucket, parse_priority_limits, retry_after_header
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_parse_priority_limits():
+    assert parse_priority_limits("High=0, Medium=500,Low=200") == {"High": 0, "Medium": 500, "Low": 200}
+    assert parse_priority_limits("") == {}
+
+
+def test_token_bucket_burst_then_refill(clock):
+    bucket = TokenBucket(rate=0.5, burst=2)
+    assert bucket.take() == 0.0 and bucket.take() == 0.0
+    assert bucket.take() == pytest.approx(2.0)  # one token every 2 s
+
+    clock[0] += 1.0
+    assert bucket.take() == pytest.approx(1.0)  # half a token banked
+    clock[0] += 1.0
+    assert bucket.take() == 0.0
+
+    clock[0] += 60
+    assert [bucket.take() for _ in range(3)][:2] == [0.0, 0.0]  # capped at burst
+
+
+def test_check_rate_is_per_student(clock):
+    controller = AdmissionController({}, student_rate=1.0, student_burst=1)
+    assert controller.check_rate("S1") == 0.0
+    assert controller.check_rate("S1") == pytest.approx(1.0)
+    assert controller.check_rate("S2") == 0.0
+
+    assert AdmissionController({}).check_rate("S1") == 0.0  # rate 0: unlimited
+
+
+def test_student_buckets_are_bounded(clock):
+    controller = AdmissionController({}, student_rate=1.0, student_burst=1, max_students=2)
+    for student_id in ("S1", "S2", "S3"):
+        controller.check_rate(student_id)
+    assert list(controller._buckets) == ["S2", "S3"]
+
+
+def test_check_depth_sizes_retry_after_from_service_time():
+    controller = AdmissionController({"Low": 2})
+    assert controller.check_depth("Low", 1) == (True, 0.0)
+    assert controller.check_depth("High", 10_000) == (True, 0.0)  # no limit
+
+    controller._avg_service_s = 3.0
+    assert controller.check_depth("Low", 4) == (False, 9.0)  # 3 tickets ahead of the limit
+    controller._avg_service_s = 0.01
+    assert controller.check_depth("Low", 2) == (False, 1.0)  # at least a second
+
+
+def test_retry_after_header_rounds_up():
+    assert retry_after_header(0.2) == "1"
+    assert retry_after_header(2.0) == "2"
@@ -0,0 +1,115 @@
+"""
+API endpoints through TestClient. The lifespan (model warm-up, worker,
+listener) is not run: submitted tickets stay in JOB_QUEUE.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+from src.admission import AdmissionController
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+TEXT = "I cannot log in to the student portal, it says my password is invalid since this morning."
+
+
+def submit(client, student_id, text=TEXT, priority="Low"):
+    return client.post("/submit", json={"student_id": student_id, "text": text, "priority": priority})
+
+
+def test_resubmission_is_flagged(client, monkeypatch, new_id):
+    monkeypatch.setattr(main, "DEDUP_ENABLED", True)
+    student_id = new_id("S")
+    first = submit(client, student_id).json()
+    second = submit(client, student_id).json()
+    assert first["duplicate_of"] is None
+    assert second["duplicate_of"] == first["ticket_id"]
+
+
+def test_failed_save_is_not_indexed(client, monkeypatch, new_id):
+    monkeypatch.setattr(main, "DEDUP_ENABLED", True)
+    student_id = new_id("S")
+    save = main.save_ticket
+
+    def failing_save(*args, **kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(main, "save_ticket", failing_save)
+    with pytest.raises(RuntimeError):
+        submit(client, student_id)
+
+    monkeypatch.setattr(main, "save_ticket", save)
+    assert submit(client, student_id).json()["duplicate_of"] is None
+
+
+def test_queue_full_shed_keeps_the_rate_token(client, monkeypatch, new_id):
+    monkeypatch.setattr(main, "ADMISSION", AdmissionController({"Low": 1}, student_rate=0.001, student_burst=1))
+    monkeypatch.setattr(main, "ADMISSION_OVERLOAD_MODE", "reject")
+    student_id = new_id("S")
+
+    monkeypatch.setattr(main.JOB_QUEUE, "depth", lambda priority: 5)
+    shed = submit(client, student_id)
+    assert shed.status_code == 429 and "queue is full" in shed.json()["detail"]
+    assert int(shed.headers["Retry-After"]) >= 1
+
+    monkeypatch.setattr(main.JOB_QUEUE, "depth", lambda priority: 0)
+    assert submit(client, student_id).status_code == 200
+
+    limited = submit(client, student_id)
+    assert limited.status_code == 429 and "Too many tickets" in limited.json()["detail"]
+    assert int(limited.headers["Retry-After"]) > 900
+    assert main.ADMISSION.snapshot()["shed"] == {"queue_full": {"Low": 1}, "rate_limited": {"Low": 1}}
+
+
+@pytest.mark.parametrize("cache_enabled", [False, True])
+def test_ticket_history_has_status_counts(client, monkeypatch, new_id, cache_enabled):
+    monkeypatch.setattr(main, "HISTORY_CACHE_ENABLED", cache_enabled)
+    student_id = new_id("S")
+    for text in ("Wifi down", "Fee query"):
+        assert submit(client, student_id, text=text).status_code == 200
+
+    body = client.get("/tickets", params={"student_id": student_id}).json()
+    assert len(body["tickets"]) == 2
+    assert body["status_counts"] == {"QUEUED": 2}
+
+
+def test_profile_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    url = "/admin/profile?seconds=0.05&interval=0.01"
+    assert client.get(url).status_code == 403
+    assert client.get(url, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get(url, headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    assert client.get(url, headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_event_stream_is_opt_in(client, monkeypatch):
+    monkeypatch.setattr(main, "EVENT_STREAM_ENABLED", False)
+    assert client.get("/events/stream").status_code == 404
+
+
+def test_ready_reports_startup(monkeypatch):
+    monkeypatch.setattr(main, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(main, "EVENT_STREAM_ENABLED", False)
+    monkeypatch.setattr(main, "STARTUP", dict(main.STARTUP, warm=False, error=None))
+    monkeypatch.setattr(main, "start_worker", lambda: None)
+
+    def failing_warm_up():
+        raise FileNotFoundError("models/category_model.joblib")
+
+    monkeypatch.setattr(main, "warm_up_models", failing_warm_up)
+    with TestClient(main.app) as client:  # runs the lifespan
+        response = client.get("/ready")
+    assert response.status_code == 503
+    assert "Model warm-up failed" in response.json()["error"]
+
+    monkeypatch.setattr(main, "warm_up_models", lambda: {"load_seconds": 0.1})
+    with TestClient(main.app) as client:
+        response = client.get("/ready")
+    assert response.status_code == 200 and response.json()["warmup"] == {"load_seconds": 0.1}
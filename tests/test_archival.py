@@ -0,0 +1,164 @@
+"""
+ensure_partitions / archive_partitions: the Python side runs on any backend;
+the SQL itself needs Postgres. Set TEST_POSTGRES_DSN to a throwaway database to run
+those tests (db_init.sql drops and recreates every table there).
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+
+from src import archival
+from src.archival import _add_months
+
+TEST_POSTGRES_DSN = os.getenv("TEST_POSTGRES_DSN")
+DB_INIT_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db_init.sql")
+
+
+def test_add_months_crosses_years():
+    assert _add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert _add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert _add_months(date(2025, 6, 1), 0) == date(2025, 6, 1)
+
+
+def test_ensure_partitions_is_a_noop_on_sqlite():
+    assert archival.ensure_partitions() == {}
+
+
+def test_ensure_partitions_covers_every_table(monkeypatch):
+    calls = []
+
+    class FakeCursor:
+        def execute(self, sql, params):
+            calls.append(params)
+
+        def fetchone(self):
+            return {"created": 1}
+
+    @contextmanager
+    def fake_cursor():
+        yield FakeCursor()
+
+    monkeypatch.setattr(archival, "DB_BACKEND", "postgres")
+    monkeypatch.setattr(archival, "get_cursor", fake_cursor)
+
+    assert archival.ensure_partitions(months_ahead=3) == {t: 1 for t in archival.PARTITIONED_TABLES}
+    # Current month + 3 ahead
+    assert calls == [(t, 4) for t in archival.PARTITIONED_TABLES]
+
+
+def test_archive_detaches_and_prunes_keys_without_drop(monkeypatch, tmp_path):
+    statements = []
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            statements.append(" ".join(sql.split()))
+
+    @contextmanager
+    def fake_cursor():
+        yield FakeCursor()
+
+    old = _add_months(date.today().replace(day=1), -24)
+    monkeypatch.setattr(archival, "DB_BACKEND", "postgres")
+    monkeypatch.setattr(archival, "get_cursor", fake_cursor)
+    monkeypatch.setattr(archival, "list_partitions", lambda table: [(f"{table}_p{old:%Y_%m}", old)])
+    monkeypatch.setattr(archival, "_export_partition", lambda cur, table, partition: str(tmp_path / partition))
+
+    archived = archival.archive_partitions(older_than_months=12)
+
+    assert [a["table"] for a in archived] == list(archival.PARTITIONED_TABLES)
+    assert not any(s.startswith("DROP") for s in statements)
+    deletes = [s for s in statements if s.startswith("DELETE")]
+    assert [s.split()[2] for s in deletes] == ["public.ticket_keys", "public.prediction_keys", "public.ticket_keys"]
+    assert all("NOT EXISTS" in s for s in deletes if "ticket_keys" in s)
+
+
+# --------------------------------------------------
+# Postgres (db_init.sql)
+# --------------------------------------------------
+
+@pytest.fixture
+def pg():
+    if not TEST_POSTGRES_DSN:
+        pytest.skip("TEST_POSTGRES_DSN not set")
+    psycopg2 = pytest.importorskip("psycopg2")
+
+    conn = psycopg2.connect(TEST_POSTGRES_DSN)
+    conn.autocommit = True
+    with conn.cursor() as cur, open(DB_INIT_SQL, encoding="utf-8") as f:
+        cur.execute(f.read())
+    yield conn
+    conn.close()
+
+
+def _one(conn, sql, params=()):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchone()[0]
+
+
+def test_ensure_partitions_moves_rows_out_of_default(pg):
+    # db_init.sql creates partitions through 3 months ahead; 6 months ahead lands in DEFAULT
+    month = _one(pg, "SELECT (date_trunc('month', CURRENT_DATE) + INTERVAL '6 months')::date;")
+    part = f"tickets_p{month:%Y_%m}"
+    with pg.cursor() as cur:
+        cur.execute(
+            "INSERT INTO public.tickets (ticket_id, text, created_at) VALUES ('future-1', 'x', %s), ('future-2', 'y', %s);",
+            (month, _add_months(month, 1)),
+        )
+    assert _one(pg, "SELECT count(*) FROM public.tickets_default;") == 2
+
+    assert _one(pg, "SELECT public.ensure_partitions('tickets', %s, 1);", (month,)) == 1
+    assert _one(pg, f'SELECT array_agg(ticket_id) FROM public."{part}";') == ["future-1"]
+    assert _one(pg, "SELECT array_agg(ticket_id) FROM public.tickets_default;") == ["future-2"]
+    assert _one(pg, "SELECT public.ensure_partitions('tickets', %s, 1);", (month,)) == 0
+
+
+def test_ticket_ids_stay_unique_across_partitions(pg):
+    with pg.cursor() as cur:
+        cur.execute(
+            "INSERT INTO public.tickets (ticket_id, text, created_at) VALUES ('dup', 'first', now());"
+        )
+        cur.execute(
+            "INSERT INTO public.tickets (ticket_id, text, created_at) VALUES ('dup', 'again', now() - INTERVAL '2 months');"
+        )
+        assert cur.rowcount == 0  # skipped by the ticket_keys trigger, like ON CONFLICT DO NOTHING
+
+        with pytest.raises(Exception):
+            cur.execute("INSERT INTO public.predictions (ticket_id, pred_category, pred_priority) VALUES ('nope', 'IT', 'Low');")
+    assert _one(pg, "SELECT count(*) FROM public.tickets WHERE ticket_id = 'dup';") == 1
+
+
+def test_archive_keeps_keys_of_live_predictions(pg, monkeypatch, tmp_path):
+    from psycopg2.extras import RealDictCursor
+
+    @contextmanager
+    def pg_cursor():
+        with pg.cursor(cursor_factory=RealDictCursor) as cur:
+            yield cur
+
+    monkeypatch.setattr(archival, "DB_BACKEND", "postgres")
+    monkeypatch.setattr(archival, "get_cursor", pg_cursor)
+    monkeypatch.setattr(archival, "ARCHIVE_DIR", str(tmp_path))
+    # A ticket at the end of the oldest archived month, classified in the next (live) month
+    old = _one(pg, "SELECT (date_trunc('month', CURRENT_DATE) - INTERVAL '12 months')::date;")
+    with pg.cursor() as cur:
+        cur.execute(
+            "INSERT INTO public.tickets (ticket_id, text, created_at) VALUES ('old-1', 'x', %s), ('edge', 'y', %s);",
+            (old, _add_months(old, 1) - timedelta(minutes=1)),
+        )
+        cur.execute(
+            "INSERT INTO public.predictions (ticket_id, pred_category, pred_priority, processed_at) "
+            "VALUES ('old-1', 'IT', 'Low', %s), ('edge', 'IT', 'Low', %s);",
+            (old, _add_months(old, 1)),
+        )
+
+    archival.archive_partitions(older_than_months=11)
+    assert _one(pg, "SELECT array_agg(ticket_id) FROM public.ticket_keys;") == ["edge"]
+    assert _one(pg, "SELECT array_agg(ticket_id) FROM public.prediction_keys;") == ["edge"]
+
+    archival.archive_partitions(older_than_months=10)
+    assert _one(pg, "SELECT count(*) FROM public.ticket_keys;") == 0
+    assert _one(pg, "SELECT count(*) FROM public.prediction_keys;") == 0
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from src import artifacts
+from src.artifacts import read_dataset, write_dataset
+
+
+def _frame(days, run):
+    return pd.DataFrame({
+        "day": days,
+        "pred_category": ["IT"] * len(days),
+        "confidence": [0.5 + i / 10 for i in range(len(days))],
+        "run": [run] * len(days),
+        "processed_at": pd.Timestamp("2026-02-01", tz="UTC"),
+    })
+
+
+@pytest.mark.parametrize("fmt, csv, parquet", [("csv", True, False), ("parquet", False, True), ("both", True, True)])
+def test_output_format(monkeypatch, fmt, csv, parquet):
+    monkeypatch.setattr(artifacts, "OUTPUT_FORMAT", fmt)
+    assert (artifacts.writes_csv(), artifacts.writes_parquet()) == (csv, parquet)
+
+
+def test_runs_append_and_reads_prune_days(tmp_path):
+    path = str(tmp_path / "predictions")
+    write_dataset(_frame(["2026-02-01", "2026-02-02"], "a"), path, run_id="a")
+    write_dataset(_frame(["2026-02-02", "2026-02-03"], "b"), path, run_id="b")
+
+    every = read_dataset(path)
+    assert len(every) == 4
+    assert str(every["processed_at"].dt.tz) == "UTC"  # types are kept
+
+    feb2 = read_dataset(path, columns=["run", "confidence"], start_day="2026-02-02", end_day="2026-02-02")
+    assert list(feb2.columns) == ["run", "confidence"]
+    assert sorted(feb2["run"]) == ["a", "b"]
+    assert len(read_dataset(path, start_day="2026-02-03")) == 1
+
+
+def test_missing_or_empty_dataset(tmp_path):
+    path = str(tmp_path / "none")
+    assert read_dataset(path, columns=["run"]).empty
+    write_dataset(_frame([], "a"), path, run_id="a")
+    assert read_dataset(path).empty
+
+    with pytest.raises(ValueError):
+        write_dataset(_frame(["2026-02-01"], "a").drop(columns="day"), path, run_id="a")
@@ -0,0 +1,45 @@
+import pytest
+
+from src import benchmark, db
+from src.benchmark import _percentile, bench_db, compare_results
+
+
+def _report(**values):
+    return {"results": {k: {"value": v, "unit": "s", "better": "higher" if k.endswith("per_s") else "lower"}
+                        for k, v in values.items()}}
+
+
+def test_percentile():
+    assert _percentile([5, 1, 3, 2, 4], 0.5) == 3
+    assert _percentile([5, 1, 3, 2, 4], 0.95) == 5
+
+
+def test_compare_flags_regressions_in_both_directions():
+    baseline = _report(train=1.0, items_per_s=1000.0, gone=1.0)
+    current = _report(train=1.4, items_per_s=700.0)
+    regressions = compare_results(current, baseline, threshold=0.25)
+    assert [r.split(":")[0] for r in regressions] == ["train", "items_per_s"]
+
+    assert compare_results(_report(train=1.2, items_per_s=900.0), baseline, threshold=0.25) == []
+
+
+def test_bench_db_removes_its_rows():
+    results = {}
+    bench_db(results, round_trips=3)
+
+    assert set(results) == {
+        "db.insert_incoming_ticket.p50_ms", "db.update_ticket_status.p50_ms",
+        "db.insert_prediction.p50_ms", "db.fetch_tickets_by_student.p50_ms",
+    }
+    assert not [t for t in db.fetch_all_tickets() if t["ticket_id"].startswith("bench-")]
+    assert not [p for p in db.fetch_all_predictions() if p["ticket_id"].startswith("bench-")]
+
+
+def test_bench_db_cleans_up_after_a_failure(monkeypatch):
+    def failing_prediction(*args, **kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(benchmark.db, "insert_prediction", failing_prediction)
+    with pytest.raises(RuntimeError):
+        bench_db({}, round_trips=2)
+    assert not [t for t in db.fetch_all_tickets() if t["ticket_id"].startswith("bench-")]
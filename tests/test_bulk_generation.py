@@ -0,0 +1,60 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from src.bulk_generation import generate_chunk, generate_dataset, make_spec, parse_weights
+from src.config import CATEGORIES
+from src.data_generation import CONFUSION_MAP, TEMPLATES
+
+TEMPLATE_CATEGORY = {template: cat for cat, templates in TEMPLATES.items() for template in templates}
+
+
+def _template_category(text):
+    return next(cat for template, cat in TEMPLATE_CATEGORY.items() if text.startswith(template))
+
+
+def test_parse_weights():
+    assert parse_weights(None, CATEGORIES) is None
+    weights = parse_weights("IT=3,Fees=1", CATEGORIES)
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights[CATEGORIES.index("IT")] == pytest.approx(0.75)
+
+    with pytest.raises(ValueError):
+        parse_weights("Library=1", CATEGORIES)
+    with pytest.raises(ValueError):
+        parse_weights("IT=0", CATEGORIES)
+
+
+def test_confusion_map_covers_every_category():
+    assert set(CONFUSION_MAP) == set(CATEGORIES)
+    assert all(set(targets) <= set(CATEGORIES) - {cat} for cat, targets in CONFUSION_MAP.items())
+
+
+@pytest.mark.parametrize("mislabel_rate", [0.0, 1.0])
+def test_labels_follow_the_confusion_map(mislabel_rate):
+    chunk = generate_chunk(np.random.default_rng(0), 500, make_spec(mislabel_rate=mislabel_rate))
+    for text, label in zip(chunk["text"], chunk["true_category"]):
+        cat = _template_category(text)
+        assert label == cat if mislabel_rate == 0 else label in CONFUSION_MAP[cat]
+
+
+def test_priority_weights_set_the_priority_mix():
+    chunk = generate_chunk(np.random.default_rng(0), 300, make_spec(priority_weights="High=1"))
+    assert set(chunk["true_priority"]) == {"High"}
+
+
+def test_output_does_not_depend_on_workers(tmp_path):
+    def rows(workers):
+        out_dir = tmp_path / f"w{workers}"
+        generate_dataset(1000, seed=3, out="csv", out_dir=str(out_dir), workers=workers,
+                         shard_size=300, chunk_size=100, spec=make_spec(start="2025-01-01"))
+        lines = []
+        for path in sorted(out_dir.iterdir()):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                lines += f.read().splitlines()[1:]
+        return lines
+
+    single = rows(1)
+    assert len(single) == 1000
+    assert rows(2) == single
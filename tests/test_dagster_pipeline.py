@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+dagster = pytest.importorskip("dagster")
+
+from dagster_pipeline import daily_batch_inference, daily_monitoring_report  # noqa: E402
+from src import db  # noqa: E402
+
+
+@pytest.mark.usefixtures("use_fitted_models")
+def test_daily_partition_covers_its_day_only(new_id):
+    day = pd.Timestamp("2026-01-05", tz="UTC")
+    for hours in (3, 9, 27):  # the last one belongs to the next partition
+        db.insert_ticket(new_id(), "I was charged twice for tuition.", "Fees", "Low",
+                         (day + pd.Timedelta(hours=hours)).to_pydatetime())
+
+    result = dagster.materialize([daily_batch_inference, daily_monitoring_report], partition_key="2026-01-05")
+    assert result.success
+    assert result.output_for_node("daily_batch_inference")["rows"] == 2
+    assert result.output_for_node("daily_monitoring_report")["n_predictions"] == 2
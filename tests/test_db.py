@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import db
+from src.sqlite_backend import _translate
+
+
+def test_translate_postgres_dialect():
+    sql = "SELECT * FROM public.tickets WHERE id = %s FOR UPDATE SKIP LOCKED;"
+    assert _translate(sql) == "SELECT * FROM tickets WHERE id = ? ;"
+
+
+def test_incoming_ticket_round_trip(new_id):
+    ticket_id, student_id = new_id(), new_id("S")
+    created_at = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    db.insert_incoming_ticket(ticket_id, "Wifi down", created_at, student_id, priority="High")
+    db.insert_incoming_ticket(ticket_id, "resubmitted", created_at, student_id)  # skipped, like ON CONFLICT
+
+    (row,) = db.fetch_tickets_by_student(student_id)
+    assert row["text"] == "Wifi down"
+    assert row["requested_priority"] == "High" and row["status"] == "QUEUED"
+    # tz-aware datetimes, like psycopg2
+    assert row["created_at"] == created_at
+
+
+def test_tickets_by_student_newest_first_and_since(new_id):
+    student_id = new_id("S")
+    now = datetime.now(timezone.utc)
+    old, new = new_id(), new_id()
+    db.insert_incoming_ticket(old, "old", now - timedelta(days=40), student_id)
+    db.insert_incoming_ticket(new, "new", now, student_id)
+
+    assert [r["ticket_id"] for r in db.fetch_tickets_by_student(student_id)] == [new, old]
+    assert [r["ticket_id"] for r in db.fetch_tickets_by_student(student_id, since=now - timedelta(days=1))] == [new]
+
+
+def test_bulk_insert_tickets_is_idempotent(new_id):
+    now = datetime.now(timezone.utc)
+    rows = [(new_id(), f"text {i}", "IT", "Low", now) for i in range(3)]
+    assert db.bulk_insert_tickets(rows) == 3
+    db.bulk_insert_tickets(rows)
+    ids = {r[0] for r in rows}
+    assert len([t for t in db.fetch_all_tickets(since=now) if t["ticket_id"] in ids]) == 3
+
+
+def test_claim_deferred_orders_by_priority_then_age(new_id):
+    student_id = new_id("S")
+    now = datetime.now(timezone.utc)
+    low, high_new, high_old = new_id(), new_id(), new_id()
+    db.insert_incoming_ticket(low, "l", now - timedelta(hours=2), student_id, "Low", "DEFERRED")
+    db.insert_incoming_ticket(high_new, "h", now, student_id, "High", "DEFERRED")
+    db.insert_incoming_ticket(high_old, "h", now - timedelta(hours=1), student_id, "High", "DEFERRED")
+
+    # RETURNING order is unspecified; the claim order shows with one ticket per call
+    claimed = [db.claim_deferred_tickets(limit=1)[0]["ticket_id"] for _ in range(3)]
+    assert claimed == [high_old, high_new, low]
+    assert db.claim_deferred_tickets(limit=1) == []
+    assert {r["status"] for r in db.fetch_tickets_by_student(student_id)} == {"QUEUED"}
+
+
+def test_status_update_sets_resolution(new_id):
+    ticket_id, student_id = new_id(), new_id("S")
+    now = datetime.now(timezone.utc)
+    db.insert_incoming_ticket(ticket_id, "x", now, student_id)
+    db.update_ticket_status(ticket_id, "RESOLVED", now, "AI Classified: IT", created_at=now)
+
+    (row,) = db.fetch_tickets_by_student(student_id)
+    assert (row["status"], row["resolved_at"], row["resolution_note"]) == ("RESOLVED", now, "AI Classified: IT")
+
+
+def test_prediction_needs_ticket_and_keeps_first(new_id):
+    ticket_id = new_id()
+    db.insert_incoming_ticket(ticket_id, "x", datetime.now(timezone.utc))
+    db.insert_prediction(ticket_id, "IT", "High", 0.9)
+    db.insert_prediction(ticket_id, "Finance", "Low", 0.5)
+
+    (pred,) = [p for p in db.fetch_all_predictions() if p["ticket_id"] == ticket_id]
+    assert (pred["pred_category"], pred["confidence"], pred["tier"]) == ("IT", 0.9, "model")
+
+    with pytest.raises(Exception):
+        db.insert_prediction(new_id(), "IT", "High", 0.9)
+
+
+def test_unclassified_between(new_id):
+    start = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    done, todo, outside = new_id(), new_id(), new_id()
+    for ticket_id, created_at in ((done, start), (todo, start + timedelta(hours=1)), (outside, start - timedelta(hours=1))):
+        db.insert_incoming_ticket(ticket_id, "x", created_at)
+    db.insert_prediction(done, "IT", "Low", 0.7)
+
+    rows = db.fetch_unclassified_tickets_between(start, start + timedelta(days=1))
+    assert [r["ticket_id"] for r in rows] == [todo]
+
+
+def test_events_round_trip_json_payload():
+    before = db.fetch_events_after(0, limit=1_000_000)
+    last_id = before[-1]["id"] if before else 0
+    db.insert_event("TICKET_CLASSIFIED", {"ticket_id": "a", "nested": {"n": 1}})
+    db.insert_event("DRIFT_DETECTED", {"features": ["priority"]})
+
+    events = db.fetch_events_after(last_id)
+    assert [e["event_type"] for e in events] == ["TICKET_CLASSIFIED", "DRIFT_DETECTED"]
+    assert events[0]["payload"] == {"ticket_id": "a", "nested": {"n": 1}}
+    assert [e["event_type"] for e in db.fetch_events_after(last_id, ["DRIFT_DETECTED"])] == ["DRIFT_DETECTED"]
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    """
+    Two fake replicas: reads return their url, or the value set in `replies`
+    (None = too stale, an exception = unreachable).
+    """
+    replies, calls = {}, []
+
+    def read_replica(url, sql, params, max_staleness):
+        calls.append(url)
+        reply = replies.get(url, [{"from": url}])
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(db, "READ_URLS", ["r1", "r2"])
+    monkeypatch.setattr(db, "READ_STATS", dict.fromkeys(db.READ_STATS, 0))
+    monkeypatch.setattr(db, "_replica_down_until", {})
+    monkeypatch.setattr(db, "_replica_rr", iter(range(100)))
+    monkeypatch.setattr(db, "_read_replica", read_replica)
+    return replies, calls
+
+
+PRIMARY_SQL = "SELECT 'primary' AS origin;"
+
+
+def test_reads_round_robin_over_replicas(replicas):
+    assert [db.read_all(PRIMARY_SQL, max_staleness=5) for _ in range(3)] == [
+        [{"from": "r1"}], [{"from": "r2"}], [{"from": "r1"}],
+    ]
+    assert db.read_all(PRIMARY_SQL, max_staleness=0) == [{"origin": "primary"}]
+    assert db.read_stats()["replica"] == 3 and db.read_stats()["primary"] == 1
+
+
+def test_stale_replicas_fall_back_to_the_primary(replicas):
+    replies, calls = replicas
+    replies.update(r1=None, r2=None)
+    assert db.read_all(PRIMARY_SQL, max_staleness=5) == [{"origin": "primary"}]
+    assert calls == ["r1", "r2"]
+    assert db.read_stats()["too_stale"] == 2
+
+
+def test_failed_replica_is_skipped_until_retry(replicas, monkeypatch):
+    psycopg2 = pytest.importorskip("psycopg2")
+    monkeypatch.setattr(db, "DB_REPLICA_RETRY_SECONDS", 60)
+    replies, calls = replicas
+    replies["r1"] = psycopg2.OperationalError("connection refused")
+
+    assert db.read_all(PRIMARY_SQL, max_staleness=5) == [{"from": "r2"}]
+    assert db.read_all(PRIMARY_SQL, max_staleness=5) == [{"from": "r2"}]
+    assert calls == ["r1", "r2", "r2"]
+    assert db.read_stats()["replica_errors"] == 1 and db.read_stats()["replicas_down"] == 1
+
+
+class LagCursor:
+    def __init__(self, lag):
+        self.lag, self.queries = lag, 0
+
+    def execute(self, sql, params=None):
+        self.queries += 1
+
+    def fetchone(self):
+        return {"lag": self.lag}
+
+
+def test_replica_lag_is_cached(monkeypatch):
+    monkeypatch.setattr(db, "_replica_lag", {})
+    cursor = LagCursor(2.5)
+    assert db._replica_lag_seconds("r1", cursor) == 2.5
+    cursor.lag = 9.0
+    assert db._replica_lag_seconds("r1", cursor) == 2.5 and cursor.queries == 1
+
+    monkeypatch.setattr(db, "_LAG_CHECK_SECONDS", 0.0)
+    assert db._replica_lag_seconds("r1", cursor) == 9.0 and cursor.queries == 2
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from src.dedup import NearDuplicateIndex, _shingles
+
+
+TEXT = "I cannot log in to the student portal, it says my password is invalid since this morning."
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert _shingles("Hello,  WORLD!", 3) == _shingles("hello world", 3)
+    assert _shingles("hi", 5) == {"hi"}
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=64, bands=10)
+
+
+def test_signature_is_deterministic_per_seed():
+    a, b = NearDuplicateIndex(seed=1), NearDuplicateIndex(seed=1)
+    assert a.signature(TEXT) == b.signature(TEXT)
+    assert len(a.signature(TEXT)) == a.num_perm
+
+
+def test_near_duplicate_is_found():
+    index = NearDuplicateIndex(threshold=0.7)
+    index.add("t1", TEXT, meta={"status": "QUEUED"})
+
+    match = index.query("i cannot log in to the student portal - it says my password is invalid since this morning")
+    assert match is not None
+    key, similarity, meta = match
+    assert key == "t1" and similarity >= 0.7 and meta == {"status": "QUEUED"}
+
+
+def test_unrelated_text_is_not_matched():
+    index = NearDuplicateIndex(threshold=0.7)
+    index.add("t1", TEXT)
+    assert index.query("The library printer on the second floor is out of toner again.") is None
+
+
+def test_scopes_are_separate():
+    index = NearDuplicateIndex()
+    index.add("t1", TEXT, scope="S1")
+    assert index.query(TEXT, scope="S2") is None
+    assert index.query(TEXT, scope="S1")[0] == "t1"
+
+
+def test_query_and_add_reports_previous_copy():
+    index = NearDuplicateIndex()
+    assert index.query_and_add("t1", TEXT) is None
+    assert index.query_and_add("t2", TEXT)[0] == "t1"
+    assert index.snapshot()["entries"] == 2
+
+
+def test_max_entries_evicts_oldest():
+    index = NearDuplicateIndex(max_entries=2)
+    index.add("t1", TEXT)
+    index.add("t2", "My fee payment failed twice and the bank shows the money was taken.")
+    index.add("t3", "Where can I find the timetable for the autumn exams?")
+
+    assert index.query(TEXT) is None
+    assert index.snapshot()["entries"] == 2
+    assert index.stats["evicted"] == 1
+
+
+def test_window_expires_entries(monkeypatch):
+    index = NearDuplicateIndex(window_seconds=60)
+    index.add("t1", TEXT)
+
+    later = time.time() + 61
+    monkeypatch.setattr("src.dedup.time.time", lambda: later)
+    assert index.query(TEXT) is None
+    assert index.snapshot()["buckets"] == 0
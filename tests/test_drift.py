@@ -0,0 +1,105 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from src.config import CATEGORIES, PRIORITIES
+from src.drift import DriftMonitor, Sketch, build_reference, confidence_bin, kl_divergence, psi
+
+
+def traffic(n, seed, categories=CATEGORIES, priorities=PRIORITIES, conf=(0.5, 0.95)):
+    rng = random.Random(seed)
+    return [
+        (f"ticket about {rng.choice(categories).lower()} number {i}", rng.choice(categories),
+         rng.choice(priorities), rng.uniform(*conf))
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def reference_path(tmp_path):
+    path = str(tmp_path / "reference.json")
+    texts, cats, pris, confs = zip(*traffic(2000, seed=1))
+    build_reference(texts, cats, pris, confs, path=path)
+    return path
+
+
+def monitor(path, **kwargs):
+    kwargs = {"min_samples": 100, "min_reference_samples": 200, "check_every": 10**9, **kwargs}
+    return DriftMonitor(reference_path=path, **kwargs)
+
+
+def test_psi_and_kl():
+    same = np.array([10.0, 20.0, 30.0])
+    assert psi(same, same) == pytest.approx(0.0, abs=1e-9)
+    assert kl_divergence(same, same) == pytest.approx(0.0, abs=1e-9)
+    assert psi(np.array([50.0, 5.0, 5.0]), same) > 0.2
+    assert kl_divergence(np.array([50.0, 5.0, 5.0]), same) > 0
+
+
+def test_confidence_bins_are_clamped():
+    assert confidence_bin(0.0) == 0
+    assert confidence_bin(1.0) == 9
+    assert confidence_bin(-0.5) == 0
+
+
+def test_sketch_round_trip_and_shape_check(reference_path):
+    data = json.load(open(reference_path))
+    sketch = Sketch.from_dict(data)
+    assert sketch.n == 2000 and sketch.to_dict()["n"] == 2000
+
+    data["priority"] = data["priority"][:-1]
+    with pytest.raises(ValueError):
+        Sketch.from_dict(data)
+
+
+def test_same_distribution_is_ok(reference_path):
+    mon = monitor(reference_path)
+    for row in traffic(1000, seed=2):
+        mon.observe(*row)
+    stats = mon.snapshot()
+    assert stats["status"] == "ok"
+    assert max(f["psi"] for f in stats["features"].values()) < 0.1
+
+
+def test_shift_is_detected_and_alert_rate_limited(reference_path):
+    mon = monitor(reference_path, check_every=50, cooldown_seconds=3600)
+    alerts = [mon.observe(*row) for row in traffic(1000, seed=3, priorities=["High"], conf=(0.2, 0.3))]
+    alerts = [a for a in alerts if a is not None]
+
+    assert len(alerts) == 1  # cooldown
+    assert alerts[0]["event"] == "DRIFT_DETECTED"
+    assert {"priority", "confidence"} <= set(alerts[0]["features"])
+
+
+def test_no_verdict_before_min_samples_or_without_reference(reference_path, tmp_path):
+    mon = monitor(reference_path)
+    for row in traffic(50, seed=4):
+        mon.observe(*row)
+    assert mon.snapshot()["status"] == "warming_up"
+
+    assert monitor(str(tmp_path / "missing.json")).snapshot()["status"] == "no_reference"
+
+
+def test_small_reference_never_alerts(tmp_path):
+    path = str(tmp_path / "small.json")
+    texts, cats, pris, confs = zip(*traffic(80, seed=5))
+    build_reference(texts, cats, pris, confs, path=path)
+
+    mon = monitor(path, check_every=10)
+    alerts = [mon.observe(*row) for row in traffic(500, seed=6, priorities=["High"])]
+    assert not any(alerts)
+    assert mon.snapshot()["status"] == "reference_too_small"
+
+
+def test_window_evicts_old_buckets(reference_path, monkeypatch):
+    mon = monitor(reference_path, window_seconds=120, bucket_seconds=60)
+    clock = [1_000_000.0]
+    monkeypatch.setattr("src.drift.time.time", lambda: clock[0])
+    for row in traffic(150, seed=7):
+        mon.observe(*row)
+    assert mon.snapshot()["window_samples"] == 150
+
+    clock[0] += 600
+    assert mon.snapshot()["window_samples"] == 0
@@ -0,0 +1,100 @@
+import pytest
+
+from src import db
+from src.event_bus import EventSubscriber
+
+
+def _event(event_id, event_type="TICKET_CLASSIFIED"):
+    return {"id": event_id, "event_type": event_type, "created_at": "", "payload": {"n": event_id}}
+
+
+@pytest.fixture
+def subscriber():
+    sub = EventSubscriber(reorder_window=10)
+    sub.received = []
+    sub.subscribe(sub.received.append)
+    return sub
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """
+    public.events as a list of ids, served by a fake fetch_events_after.
+    """
+    events = []
+
+    def fetch(last_id, event_types=None, limit=500):
+        return [_event(i) for i in sorted(events) if i > last_id][:limit]
+
+    monkeypatch.setattr(db, "fetch_events_after", fetch)
+    return events
+
+
+def ids(sub):
+    return [m["id"] for m in sub.received]
+
+
+def test_dispatch_filters_by_event_type():
+    sub = EventSubscriber()
+    got = []
+    sub.subscribe(got.append, event_types=["DRIFT_DETECTED"])
+    sub.dispatch(_event(1))
+    sub.dispatch(_event(2, "DRIFT_DETECTED"))
+    assert [m["id"] for m in got] == [2]
+
+
+def test_listened_events_dispatch_once(subscriber):
+    for event_id in (1, 3, 2, 3):  # 2 commits late, 3 is delivered twice
+        subscriber._dispatch_listened(_event(event_id))
+    assert ids(subscriber) == [1, 3, 2]
+    assert subscriber.stats["duplicates"] == 1
+
+
+def test_catch_up_pages_and_picks_up_late_commits(subscriber, stored):
+    assert subscriber._catch_up() == 0  # first connection: nothing to replay
+
+    for event_id in (1, 2, 4):
+        subscriber._dispatch_listened(_event(event_id))
+    # While disconnected: 3 committed late, then 5..9 arrived
+    stored.extend(range(1, 10))
+
+    assert subscriber._catch_up(page_size=2) == 6
+    assert ids(subscriber) == [1, 2, 4, 3, 5, 6, 7, 8, 9]
+    assert subscriber.stats["caught_up"] == 6
+
+
+def test_seen_ids_are_pruned_behind_the_window(subscriber):
+    for event_id in range(1, 31):
+        subscriber._dispatch_listened(_event(event_id))
+    assert len(subscriber._seen) <= 2 * subscriber.reorder_window
+    assert 30 in subscriber._seen and 1 not in subscriber._seen
+
+
+def test_refetch_reads_truncated_payload(subscriber):
+    db.insert_event("TICKET_CLASSIFIED", {"ticket_id": "big", "text": "x" * 100})
+    event_id = db.fetch_events_after(0, limit=10 ** 6)[-1]["id"]
+    message = subscriber._refetch({"id": event_id, "event_type": "TICKET_CLASSIFIED", "truncated": True})
+    assert message["payload"] == {"ticket_id": "big", "text": "x" * 100}
+    assert subscriber.stats["refetched"] == 1
+
+    assert subscriber._refetch({"id": 10 ** 9, "truncated": True}) is None
+
+
+def test_sqlite_writes_dispatch_in_process(subscriber, monkeypatch):
+    monkeypatch.setattr(db, "_WRITE_HOOKS", list(db._WRITE_HOOKS))
+    subscriber.start()
+    db.insert_event("DRIFT_DETECTED", {"features": ["priority"]})
+    (message,) = subscriber.received
+    assert message["payload"] == {"features": ["priority"]}
+    assert message["id"] == db.fetch_events_after(0, limit=10 ** 6)[-1]["id"]
+
+
+def test_sse_replay_pages_from_behind_last_event_id(stored, monkeypatch):
+    from api import main
+
+    monkeypatch.setattr(main, "fetch_events_after", db.fetch_events_after)
+    monkeypatch.setattr(main, "EVENT_REORDER_WINDOW", 3)
+    stored.extend(range(1, 21))
+
+    assert [m["id"] for m in main._replay_events(15, ["TICKET_CLASSIFIED"], page_size=2)] == list(range(13, 21))
+    assert main._sse_message(_event(7), 20).startswith("id: 20\nevent: TICKET_CLASSIFIED\n")
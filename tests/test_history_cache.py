@@ -0,0 +1,123 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import db
+from src.history_cache import StudentHistoryCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = StudentHistoryCache(max_students=2, ttl_seconds=60, max_staleness=5)
+    monkeypatch.setattr(db, "_WRITE_HOOKS", db._WRITE_HOOKS + [cache.on_write])
+    return cache
+
+
+@pytest.fixture
+def count_loads(monkeypatch):
+    calls = []
+    fetch = db.fetch_tickets_by_student
+
+    def counting(student_id, since=None, max_staleness=None):
+        calls.append((student_id, max_staleness))
+        return fetch(student_id, since, max_staleness)
+
+    monkeypatch.setattr(db, "fetch_tickets_by_student", counting)
+    return calls
+
+
+def tickets(body):
+    return [(t["ticket_id"], t["status"]) for t in json.loads(body)["tickets"]]
+
+
+def test_miss_then_hit_and_304(cache, count_loads, new_id):
+    student_id, ticket_id = new_id("S"), new_id()
+    db.insert_incoming_ticket(ticket_id, "Exam room?", datetime.now(timezone.utc), student_id)
+
+    body, etag, not_modified = cache.get(student_id)
+    assert tickets(body) == [(ticket_id, "QUEUED")] and not not_modified
+    assert count_loads == [(student_id, 5)]  # replica read within the history staleness bound
+
+    assert cache.get(student_id) == (body, etag, False)
+    assert cache.get(student_id, if_none_match=f'"other", {etag}') == (None, etag, True)
+    assert len(count_loads) == 1
+    assert cache.snapshot()["not_modified"] == 1
+
+
+def test_writes_update_cached_history_without_reload(cache, count_loads, new_id):
+    student_id, first, second = new_id("S"), new_id(), new_id()
+    now = datetime.now(timezone.utc)
+    db.insert_incoming_ticket(first, "Wifi down", now - timedelta(minutes=1), student_id)
+    _, etag, _ = cache.get(student_id)
+
+    db.insert_incoming_ticket(second, "Still down", now, student_id)
+    db.update_ticket_status(first, "RESOLVED", now, "AI Classified: IT")
+
+    body, new_etag, not_modified = cache.get(student_id, if_none_match=etag)
+    assert not not_modified and new_etag != etag
+    assert tickets(body) == [(second, "QUEUED"), (first, "RESOLVED")]
+    assert json.loads(body)["status_counts"] == {"QUEUED": 1, "RESOLVED": 1}
+    assert len(count_loads) == 1
+
+    # Same content as a fresh load from the DB, so the ETag is too
+    fresh = StudentHistoryCache(max_staleness=0)
+    assert fresh.get(student_id)[1] == new_etag
+
+
+def test_bulk_insert_invalidates(cache, count_loads, new_id):
+    student_id = new_id("S")
+    cache.get(student_id)
+    db.bulk_insert_incoming_tickets([(new_id(), student_id, "Fee query", "Low", "QUEUED", datetime.now(timezone.utc))])
+
+    body, _, _ = cache.get(student_id)
+    assert len(tickets(body)) == 1
+    # The bulk rows can't be re-applied on a replica snapshot: reload from the primary
+    assert count_loads[-1] == (student_id, 0)
+
+
+def test_replica_snapshot_gets_recent_writes_reapplied(cache, monkeypatch, new_id):
+    student_id, old, new = new_id("S"), new_id(), new_id()
+    now = datetime.now(timezone.utc)
+    db.insert_incoming_ticket(old, "Old", now - timedelta(minutes=1), student_id)
+    stale = db.fetch_tickets_by_student(student_id, max_staleness=0)
+
+    db.insert_incoming_ticket(new, "New", now, student_id)
+    db.update_ticket_status(old, "RESOLVED", now, "done")
+
+    # A lagging replica that has none of the writes above
+    monkeypatch.setattr(db, "fetch_tickets_by_student", lambda *a, **kw: [dict(r) for r in stale])
+    body, _, _ = cache.get(student_id)
+    assert tickets(body) == [(new, "QUEUED"), (old, "RESOLVED")]
+    assert cache.snapshot()["writes_reapplied"] == 2
+
+
+def test_write_during_load_is_served_but_not_cached(cache, monkeypatch, new_id):
+    student_id = new_id("S")
+    fetch = db.fetch_tickets_by_student
+
+    def racing_fetch(sid, since=None, max_staleness=None):
+        rows = fetch(sid, since, max_staleness)
+        db.insert_incoming_ticket(new_id(), "Arrived mid-load", datetime.now(timezone.utc), sid)
+        return rows
+
+    monkeypatch.setattr(db, "fetch_tickets_by_student", racing_fetch)
+    body, _, _ = cache.get(student_id)
+    assert [status for _, status in tickets(body)] == ["QUEUED"]  # re-applied from the recent writes
+    assert cache.snapshot()["students"] == 0  # but not trusted for the cache
+
+
+def test_lru_eviction(cache, new_id):
+    students = [new_id("S") for _ in range(3)]
+    for student_id in students:
+        cache.get(student_id)
+    snap = cache.snapshot()
+    assert snap["students"] == 2 and snap["evictions"] == 1
+
+
+def test_ttl_reloads(cache, count_loads, new_id):
+    cache.ttl_seconds = 0
+    student_id = new_id("S")
+    cache.get(student_id)
+    cache.get(student_id)
+    assert len(count_loads) == 2
@@ -0,0 +1,128 @@
+import pandas as pd
+import pytest
+
+from src import db, inference_service
+from src.inference_service import _rule_tier, classify_ticket, predict_cascade
+
+
+pytestmark = pytest.mark.usefixtures("use_fitted_models")
+
+
+@pytest.fixture
+def cascade(monkeypatch):
+    monkeypatch.setattr(inference_service, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(inference_service, "CASCADE_AUDIT_RATE", 0.0)
+
+
+def _no_model(text):
+    raise AssertionError("the rule tier should have answered")
+
+
+def test_predict_texts_batch_matches_single_calls():
+    texts = ["I can't access Moodle.", "I was charged twice for tuition. My exam is tomorrow."]
+    batch = inference_service.predict_texts(texts)
+    assert batch == [inference_service.predict_text(t) for t in texts]
+    assert all(0 < r["confidence"] <= 1 for r in batch)
+
+
+def test_rule_tier_needs_decisive_cues():
+    rule = _rule_tier("My payment failed on the fee portal. Fees deadline is tomorrow.")
+    assert (rule["pred_category"], rule["pred_priority"], rule["confidence"]) == ("Fees", "High", None)
+    assert rule["rule_purity"] == 1.0
+
+    assert _rule_tier("My exam timetable is wrong.") is None  # Exams vs Timetable cues
+    assert _rule_tier("The portal is showing an error.") is None  # no cues
+
+
+def test_easy_tickets_skip_the_models(cascade, monkeypatch):
+    monkeypatch.setattr(inference_service, "predict_text", _no_model)
+    before = inference_service.cascade_stats()["rules"]["hits"]
+
+    result = predict_cascade("Password reset is not working.")
+    assert (result["tier"], result["pred_category"]) == ("rules", "IT")
+    assert inference_service.cascade_stats()["rules"]["hits"] == before + 1
+
+
+def test_ambiguous_tickets_escalate(cascade):
+    result = predict_cascade("My exam timetable is wrong.")
+    assert result["tier"] == "model" and result["confidence"] is not None
+    assert inference_service.escalates("My exam timetable is wrong.")
+    assert not inference_service.escalates("Password reset is not working.")
+
+
+def test_cascade_off_always_uses_the_models(monkeypatch):
+    monkeypatch.setattr(inference_service, "CASCADE_ENABLED", False)
+    assert predict_cascade("Password reset is not working.")["tier"] == "model"
+    assert inference_service.escalates("Password reset is not working.")
+
+
+def test_audit_compares_rule_answers_with_the_models(cascade, monkeypatch):
+    monkeypatch.setattr(inference_service, "CASCADE_AUDIT_RATE", 1.0)
+    before = inference_service.cascade_stats()["rules"]
+    predict_cascade("Password reset is not working.")
+    after = inference_service.cascade_stats()["rules"]
+    assert after["audited"] == before["audited"] + 1
+    assert after["audit_agree_category"] - before["audit_agree_category"] in (0, 1)
+
+
+def test_classify_ticket_stores_rule_answers_without_confidence(cascade, new_id):
+    ticket_id = new_id()
+    db.insert_incoming_ticket(ticket_id, "x", pd.Timestamp.now(tz="UTC").to_pydatetime())
+    payload = classify_ticket(ticket_id, "Urgent: my payment failed on the fee portal today.")
+
+    assert (payload["tier"], payload["priority"], payload["confidence"]) == ("rules", "High", None)
+    (pred,) = [p for p in db.fetch_all_predictions() if p["ticket_id"] == ticket_id]
+    assert (pred["tier"], pred["confidence"]) == ("rules", None)
+    events = db.fetch_events_after(0, ["TICKET_CLASSIFIED"], limit=10 ** 6)
+    assert events[-1]["payload"]["ticket_id"] == ticket_id  # High priority: stored as an event
+
+
+def test_near_duplicates_reuse_the_prediction(monkeypatch, new_id):
+    monkeypatch.setattr(inference_service, "DEDUP_ENABLED", True)
+    first, second = new_id(), new_id()
+    for ticket_id in (first, second):
+        db.insert_incoming_ticket(ticket_id, "x", pd.Timestamp.now(tz="UTC").to_pydatetime())
+
+    text = "The billing page is not loading when I try to pay. I tried multiple times but it still fails."
+    classify_ticket(first, text)
+    monkeypatch.setattr(inference_service, "predict_cascade", _no_model)
+    payload = classify_ticket(second, text)
+    assert (payload["tier"], payload["duplicate_of"]) == ("dedup", first)
+
+
+def test_drift_monitor_only_sees_model_answers(monkeypatch, new_id):
+    observed = []
+    monkeypatch.setattr(inference_service, "DRIFT_ENABLED", True)
+    monkeypatch.setattr(inference_service.DRIFT_MONITOR, "observe", lambda *args: observed.append(args))
+    monkeypatch.setattr(inference_service, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(inference_service, "CASCADE_AUDIT_RATE", 0.0)
+
+    for text in ("Password reset is not working.", "My exam timetable is wrong."):
+        ticket_id = new_id()
+        db.insert_incoming_ticket(ticket_id, "x", pd.Timestamp.now(tz="UTC").to_pydatetime())
+        classify_ticket(ticket_id, text)
+    assert [args[0] for args in observed] == ["My exam timetable is wrong."]
+
+
+def _insert_day(day, texts, new_id):
+    for i, text in enumerate(texts):
+        db.insert_ticket(new_id(), text, "Fees", "Low", (day + pd.Timedelta(hours=i + 1)).to_pydatetime())
+
+
+def test_classify_window_only_takes_unclassified_tickets_of_the_day(tmp_path, monkeypatch, new_id):
+    from src import artifacts
+
+    monkeypatch.setattr(artifacts, "OUTPUT_FORMAT", "parquet")
+    monkeypatch.setattr(inference_service, "PREDICTIONS_DATASET", str(tmp_path / "predictions"))
+    day = pd.Timestamp("2023-06-15", tz="UTC")
+    start, end = day.to_pydatetime(), (day + pd.Timedelta(days=1)).to_pydatetime()
+    _insert_day(day, ["My payment failed on the fee portal.", "I need a receipt for my fee payment."], new_id)
+    _insert_day(day + pd.Timedelta(days=1), ["I was charged twice for tuition."], new_id)  # next day
+
+    result = inference_service.classify_window(start, end)
+    assert result["rows"] == 2 and result["path"] == str(tmp_path / "predictions")
+    assert (tmp_path / "predictions" / "day=2023-06-15").is_dir()
+
+    assert inference_service.classify_window(start, end)["rows"] == 0  # re-run: nothing new
+    _insert_day(day + pd.Timedelta(hours=12), ["My transaction was declined."], new_id)
+    assert inference_service.classify_window(start, end)["rows"] == 1
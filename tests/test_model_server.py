@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from src import inference_service
+from src.model_server import Batcher, ModelClient, ModelServer
+
+
+def fake_predict(texts):
+    if "boom" in texts:
+        raise ValueError("model exploded")
+    return [{"pred_category": "IT", "pred_priority": "Low", "confidence": len(t) / 100} for t in texts]
+
+
+@pytest.fixture
+def server(tmp_path_factory):
+    # Unix socket paths are limited to ~100 bytes: keep it short
+    path = str(tmp_path_factory.mktemp("ms") / "s.sock")
+    srv = ModelServer(path, Batcher(fake_predict, max_batch=64, wait_ms=50))
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield srv, path
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_client_round_trip(server):
+    _, path = server
+    client = ModelClient(path)
+    assert [r["confidence"] for r in client.predict_texts(["ab", "abcd"])] == [0.02, 0.04]
+    assert client.ping()["ok"] is True
+
+
+def test_concurrent_requests_share_a_batch(server):
+    srv, path = server
+    client = ModelClient(path)
+    results = {}
+
+    def request(i):
+        results[i] = client.predict_texts(["x" * i])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(1, 5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert {i: r[0]["confidence"] for i, r in results.items()} == {i: i / 100 for i in range(1, 5)}
+    assert srv.batcher.stats["requests"] == 4 and srv.batcher.stats["batches"] < 4
+
+
+def test_model_errors_reach_the_client(server):
+    _, path = server
+    client = ModelClient(path)
+    with pytest.raises(RuntimeError, match="model exploded"):
+        client.predict_texts(["boom"])
+    assert client.predict_texts(["ok"])[0]["pred_category"] == "IT"  # connection still usable
+
+
+def test_client_reconnects_after_a_broken_connection(server):
+    _, path = server
+    client = ModelClient(path)
+    client.ping()
+    client._local.sock.close()
+    assert client.ping()["ok"] is True
+
+
+def test_unreachable_server_falls_back_to_local_models(tmp_path_factory, monkeypatch):
+    monkeypatch.setattr(inference_service, "_model_client", ModelClient(str(tmp_path_factory.mktemp("ms") / "none.sock")))
+    monkeypatch.setattr(inference_service, "predict_texts_local", lambda texts: [{"local": True}] * len(texts))
+    monkeypatch.setattr(inference_service, "MODEL_SERVER_FALLBACK", True)
+    assert inference_service.predict_texts(["a"]) == [{"local": True}]
+
+    monkeypatch.setattr(inference_service, "MODEL_SERVER_FALLBACK", False)
+    with pytest.raises(OSError):
+        inference_service.predict_texts(["a"])
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from src import artifacts, db, monitoring
+from src.artifacts import write_dataset
+from src.config import METRICS_JSON_PATH
+from src.monitoring import compute_daily_monitoring, compute_monitoring, join_predictions, summarize_predictions
+
+
+def _row(ticket_id, true_category, pred_category, pred_priority, confidence, created_at, processed_at=None):
+    return {
+        "ticket_id": ticket_id, "true_category": true_category, "true_priority": "Low",
+        "pred_category": pred_category, "pred_priority": pred_priority, "confidence": confidence,
+        "created_at": pd.Timestamp(created_at, tz="UTC"),
+        "processed_at": pd.Timestamp(processed_at or created_at, tz="UTC"),
+    }
+
+
+ROWS = [
+    _row("a", "IT", "IT", "High", 0.9, "2026-02-01 09:00"),
+    _row("b", "Fees", "Fees", "Low", None, "2026-02-01 10:00"),  # rule tier: no confidence
+    _row("c", "Exams", "IT", "High", 0.5, "2026-02-02 09:00"),
+]
+
+
+def test_summary_leaves_rule_answers_out_of_confidence():
+    summary = summarize_predictions(pd.DataFrame(ROWS))
+    assert summary["n_predictions"] == 3
+    assert summary["category_accuracy"] == pytest.approx(2 / 3)
+    assert summary["avg_confidence"] == pytest.approx(0.7)
+    assert summary["high_priority_per_day"].to_dict("records") == [
+        {"day": "2026-02-01", "high_priority_count": 1},
+        {"day": "2026-02-02", "high_priority_count": 1},
+    ]
+    assert summary["drift"]["avg_confidence"].tolist() == pytest.approx([0.9, 0.5])
+
+
+def test_summary_without_any_confidence():
+    assert summarize_predictions(pd.DataFrame(ROWS[1:2]))["avg_confidence"] is None
+
+
+def test_join_needs_both_tables():
+    tickets = pd.DataFrame(ROWS)[["ticket_id", "true_category", "true_priority", "created_at"]]
+    with pytest.raises(RuntimeError):
+        join_predictions(tickets, pd.DataFrame())
+    with pytest.raises(RuntimeError):
+        join_predictions(pd.DataFrame(), pd.DataFrame(ROWS))
+
+
+def test_parquet_source_reads_latest_prediction_per_ticket(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "OUTPUT_FORMAT", "both")
+    dataset = str(tmp_path / "predictions")
+    monkeypatch.setattr(monitoring, "PREDICTIONS_DATASET", dataset)
+
+    first = pd.DataFrame(ROWS).assign(day=lambda df: df["created_at"].dt.strftime("%Y-%m-%d"))
+    write_dataset(first, dataset, run_id="r1")
+    # A later run re-classified "c" correctly
+    rerun = pd.DataFrame([_row("c", "Exams", "Exams", "Low", 0.8, "2026-02-02 09:00", "2026-02-03 00:00")])
+    write_dataset(rerun.assign(day="2026-02-02"), dataset, run_id="r2")
+
+    metrics = compute_monitoring(source="parquet")
+    assert metrics["n_predictions"] == 3 and metrics["category_accuracy"] == 1.0
+    assert {"high_priority_per_day_parquet", "drift_parquet", "drift_csv"} <= set(metrics["artifacts"])
+    assert json.load(open(METRICS_JSON_PATH))["source"] == "parquet"
+
+    assert compute_monitoring(source="parquet", start_day="2026-02-02")["n_predictions"] == 1
+
+
+def test_parquet_source_needs_the_dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitoring, "PREDICTIONS_DATASET", str(tmp_path / "missing"))
+    with pytest.raises(RuntimeError):
+        compute_monitoring(source="parquet")
+
+
+def test_daily_monitoring_covers_one_day(tmp_path, monkeypatch, new_id):
+    monkeypatch.setattr(artifacts, "OUTPUT_FORMAT", "parquet")
+    monkeypatch.setattr(monitoring, "DAILY_METRICS_DATASET", str(tmp_path / "daily_metrics"))
+    start = datetime(2023, 7, 20, tzinfo=timezone.utc)
+    for offset, pred_category, pred_priority in ((1, "IT", "High"), (2, "Fees", "Low"), (30, "IT", "Low")):
+        ticket_id = new_id()
+        db.insert_ticket(ticket_id, "x", "IT", "Low", start + timedelta(hours=offset))
+        db.insert_prediction(ticket_id, pred_category, pred_priority, 0.6)
+
+    daily = compute_daily_monitoring(start, start + timedelta(days=1))
+    assert (daily["n_predictions"], daily["category_accuracy"], daily["high_priority_count"]) == (2, 0.5, 1)
+    assert (tmp_path / "daily_metrics" / "day=2023-07-20").is_dir()
+
+    assert compute_daily_monitoring(start - timedelta(days=1), start) == {"n_predictions": 0}
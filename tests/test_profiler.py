@@ -0,0 +1,51 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from src.profiler import ProfilerBusy, SamplingProfiler, _collapse, run_profiled, sample_process
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_collapse_runs_root_to_leaf():
+    stack = _collapse(sys._getframe(), "main")
+    assert stack.startswith("thread:main;")
+    assert stack.endswith(";test_profiler:test_collapse_runs_root_to_leaf")
+
+
+def test_samples_busy_threads_and_skips_idle_ones():
+    stop = threading.Event()
+    busy = threading.Thread(target=_spin, args=(stop,), name="busy")
+    parked = threading.Thread(target=stop.wait, name="parked")
+    busy.start()
+    parked.start()
+    try:
+        with SamplingProfiler(interval=0.005) as prof:
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        busy.join()
+        parked.join()
+
+    stacks = prof.collapsed().splitlines()
+    assert prof.n_samples > 0 and prof.idle_skipped > 0
+    assert any(s.startswith("thread:busy;") and "test_profiler:_spin" in s for s in stacks)
+    assert not any(s.startswith("thread:parked;") for s in stacks)
+
+
+def test_one_session_per_process():
+    with SamplingProfiler(interval=0.01):
+        with pytest.raises(ProfilerBusy):
+            sample_process(0.01)
+    assert isinstance(sample_process(0.01, interval=0.005), str)  # released again
+
+
+def test_run_profiled_writes_collapsed_stacks(tmp_path):
+    out = tmp_path / "run.folded"
+    assert run_profiled(lambda n: sum(range(n)), str(out), interval=0.005, n=10) == 45
+    assert out.exists()
@@ -0,0 +1,86 @@
+import queue
+import time
+
+import pytest
+
+from src.scheduler import SLOScheduler, parse_targets
+
+
+TARGETS = {"High": 30.0, "Medium": 300.0, "Low": 1800.0}
+
+
+def drain(sched):
+    items = []
+    while sched.qsize():
+        items.append(sched.get(timeout=0)[1])
+    return items
+
+
+def test_parse_targets():
+    assert parse_targets("High=30, Medium=300,Low=1800") == TARGETS
+    assert parse_targets("") == {}
+
+
+def test_requires_targets():
+    with pytest.raises(ValueError):
+        SLOScheduler({})
+
+
+def test_same_arrival_orders_by_target():
+    sched = SLOScheduler(TARGETS)
+    now = time.time()
+    sched.put("Low", "low", arrival=now)
+    sched.put("Medium", "medium", arrival=now)
+    sched.put("High", "high", arrival=now)
+    assert drain(sched) == ["high", "medium", "low"]
+
+
+def test_waiting_low_job_beats_new_high_job():
+    sched = SLOScheduler(TARGETS)
+    now = time.time()
+    sched.put("Low", "old-low", arrival=now - 1790)   # deadline now + 10
+    sched.put("High", "new-high", arrival=now)        # deadline now + 30
+    sched.put("Medium", "old-medium", arrival=now - 290)  # deadline now + 10, arrived later
+    assert drain(sched) == ["old-low", "old-medium", "new-high"]
+
+
+def test_requeued_older_job_is_ordered_by_arrival():
+    sched = SLOScheduler(TARGETS)
+    now = time.time()
+    sched.put("High", "b", arrival=now)
+    sched.put("High", "c", arrival=now + 1)
+    sched.put("High", "a", arrival=now - 5)
+    assert drain(sched) == ["a", "b", "c"]
+
+
+def test_ties_go_to_insertion_order():
+    sched = SLOScheduler(TARGETS)
+    now = time.time()
+    for i in range(5):
+        sched.put("High", i, arrival=now)
+    assert drain(sched) == [0, 1, 2, 3, 4]
+
+
+def test_unknown_class_uses_most_relaxed_target():
+    sched = SLOScheduler(TARGETS)
+    assert sched.put("Urgent", "x") == "Low"
+    assert sched.depth() == {"High": 0, "Medium": 0, "Low": 1}
+
+
+def test_get_times_out_when_empty():
+    sched = SLOScheduler(TARGETS)
+    with pytest.raises(queue.Empty):
+        sched.get(timeout=0.01)
+
+
+def test_wait_stats_report_slo_attainment():
+    sched = SLOScheduler(TARGETS)
+    now = time.time()
+    sched.put("High", "late", arrival=now - 60)
+    sched.put("High", "on-time", arrival=now)
+    drain(sched)
+
+    stats = sched.wait_stats()
+    assert stats["High"]["count"] == 2
+    assert stats["High"]["slo_attainment"] == 0.5
+    assert stats["Low"] == {"target_seconds": 1800.0, "count": 0}
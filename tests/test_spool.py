@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src import db, spool
+from src.spool import CircuitBreaker, Spool, _read_records, apply_records
+
+
+# --------------------------------------------------
+# Circuit breaker
+# --------------------------------------------------
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+    breaker.record(False, 0.0)
+    breaker.record(False, 0.0)
+    breaker.record(True, 0.0)  # a success resets the count
+    breaker.record(False, 0.0)
+    breaker.record(False, 0.0)
+    assert breaker.state == "closed"
+
+    breaker.record(False, 0.0)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(latency_ms=10, window=4, cooldown_seconds=60)
+    breaker.record(True, 0.05)
+    assert breaker.state == "closed"  # needs half a window of samples
+    breaker.record(True, 0.05)
+    assert breaker.state == "open"
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05)
+    breaker.record(False, 0.0)
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()          # the probe
+    assert breaker.state == "half_open"
+    assert not breaker.allow()      # only one probe per cooldown
+    breaker.record(False, 0.0)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 0.0)
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def _raise(error):
+    def fn(*args, **kwargs):
+        raise error
+    return fn
+
+
+def test_call_records_exceptions():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+    with pytest.raises(RuntimeError):
+        breaker.call(_raise(RuntimeError("db down")))
+    assert breaker.state == "open"
+
+
+def test_only_failure_types_trip_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60, failure_types=(sqlite3.OperationalError,))
+    with pytest.raises(sqlite3.IntegrityError):
+        breaker.call(_raise(sqlite3.IntegrityError("FOREIGN KEY constraint failed")))
+    assert breaker.state == "closed"
+
+    with pytest.raises(sqlite3.OperationalError):
+        breaker.call(_raise(sqlite3.OperationalError("database is locked")))
+    assert breaker.state == "open"
+
+
+# --------------------------------------------------
+# Write-ahead log
+# --------------------------------------------------
+
+def test_spool_append_read_commit(tmp_path):
+    log = Spool(directory=str(tmp_path), fsync_interval_ms=1, name="test.wal")
+    for i in range(3):
+        log.append({"op": "event", "n": i})
+
+    records, offset = log.read_batch(2)
+    assert [r["n"] for r in records] == [0, 1]
+    log.commit(offset)
+    assert log.pending() > 0
+
+    records, offset = log.read_batch(10)
+    assert [r["n"] for r in records] == [2]
+    log.commit(offset)
+
+    # Fully drained: truncated and checkpoint reset
+    assert log.pending() == 0
+    assert os.path.getsize(log.path) == 0
+    assert open(log.offset_path).read() == "0"
+
+
+def test_torn_tail_is_not_replayed(tmp_path):
+    path = tmp_path / "torn.wal"
+    path.write_bytes(b'{"n": 1}\n{"n": 2')
+    records, pos = _read_records(str(path), 0, path.stat().st_size, 10)
+    assert records == [{"n": 1}]
+    assert pos == len(b'{"n": 1}\n')
+
+
+# --------------------------------------------------
+# Replay into the DB
+# --------------------------------------------------
+
+def _records(ticket_id, student_id):
+    now = datetime.now(timezone.utc)
+    return [
+        {"op": "ticket", "ticket_id": ticket_id, "text": "Wifi is down in the dorms", "created_at": now.isoformat(),
+         "student_id": student_id, "priority": "High", "status": "QUEUED"},
+        {"op": "status", "ticket_id": ticket_id, "status": "PROCESSING", "resolved_at": None, "note": None,
+         "created_at": now.isoformat()},
+        {"op": "status", "ticket_id": ticket_id, "status": "RESOLVED", "resolved_at": now.isoformat(),
+         "note": "AI Classified: IT", "created_at": now.isoformat()},
+        {"op": "prediction", "ticket_id": ticket_id, "pred_category": "IT", "pred_priority": "High",
+         "confidence": None, "tier": "rule"},
+        {"op": "event", "event_type": "TICKET_CLASSIFIED", "payload": {"ticket_id": ticket_id}},
+    ]
+
+
+def _prediction(ticket_id):
+    return [p for p in db.fetch_all_predictions(max_staleness=0) if p["ticket_id"] == ticket_id]
+
+
+def test_apply_records_in_order_and_idempotent(new_id):
+    ticket_id, student_id = new_id(), new_id("S")
+    records = _records(ticket_id, student_id)
+
+    apply_records(records)
+    apply_records(records)  # replaying a batch twice is harmless
+
+    (ticket,) = db.fetch_tickets_by_student(student_id, max_staleness=0)
+    assert ticket["status"] == "RESOLVED" and ticket["resolution_note"] == "AI Classified: IT"
+    (pred,) = _prediction(ticket_id)
+    assert pred["tier"] == "rule" and pred["confidence"] is None
+    events = [e for e in db.fetch_events_after(0, ["TICKET_CLASSIFIED"], limit=10_000)
+              if e["payload"] == {"ticket_id": ticket_id}]
+    assert len(events) == 2  # events have no natural key
+
+
+def test_replay_latency_is_recorded_per_record(monkeypatch):
+    breaker = CircuitBreaker(latency_ms=10, window=4, cooldown_seconds=60)
+    monkeypatch.setattr(spool, "BREAKER", breaker)
+    monkeypatch.setattr(spool, "apply_records", lambda records: time.sleep(0.05))
+
+    for _ in range(4):
+        spool._apply_batch([{}] * 100)  # 50 ms per batch, 0.5 ms per record
+    assert breaker.state == "closed"
+
+
+@pytest.fixture
+def isolated_spool(tmp_path, monkeypatch):
+    log = Spool(directory=str(tmp_path), fsync_interval_ms=1, name="live.wal")
+    monkeypatch.setattr(spool, "_SPOOL", log)
+    monkeypatch.setattr(
+        spool, "BREAKER", CircuitBreaker(failure_threshold=1, cooldown_seconds=60, failure_types=db.TRANSIENT_ERRORS)
+    )
+    return log
+
+
+def test_write_goes_to_db_while_healthy(isolated_spool, new_id):
+    ticket_id, student_id = new_id(), new_id("S")
+    assert spool.write_ticket(ticket_id, "Exam room?", datetime.now(timezone.utc), student_id) == "db"
+    assert isolated_spool.pending() == 0
+    assert len(db.fetch_tickets_by_student(student_id, max_staleness=0)) == 1
+
+
+def test_write_spools_when_db_fails_then_keeps_order(isolated_spool, monkeypatch, new_id):
+    ticket_id, student_id = new_id(), new_id("S")
+    insert = db.insert_incoming_ticket
+
+    monkeypatch.setattr(db, "insert_incoming_ticket", _raise(sqlite3.OperationalError("database is locked")))
+    assert spool.write_ticket(ticket_id, "Exam room?", datetime.now(timezone.utc), student_id) == "spooled"
+    assert spool.BREAKER.state == "open"
+
+    # DB back and breaker healthy, but an older record is pending: stay behind it
+    monkeypatch.setattr(db, "insert_incoming_ticket", insert)
+    monkeypatch.setattr(spool, "BREAKER", CircuitBreaker())
+    assert spool.write_status(ticket_id, "PROCESSING") == "spooled"
+
+    records, offset = isolated_spool.read_batch(10)
+    assert [r["op"] for r in records] == ["ticket", "status"]
+    spool._apply_batch(records)
+    isolated_spool.commit(offset)
+
+    (ticket,) = db.fetch_tickets_by_student(student_id, max_staleness=0)
+    assert ticket["status"] == "PROCESSING"
+
+
+def test_orphaned_log_is_replayed_and_removed(tmp_path, new_id):
+    ticket_id, student_id = new_id(), new_id("S")
+    path = tmp_path / "tickets-99999.wal"
+    path.write_text("".join(json.dumps(r) + "\n" for r in _records(ticket_id, student_id)))
+
+    assert spool._replay_file(str(path)) == 5
+    assert not path.exists()
+    assert db.fetch_tickets_by_student(student_id, max_staleness=0)[0]["status"] == "RESOLVED"
+    assert len(_prediction(ticket_id)) == 1
+
+
+def test_rejected_live_write_is_raised_not_spooled(isolated_spool, new_id):
+    with pytest.raises(Exception):
+        spool.write_prediction(new_id(), "IT", "High", 0.9)  # no such ticket
+    assert isolated_spool.pending() == 0
+    assert spool.BREAKER.state == "closed"
+
+
+def test_replay_dead_letters_rejected_records(tmp_path, monkeypatch, new_id):
+    dead_letter_path = tmp_path / "dead_letter.jsonl"
+    monkeypatch.setattr(spool, "SPOOL_DEAD_LETTER_PATH", str(dead_letter_path))
+    ticket_id, student_id, orphan = new_id(), new_id("S"), new_id()
+    records = _records(ticket_id, student_id)
+    bad = dict(records[3], ticket_id=orphan)  # prediction for a ticket that doesn't exist
+    records.insert(3, bad)
+
+    apply_records(records)
+
+    assert db.fetch_tickets_by_student(student_id, max_staleness=0)[0]["status"] == "RESOLVED"
+    assert len(_prediction(ticket_id)) == 1
+    (line,) = dead_letter_path.read_text().splitlines()
+    entry = json.loads(line)
+    assert entry["record"] == bad and "IntegrityError" in entry["error"]
+
+
+def test_replay_propagates_transient_errors(monkeypatch, new_id):
+    monkeypatch.setattr(db, "bulk_insert_incoming_tickets", _raise(sqlite3.OperationalError("database is locked")))
+    with pytest.raises(sqlite3.OperationalError):
+        apply_records(_records(new_id(), new_id("S"))[:1])
+
+
+def test_stale_checkpoint_past_end_replays_from_start(tmp_path, new_id):
+    # Crash after a drain truncated the log: the checkpoint still points past the end
+    ticket_id, student_id = new_id(), new_id("S")
+    path = tmp_path / "tickets-99998.wal"
+    path.write_text("".join(json.dumps(r) + "\n" for r in _records(ticket_id, student_id)[:1]))
+    (tmp_path / "tickets-99998.offset").write_text(str(10_000))
+
+    assert spool._replay_file(str(path)) == 1
+    assert len(db.fetch_tickets_by_student(student_id, max_staleness=0)) == 1
+
+
+def test_reopened_spool_ignores_stale_checkpoint(tmp_path):
+    (tmp_path / "own.wal").write_text(json.dumps({"op": "event", "n": 1}) + "\n")
+    (tmp_path / "own.offset").write_text("10000")
+    log = Spool(directory=str(tmp_path), fsync_interval_ms=1, name="own.wal")
+    assert [r["n"] for r in log.read_batch(10)[0]] == [1]
@@ -0,0 +1,43 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src import inference_service
+from src.config import DRIFT_REFERENCE_PATH
+from src.data_generation import generate_tickets
+from src.train_model import build_drift_reference, fit_models
+
+
+@pytest.fixture(scope="module")
+def tickets():
+    return pd.DataFrame(generate_tickets(n_samples=600, seed=11))
+
+
+@pytest.fixture(scope="module")
+def fitted(tickets):
+    return fit_models(tickets, test_size=0.2, seed=3)
+
+
+def test_fit_models_learns_the_synthetic_labels(tickets, fitted):
+    category_pipeline, priority_pipeline, cat_acc, pri_acc, X_test = fitted
+    assert len(X_test) == 120
+    assert cat_acc > 0.7 and pri_acc > 0.7
+    assert set(category_pipeline.classes_) == set(tickets["true_category"])
+    assert set(priority_pipeline.predict(["urgent: my payment failed today"])) <= set(tickets["true_priority"])
+
+
+def test_drift_reference_covers_the_whole_dataset(tickets, fitted, monkeypatch):
+    monkeypatch.setattr(inference_service, "CASCADE_ENABLED", False)
+    sketch = build_drift_reference(tickets, fitted[0], fitted[1], folds=3)
+    assert sketch.n == len(tickets)
+    assert json.load(open(DRIFT_REFERENCE_PATH))["n"] == len(tickets)
+
+
+def test_drift_reference_keeps_only_escalated_tickets(tickets, fitted, monkeypatch):
+    monkeypatch.setattr(inference_service, "CASCADE_ENABLED", True)
+    escalated = sum(inference_service.escalates(t) for t in tickets["text"])
+    assert 0 < escalated < len(tickets)
+
+    sketch = build_drift_reference(tickets, fitted[0], fitted[1], folds=3)
+    assert sketch.n == escalated